@@ -0,0 +1,34 @@
+from __future__ import annotations
+
+from contextlib import contextmanager
+from typing import Iterator
+
+from langgraph.checkpoint.base import BaseCheckpointSaver, CheckpointTuple
+from langgraph.checkpoint.postgres import PostgresSaver
+from wirl_pregel_runner import BlobSerializer
+from wirl_pregel_runner.blobs import checkpoint_value, thread_blob_store
+
+
+def checkpoint_serde(thread_id: str) -> BlobSerializer:
+    """The serializer the workers checkpoint a thread with: large values live in the thread's blob store."""
+    return BlobSerializer(thread_blob_store(thread_id))
+
+
+@contextmanager
+def open_saver(db_url: str, thread_id: str) -> Iterator[PostgresSaver]:
+    with PostgresSaver.from_conn_string(db_url) as saver:
+        # ``from_conn_string`` takes no serializer
+        saver.serde = checkpoint_serde(thread_id)
+        yield saver
+
+
+def list_checkpoints(saver: BaseCheckpointSaver, thread_id: str) -> list[CheckpointTuple]:
+    """Checkpoints of a thread, oldest first, with channel values and writes read from the blob store."""
+    checkpoints = []
+    for checkpoint_tuple in saver.list({"configurable": {"thread_id": thread_id}}):
+        checkpoint = dict(checkpoint_tuple.checkpoint or {})
+        checkpoint["channel_values"] = {channel: checkpoint_value(value) for channel, value in (checkpoint.get("channel_values") or {}).items()}
+        writes = [(task_id, channel, checkpoint_value(value), *rest) for task_id, channel, value, *rest in checkpoint_tuple.pending_writes or []]
+        checkpoints.append(checkpoint_tuple._replace(checkpoint=checkpoint, pending_writes=writes))
+    checkpoints.reverse()
+    return checkpoints
@@ -19,8 +19,7 @@ from sqlalchemy.orm import Session
 
 dotenv.load_dotenv()
 
-from langgraph.checkpoint.postgres import PostgresSaver  # noqa: E402
-
+from backend.checkpoints import list_checkpoints, open_saver  # noqa: E402
 from backend.database import get_session, init_db  # noqa: E402
 from backend.models import (  # noqa: E402
     ContinueWorkflowRequest,
@@ -273,10 +272,8 @@ def workflow_run_details(workflow_run_id: str, db: Session = Depends(get_session
     if not db_url:
         raise HTTPException(500, "Database configuration missing")
 
-    with PostgresSaver.from_conn_string(db_url) as saver:
-        checkpoints = list(saver.list({"configurable": {"thread_id": thread_id}}))
-
-    checkpoints.reverse()  # oldest first
+    with open_saver(db_url, thread_id) as saver:
+        checkpoints = list_checkpoints(saver, thread_id)
 
     initial_state: dict[str, Any] = {}
     steps: list[WorkflowRunStep] = []
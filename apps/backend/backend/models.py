@@ -6,8 +6,8 @@ from enum import Enum
 from typing import Any, Optional
 
 from pydantic import BaseModel, ConfigDict, Field
-from sqlalchemy import JSON, Boolean, DateTime, Integer, String, Text
-from sqlalchemy.orm import Mapped, mapped_column
+from sqlalchemy import JSON, Boolean, DateTime, Integer, String, Text, event, inspect, text
+from sqlalchemy.orm import Mapped, Session, mapped_column
 from sqlalchemy.sql import func
 
 from backend.database import Base
@@ -43,6 +43,30 @@ class WorkflowStatus(str, Enum):
     CANCELED = "canceled"
 
 
+# Postgres channels workers LISTEN on; the payload is the id of the run
+JOBS_CHANNEL = "workflow_runs_queued"
+CANCEL_CHANNEL = "workflow_runs_canceled"
+
+
+def runs_entering(session: Session, state: WorkflowStatus) -> list[str]:
+    """Runs being inserted in ``state`` or moved to it by the current flush."""
+    ids = []
+    for obj in list(session.new) + list(session.dirty):
+        if isinstance(obj, WorkflowRun) and obj.state == state and (obj in session.new or inspect(obj).attrs.state.history.has_changes()):
+            ids.append(obj.id)
+    return ids
+
+
+@event.listens_for(Session, "after_flush")
+def _notify_workers(session: Session, flush_context: Any) -> None:
+    # NOTIFY is transactional: workers hear about the run once it is committed, never on rollback
+    if session.get_bind().dialect.name != "postgresql":
+        return
+    for channel, state in ((JOBS_CHANNEL, WorkflowStatus.QUEUED), (CANCEL_CHANNEL, WorkflowStatus.CANCELED)):
+        for run_id in runs_entering(session, state):
+            session.connection().execute(text("SELECT pg_notify(:channel, :run_id)"), {"channel": channel, "run_id": run_id})
+
+
 # Pydantic models for request/response validation
 class StartWorkflowRequest(BaseModel):
     template_name: str
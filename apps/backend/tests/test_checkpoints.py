@@ -0,0 +1,78 @@
+"""Tests for reading the checkpoints the workers write."""
+
+from __future__ import annotations
+
+import pytest
+from langgraph.checkpoint.memory import InMemorySaver
+from wirl_pregel_runner import BlobSerializer, run_workflow
+from wirl_pregel_runner.blobs import BLOB_DIR_ENV, thread_blob_store
+
+from backend.checkpoints import checkpoint_serde, list_checkpoints
+
+WIRL = """
+workflow Notes {
+  inputs {
+    String text
+  }
+
+  outputs {
+    String note = Write.note
+    List<String> lines = Write.lines
+  }
+
+  node Write {
+    call write
+    inputs {
+      String text = text
+    }
+    outputs {
+      String note
+      (append) List<String> lines
+    }
+  }
+}
+"""
+
+
+def write(text: str, config: dict) -> dict:
+    return {"note": text * 2000, "lines": [f"line {i}" for i in range(40)]}
+
+
+@pytest.fixture
+def worker_checkpoints(tmp_path, monkeypatch):
+    """Checkpoints of thread ``t1`` written as a worker writes them.
+
+    The 10 kB note goes to the blob store, and so does the first 32-line chunk of ``lines``.
+    """
+    monkeypatch.setenv(BLOB_DIR_ENV, str(tmp_path / "blobs"))
+    path = tmp_path / "notes.wirl"
+    path.write_text(WIRL)
+    saver = InMemorySaver(serde=BlobSerializer(thread_blob_store("t1"), threshold=4096))
+    run_workflow(str(path), fn_map={"write": write}, params={"text": "long "}, thread_id="t1", checkpointer=saver, use_app_cache=False)
+    return saver
+
+
+def reader(written: InMemorySaver, serde) -> InMemorySaver:
+    saver = InMemorySaver(serde=serde)
+    saver.storage, saver.writes, saver.blobs = written.storage, written.writes, written.blobs
+    return saver
+
+
+def test_reads_values_from_the_threads_blob_store(worker_checkpoints):
+    checkpoints = list_checkpoints(reader(worker_checkpoints, checkpoint_serde("t1")), "t1")
+
+    assert checkpoints[-1].checkpoint["channel_values"]["Write.note"] == "long " * 2000
+    assert checkpoints[0].checkpoint["channel_values"]["text"] == "long "
+    writes = [value for checkpoint in checkpoints for _, channel, value in checkpoint.pending_writes if channel == "Write.note"]
+    assert writes == ["long " * 2000]
+
+
+def test_default_serializer_cannot_read_them(worker_checkpoints):
+    with pytest.raises(NotImplementedError, match="Unknown serialization type"):
+        list_checkpoints(reader(worker_checkpoints, None), "t1")
+
+
+def test_reads_append_outputs_as_lists(worker_checkpoints):
+    checkpoints = list_checkpoints(reader(worker_checkpoints, checkpoint_serde("t1")), "t1")
+
+    assert checkpoints[-1].checkpoint["channel_values"]["Write.lines"] == [f"line {i}" for i in range(40)]
@@ -0,0 +1,79 @@
+"""Tests for the job notifications sent when runs are queued."""
+
+from __future__ import annotations
+
+import pytest
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import Session, sessionmaker
+
+from backend.database import Base
+from backend.models import WorkflowRun, WorkflowStatus, runs_entering
+
+
+@pytest.fixture
+def session():
+    """In-memory SQLite session that records the runs each flush would notify about."""
+    engine = create_engine("sqlite:///:memory:", echo=False)
+    Base.metadata.create_all(engine)
+    session = sessionmaker(bind=engine)()
+    session.info["notified"] = []
+    session.info["canceled"] = []
+
+    @event.listens_for(session, "after_flush")
+    def record(session: Session, flush_context) -> None:
+        session.info["notified"].extend(runs_entering(session, WorkflowStatus.QUEUED))
+        session.info["canceled"].extend(runs_entering(session, WorkflowStatus.CANCELED))
+
+    yield session
+    session.close()
+    Base.metadata.drop_all(engine)
+
+
+def make_run(run_id: str, state: WorkflowStatus) -> WorkflowRun:
+    return WorkflowRun(id=run_id, graph_name="test_workflow", thread_id=run_id, state=state, inputs={}, result={})
+
+
+def test_notifies_new_queued_runs(session: Session):
+    """Only runs inserted as queued are announced."""
+    session.add_all([make_run("queued-1", WorkflowStatus.QUEUED), make_run("running-1", WorkflowStatus.RUNNING)])
+    session.commit()
+
+    assert session.info["notified"] == ["queued-1"]
+
+
+def test_notifies_requeued_runs(session: Session):
+    """A run moved back to queued (continue after HITL or failure) is announced again."""
+    run = make_run("run-1", WorkflowStatus.NEEDS_INPUT)
+    session.add(run)
+    session.commit()
+
+    run.state = WorkflowStatus.QUEUED
+    run.resume_payload = '{"answer": {}}'
+    session.commit()
+
+    assert session.info["notified"] == ["run-1"]
+
+
+def test_ignores_other_updates_of_queued_runs(session: Session):
+    """Updating a run that is already queued does not wake workers again."""
+    run = make_run("run-1", WorkflowStatus.QUEUED)
+    session.add(run)
+    session.commit()
+
+    run.result = {"partial": True}
+    session.commit()
+
+    assert session.info["notified"] == ["run-1"]
+
+
+def test_notifies_canceled_runs(session: Session):
+    """Canceling a running run tells its worker to stop."""
+    run = make_run("run-1", WorkflowStatus.RUNNING)
+    session.add(run)
+    session.commit()
+
+    run.state = WorkflowStatus.CANCELED
+    session.commit()
+
+    assert session.info["canceled"] == ["run-1"]
+    assert session.info["notified"] == []
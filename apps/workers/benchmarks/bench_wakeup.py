@@ -0,0 +1,109 @@
+"""Benchmark: enqueue-to-start latency of idle workers, sleep polling vs. LISTEN/NOTIFY.
+
+Queues runs one at a time at random intervals, the way the backend does (insert and
+``pg_notify`` in one transaction), while ``--workers`` idle workers claim them with
+``claim_job`` and finish them at once. Latency is ``started_at - created_at``.
+
+Claimed runs are real rows of ``workflow_runs``: point ``DATABASE_URL`` at a scratch
+database where the backend has created the schema and no real worker is running.
+
+Usage (from the repository root):
+    DATABASE_URL=postgresql://... python apps/workers/benchmarks/bench_wakeup.py [--runs 20] [--poll 10]
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import sys
+import uuid
+from typing import List
+
+import asyncpg
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from workers.db import claim_job, set_state  # noqa: E402
+from workers.dispatcher import JOBS_CHANNEL, JobDispatcher  # noqa: E402
+
+GRAPH_NAME = "bench_wakeup"
+
+
+async def enqueue(pool: asyncpg.pool.Pool) -> None:
+    run_id = str(uuid.uuid4())
+    async with pool.acquire() as conn, conn.transaction():
+        await conn.execute(
+            """
+            INSERT INTO workflow_runs (id, graph_name, thread_id, state, attempt, max_attempts, inputs, result)
+            VALUES ($1, $2, $1, 'queued', 0, 3, '{}', '{}')
+            """,
+            run_id,
+            GRAPH_NAME,
+        )
+        await conn.execute("SELECT pg_notify($1, $2)", JOBS_CHANNEL, run_id)
+
+
+async def idle_worker(pool: asyncpg.pool.Pool, dispatcher: JobDispatcher | None, poll: float) -> None:
+    wid = f"bench-{uuid.uuid4()}"
+    while True:
+        generation = dispatcher.generation if dispatcher else 0
+        job = await claim_job(pool, wid)
+        if job is not None:
+            await set_state(pool, job["id"], "succeeded", result={})
+        elif dispatcher is None:
+            await asyncio.sleep(poll)
+        else:
+            await dispatcher.wait(generation, poll)
+
+
+async def measure(dsn: str, runs: int, workers: int, poll: float, notify: bool) -> List[float]:
+    pool = await asyncpg.create_pool(dsn=dsn)
+    dispatcher = JobDispatcher(dsn) if notify else None
+    try:
+        await pool.execute("DELETE FROM workflow_runs WHERE graph_name = $1", GRAPH_NAME)
+        if dispatcher:
+            dispatcher.start()
+        tasks = [asyncio.create_task(idle_worker(pool, dispatcher, poll)) for _ in range(workers)]
+        # Let every worker go idle first
+        await asyncio.sleep(1.0)
+        for _ in range(runs):
+            await enqueue(pool)
+            await asyncio.sleep(random.uniform(0.2, 1.0))
+        while await pool.fetchval("SELECT count(*) FROM workflow_runs WHERE graph_name = $1 AND state != 'succeeded'", GRAPH_NAME):
+            await asyncio.sleep(0.1)
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        rows = await pool.fetch("SELECT extract(epoch FROM started_at - created_at) AS latency FROM workflow_runs WHERE graph_name = $1", GRAPH_NAME)
+        await pool.execute("DELETE FROM workflow_runs WHERE graph_name = $1", GRAPH_NAME)
+        return [float(row["latency"]) for row in rows]
+    finally:
+        if dispatcher:
+            await dispatcher.stop()
+        await pool.close()
+
+
+def report(label: str, latencies: List[float]) -> None:
+    ms = [latency * 1000 for latency in sorted(latencies)]
+    p95 = ms[int(0.95 * (len(ms) - 1))]
+    print(f"{label:<8} runs={len(ms):<4} mean={statistics.mean(ms):8.1f}ms  p50={statistics.median(ms):8.1f}ms  p95={p95:8.1f}ms  max={ms[-1]:8.1f}ms")
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=20)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--poll", type=float, default=10.0, help="sleep of an idle worker that found no job (the old fixed 10s)")
+    args = parser.parse_args()
+    dsn = os.getenv("DATABASE_URL")
+    if not dsn:
+        sys.exit("DATABASE_URL is not set")
+    report("polling", await measure(dsn, args.runs, args.workers, args.poll, notify=False))
+    report("notify", await measure(dsn, args.runs, args.workers, args.poll, notify=True))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,81 @@
+"""Fixtures for the worker tests.
+
+The database tests run against a scratch database created on the Postgres server at
+``TEST_DATABASE_URL`` (e.g. ``postgresql://postgres@localhost:5432/postgres``) and are
+skipped when it is not set.
+"""
+
+import asyncio
+import os
+import uuid
+from urllib.parse import urlsplit, urlunsplit
+
+import asyncpg
+import pytest
+
+# The columns of backend.models.WorkflowRun that the worker reads and writes
+SCHEMA = """
+CREATE TABLE workflow_runs (
+    id VARCHAR PRIMARY KEY,
+    graph_name VARCHAR NOT NULL,
+    thread_id VARCHAR NOT NULL UNIQUE,
+    state VARCHAR NOT NULL DEFAULT 'queued',
+    attempt INTEGER NOT NULL DEFAULT 0,
+    max_attempts INTEGER NOT NULL DEFAULT 3,
+    worker_id VARCHAR,
+    started_at TIMESTAMPTZ,
+    heartbeat_at TIMESTAMPTZ,
+    finished_at TIMESTAMPTZ,
+    error TEXT,
+    inputs JSON,
+    resume_payload TEXT,
+    result JSON,
+    created_at TIMESTAMPTZ DEFAULT now(),
+    updated_at TIMESTAMPTZ
+)
+"""
+
+
+async def _execute(dsn: str, statement: str) -> None:
+    conn = await asyncpg.connect(dsn=dsn)
+    try:
+        await conn.execute(statement)
+    finally:
+        await conn.close()
+
+
+@pytest.fixture(scope="session")
+def database_url():
+    server_url = os.getenv("TEST_DATABASE_URL")
+    if not server_url:
+        pytest.skip("TEST_DATABASE_URL is not set")
+    name = f"wirl_workers_test_{uuid.uuid4().hex[:8]}"
+    asyncio.run(_execute(server_url, f'CREATE DATABASE "{name}"'))
+    url = urlunsplit(urlsplit(server_url)._replace(path=f"/{name}"))
+    asyncio.run(_execute(url, SCHEMA))
+    yield url
+    asyncio.run(_execute(server_url, f'DROP DATABASE "{name}" WITH (FORCE)'))
+
+
+@pytest.fixture
+def db(database_url, monkeypatch, tmp_path):
+    """Empty ``workflow_runs`` table; the worker settings point at it and at a temporary blob store."""
+    asyncio.run(_execute(database_url, "TRUNCATE workflow_runs"))
+    monkeypatch.setenv("DATABASE_URL", database_url)
+    monkeypatch.setenv("WIRL_BLOB_DIR", str(tmp_path / "blobs"))
+    return database_url
+
+
+async def insert_run(pool: asyncpg.pool.Pool, run_id: str, inputs: str = "{}", graph_name: str = "echo", max_attempts: int = 3) -> None:
+    await pool.execute(
+        "INSERT INTO workflow_runs (id, graph_name, thread_id, inputs, result, max_attempts) VALUES ($1, $2, $1, $3, '{}', $4)",
+        run_id,
+        graph_name,
+        inputs,
+        max_attempts,
+    )
+
+
+async def silence(pool: asyncpg.pool.Pool, run_id: str, seconds: float) -> None:
+    """Move the run's last heartbeat ``seconds`` into the past, as if its worker had died."""
+    await pool.execute("UPDATE workflow_runs SET heartbeat_at = now() - make_interval(secs => $2) WHERE id = $1", run_id, seconds)
@@ -0,0 +1,50 @@
+"""Tests for deleting the checkpoint blobs of threads without checkpoints."""
+
+import asyncio
+import json
+from pathlib import Path
+
+import asyncpg
+from wirl_pregel_runner.blobs import BLOB_THRESHOLD_ENV, blob_root, thread_blob_store
+
+from tests.conftest import insert_run
+from workers import workflow_loader
+from workers.db import BLOB_GC_LOCK, claim_jobs, delete_orphaned_blobs, run_wirl
+
+
+def test_blobs_are_kept_while_their_checkpoints_exist(db, monkeypatch):
+    monkeypatch.setattr(workflow_loader, "WORKFLOWS_DIR", Path("tests/workflows"))
+    monkeypatch.setenv(BLOB_THRESHOLD_ENV, "0")
+
+    async def scenario():
+        async with asyncpg.create_pool(dsn=db, min_size=1, max_size=2) as pool:
+            await insert_run(pool, "finished", inputs=json.dumps({"text": "hi"}))
+            [job] = await claim_jobs(pool, "w1", 1)
+            await run_wirl(job)
+            await pool.execute("UPDATE workflow_runs SET state = 'succeeded' WHERE id = 'finished'")
+            # Its checkpoints were deleted, or it never wrote one
+            await insert_run(pool, "orphaned")
+            await pool.execute("UPDATE workflow_runs SET state = 'failed' WHERE id = 'orphaned'")
+            thread_blob_store("orphaned").put(b"old")
+            # Blobs written just before the run's first checkpoint
+            await insert_run(pool, "starting")
+            thread_blob_store("starting").put(b"new")
+            return await delete_orphaned_blobs(pool)
+
+    deleted = asyncio.run(scenario())
+
+    assert deleted == ["orphaned"]
+    assert sorted(entry.name for entry in blob_root().iterdir()) == ["finished", "starting"]
+
+
+def test_only_one_worker_collects_at_a_time(db):
+    async def scenario():
+        async with asyncpg.create_pool(dsn=db, min_size=2, max_size=2) as pool:
+            async with pool.acquire() as conn:
+                await conn.execute("SELECT pg_advisory_lock($1)", BLOB_GC_LOCK)
+                try:
+                    return await delete_orphaned_blobs(pool)
+                finally:
+                    await conn.execute("SELECT pg_advisory_unlock($1)", BLOB_GC_LOCK)
+
+    assert asyncio.run(scenario()) is None
@@ -0,0 +1,124 @@
+"""Tests for heartbeats, the reaper and putting runs back in the queue."""
+
+import asyncio
+
+import asyncpg
+
+from tests.conftest import insert_run, silence
+from workers.db import claim_jobs, release_jobs, save_progress, set_state
+from workers.heartbeat import Heartbeat, Reaper
+
+
+def run_with_pool(db: str, scenario) -> None:
+    async def main():
+        async with asyncpg.create_pool(dsn=db, min_size=1, max_size=2) as pool:
+            await scenario(pool)
+
+    asyncio.run(main())
+
+
+async def fetch_run(pool: asyncpg.pool.Pool, run_id: str) -> dict:
+    return dict(await pool.fetchrow("SELECT state, attempt, worker_id, error FROM workflow_runs WHERE id = $1", run_id))
+
+
+def test_heartbeat_keeps_claimed_runs_from_being_reaped(db):
+    async def scenario(pool):
+        await insert_run(pool, "r1")
+        await claim_jobs(pool, "w1", 5)
+        heartbeat = Heartbeat(pool, "w1")
+        heartbeat.add("r1")
+        await silence(pool, "r1", 300)
+
+        await heartbeat.tick()
+        await Reaper(pool, stale_after=120).tick()
+
+        assert await fetch_run(pool, "r1") == {"state": "running", "attempt": 1, "worker_id": "w1", "error": None}
+        assert not heartbeat.token("r1").cancelled
+
+    run_with_pool(db, scenario)
+
+
+def test_reaper_requeues_silent_runs_with_attempts_left(db):
+    async def scenario(pool):
+        await insert_run(pool, "r1")
+        await insert_run(pool, "r2")
+        await claim_jobs(pool, "w1", 5)
+        await silence(pool, "r1", 300)
+
+        await Reaper(pool, stale_after=120).tick()
+
+        assert await fetch_run(pool, "r1") == {"state": "queued", "attempt": 1, "worker_id": None, "error": None}
+        assert (await fetch_run(pool, "r2"))["state"] == "running"
+        # The next claim is the run's second attempt
+        [job] = await claim_jobs(pool, "w2", 5)
+        assert (job["id"], job["attempt"], job["worker_id"]) == ("r1", 2, "w2")
+
+    run_with_pool(db, scenario)
+
+
+def test_reaper_fails_silent_runs_on_their_last_attempt(db):
+    async def scenario(pool):
+        await insert_run(pool, "r1", max_attempts=1)
+        await claim_jobs(pool, "w1", 5)
+        await silence(pool, "r1", 300)
+
+        await Reaper(pool, stale_after=120).tick()
+
+        assert await fetch_run(pool, "r1") == {"state": "failed", "attempt": 1, "worker_id": None, "error": "Worker stopped responding on attempt 1 of 1"}
+
+    run_with_pool(db, scenario)
+
+
+def test_heartbeat_stops_runs_taken_back_from_the_worker(db):
+    async def scenario(pool):
+        await insert_run(pool, "r1")
+        await claim_jobs(pool, "w1", 5)
+        heartbeat = Heartbeat(pool, "w1")
+        heartbeat.add("r1")
+        token = heartbeat.token("r1")
+        await silence(pool, "r1", 300)
+        await Reaper(pool, stale_after=120).tick()
+
+        await heartbeat.tick()
+
+        assert token.cancelled
+        # Not reported any more, so a later beat does not touch the re-queued run
+        await heartbeat.tick()
+        assert (await fetch_run(pool, "r1"))["state"] == "queued"
+
+    run_with_pool(db, scenario)
+
+
+def test_released_runs_go_back_to_the_queue_unclaimed(db):
+    async def scenario(pool):
+        await insert_run(pool, "r1")
+        await insert_run(pool, "r2")
+        await claim_jobs(pool, "w1", 5)
+
+        assert sorted(await release_jobs(pool, ["r1", "r2"], "w1")) == ["r1", "r2"]
+        assert await fetch_run(pool, "r1") == {"state": "queued", "attempt": 0, "worker_id": None, "error": None}
+        # Another worker's release does not touch them
+        await claim_jobs(pool, "w2", 1)
+        assert await release_jobs(pool, ["r1", "r2"], "w1") == []
+
+    run_with_pool(db, scenario)
+
+
+def test_reaped_worker_cannot_overwrite_the_new_owners_run(db):
+    async def scenario(pool):
+        await insert_run(pool, "r1")
+        await claim_jobs(pool, "w1", 1)
+        await silence(pool, "r1", 300)
+        await Reaper(pool, stale_after=120).tick()
+        await claim_jobs(pool, "w2", 1)
+
+        # w1 was only slow: it finishes after the run moved to w2
+        await save_progress(pool, "r1", "w1", {"Echo.echoed": "stale"})
+        assert not await set_state(pool, "r1", "w1", "failed", error="Too late")
+        assert await fetch_run(pool, "r1") == {"state": "running", "attempt": 2, "worker_id": "w2", "error": None}
+        assert await pool.fetchval("SELECT result::TEXT FROM workflow_runs WHERE id = 'r1'") == "{}"
+
+        assert await set_state(pool, "r1", "w2", "succeeded", result={"Shout.shout": "HI"})
+        assert (await fetch_run(pool, "r1"))["state"] == "succeeded"
+
+    run_with_pool(db, scenario)
@@ -0,0 +1,103 @@
+"""Tests for choosing the job executor and for the worker process pool."""
+
+import asyncio
+import json
+import signal
+import time
+from pathlib import Path
+
+import asyncpg
+import pytest
+
+from tests.conftest import insert_run
+from workers import workflow_loader
+from workers.db import claim_jobs
+from workers.process_pool import ProcessPool, job_executor
+
+LIMITED = """
+workflow Limited {{
+  metadata {{
+    {metadata}
+  }}
+
+  inputs {{
+    String text
+  }}
+
+  outputs {{
+    String answer = Ask.answer
+  }}
+
+  node Ask {{
+    call ask
+    inputs {{
+      String text = text
+    }}
+    resource: llm
+    outputs {{
+      String answer
+    }}
+  }}
+}}
+"""
+
+
+@pytest.fixture
+def templates(tmp_path, monkeypatch):
+    monkeypatch.setattr(workflow_loader, "WORKFLOWS_DIR", tmp_path)
+    (tmp_path / "limited.wirl").write_text(LIMITED.format(metadata='owner: "workers"'))
+    (tmp_path / "limited_in_process.wirl").write_text(LIMITED.format(metadata='job_executor: "process"'))
+    (tmp_path / "plain.wirl").write_text(LIMITED.format(metadata='job_executor: "process"').replace("resource: llm", ""))
+
+
+def test_template_executor_overrides_the_default(templates):
+    assert job_executor({"graph_name": "plain"}, "thread") == "process"
+    assert job_executor({"graph_name": "limited"}, "thread") == "thread"
+
+
+def test_resource_limited_template_runs_on_threads_by_default(templates):
+    # Every process would have its own llm slots
+    assert job_executor({"graph_name": "limited"}, "process") == "thread"
+
+
+def test_resource_limited_template_cannot_ask_for_processes(templates):
+    with pytest.raises(ValueError, match="limited by llm"):
+        job_executor({"graph_name": "limited_in_process"}, "thread")
+
+
+def test_abandoned_job_has_its_process_terminated(db, monkeypatch):
+    # Read by the fork server's processes when they warm up and import the node functions
+    monkeypatch.setenv("WORKFLOW_DEFINITIONS_PATH", "tests/workflows")
+    monkeypatch.setattr(workflow_loader, "WORKFLOWS_DIR", Path("tests/workflows"))
+    processes = ProcessPool(2)
+    processes.start()
+
+    children = list(processes._idle)
+
+    async def scenario():
+        async with asyncpg.create_pool(dsn=db, min_size=1, max_size=2) as pool:
+            await insert_run(pool, "abandoned", inputs=json.dumps({"text": "zz"}), graph_name="nap")
+            await insert_run(pool, "kept", inputs=json.dumps({"text": "zz"}), graph_name="nap")
+            abandoned, kept = sorted(await claim_jobs(pool, "w1", 2), key=lambda job: job["id"])
+            other = asyncio.create_task(processes.run(kept, time.time() + 600, "w1"))
+            await asyncio.sleep(0)
+            [busy] = processes._busy
+            with pytest.raises(asyncio.TimeoutError):
+                await asyncio.wait_for(processes.run(abandoned, time.time() + 600, "w1"), timeout=3)
+            # Terminated at once, while the other job still runs
+            [gone] = [child for child in children if child is not busy]
+            gone.process.join(timeout=5)
+            assert gone.process.exitcode == -signal.SIGTERM
+            assert busy.process.is_alive()
+            assert processes.pids() == [busy.pid]
+            other.cancel()
+            await asyncio.gather(other, return_exceptions=True)
+
+    try:
+        asyncio.run(scenario())
+        for child in children:
+            child.process.join(timeout=10)
+            assert child.process.exitcode == -signal.SIGTERM
+        assert processes.pids() == []
+    finally:
+        processes.shutdown()
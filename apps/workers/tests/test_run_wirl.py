@@ -0,0 +1,85 @@
+"""Tests for starting claimed runs from their inputs or from their last checkpoint."""
+
+import asyncio
+import json
+from pathlib import Path
+
+import asyncpg
+import pytest
+from langgraph.checkpoint.memory import InMemorySaver
+from wirl_pregel_runner import run_workflow
+
+from tests.conftest import insert_run
+from tests.workflows import echo
+from workers import workflow_loader
+from workers.db import claim_jobs, run_wirl, start_params
+
+WIRL_PATH = "tests/workflows/echo.wirl"
+
+
+@pytest.fixture(autouse=True)
+def workflows(monkeypatch):
+    monkeypatch.setattr(workflow_loader, "WORKFLOWS_DIR", Path("tests/workflows"))
+    echo.calls.clear()
+    echo.fail_shout.clear()
+
+
+def make_job(attempt: int, resume: str | None = None) -> dict:
+    return {"id": "r1", "graph_name": "echo", "inputs": json.dumps({"text": "hi"}), "attempt": attempt, "resume_payload": resume}
+
+
+def test_first_attempt_starts_from_the_inputs():
+    assert asyncio.run(start_params(make_job(1), InMemorySaver())) == ({"text": "hi"}, None)
+
+
+def test_retry_without_a_checkpoint_starts_over():
+    # e.g. the worker died before the first checkpoint, or the template uses durability: exit
+    assert asyncio.run(start_params(make_job(2, resume='"ok"'), InMemorySaver())) == ({"text": "hi"}, None)
+
+
+def test_retry_with_a_checkpoint_resumes():
+    saver = InMemorySaver()
+    echo.fail_shout.append(True)
+    with pytest.raises(RuntimeError, match="Shout failed"):
+        run_workflow(WIRL_PATH, fn_map={"echo": echo.echo, "shout": echo.shout}, params={"text": "hi"}, thread_id="r1", checkpointer=saver)
+
+    assert asyncio.run(start_params(make_job(2), saver)) == (None, None)
+    assert asyncio.run(start_params(make_job(2, resume='"ok"'), saver)) == (None, '"ok"')
+
+
+def test_requeued_run_without_a_checkpoint_runs_from_its_inputs(db):
+    async def scenario():
+        async with asyncpg.create_pool(dsn=db, min_size=1, max_size=2) as pool:
+            await insert_run(pool, "fresh", inputs=json.dumps({"text": "hi"}))
+            # Reaped before its first checkpoint: the second claim finds none
+            await claim_jobs(pool, "w1", 1)
+            await pool.execute("UPDATE workflow_runs SET state = 'queued' WHERE id = 'fresh'")
+            [job] = await claim_jobs(pool, "w2", 1)
+            assert job["attempt"] == 2
+            return await run_wirl(job)
+
+    state, result = asyncio.run(scenario())
+
+    assert state == "succeeded"
+    assert result["Shout.shout"] == "HI"
+    assert echo.calls == ["echo", "shout"]
+
+
+def test_requeued_run_resumes_from_its_checkpoint(db):
+    async def scenario():
+        async with asyncpg.create_pool(dsn=db, min_size=1, max_size=2) as pool:
+            await insert_run(pool, "resumed", inputs=json.dumps({"text": "hi"}))
+            [job] = await claim_jobs(pool, "w1", 1)
+            echo.fail_shout.append(True)
+            with pytest.raises(RuntimeError, match="Shout failed"):
+                await run_wirl(job)
+            await pool.execute("UPDATE workflow_runs SET state = 'queued' WHERE id = 'resumed'")
+            [job] = await claim_jobs(pool, "w2", 1)
+            return await run_wirl(job)
+
+    state, result = asyncio.run(scenario())
+
+    assert state == "succeeded"
+    assert result["Shout.shout"] == "HI"
+    # Echo's output was checkpointed, so only Shout runs again
+    assert echo.calls == ["echo", "shout", "shout"]
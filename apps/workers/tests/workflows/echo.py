@@ -0,0 +1,16 @@
+# Calls made by the worker tests' runs; ``fail_shout`` makes the second node fail once
+calls = []
+fail_shout = []
+
+
+def echo(text: str, config: dict) -> dict:
+    calls.append("echo")
+    return {"echoed": text}
+
+
+def shout(echoed: str, config: dict) -> dict:
+    calls.append("shout")
+    if fail_shout:
+        fail_shout.pop()
+        raise RuntimeError("Shout failed")
+    return {"shout": echoed.upper()}
@@ -0,0 +1,8 @@
+# Sleeps past the timeouts of the process pool tests
+
+import time
+
+
+def nap(text: str, config: dict) -> dict:
+    time.sleep(120)
+    return {"napped": text}
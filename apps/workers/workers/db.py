@@ -2,27 +2,31 @@ import asyncio
 import json
 import logging
 import os
-from typing import Any, Dict
+from typing import Any, Awaitable, Callable, Dict, List
 
 import asyncpg
-from langgraph.checkpoint.postgres import PostgresSaver
-from wirl_pregel_runner import run_workflow
+from langgraph.checkpoint.base import BaseCheckpointSaver
+from langgraph.checkpoint.postgres.aio import AsyncPostgresSaver
+from wirl_pregel_runner import BlobSerializer, CancelToken, NodeUpdate, astream_workflow
+from wirl_pregel_runner.blobs import blob_root, thread_blob_store
 
+from workers.dispatcher import JOBS_CHANNEL
 from workers.workflow_loader import get_template
 
 logger = logging.getLogger(__name__)
 
 
-async def claim_job(pool: asyncpg.pool.Pool, worker_id: str) -> Dict[str, Any] | None:
+async def claim_jobs(pool: asyncpg.pool.Pool, worker_id: str, limit: int) -> List[Dict[str, Any]]:
+    """Claim up to ``limit`` queued runs, oldest first, in one transaction."""
     async with pool.acquire() as conn, conn.transaction():
-        row = await conn.fetchrow(
+        rows = await conn.fetch(
             """
             WITH next AS (
                 SELECT id
                 FROM workflow_runs
                 WHERE state = 'queued'
                 ORDER BY id
-                LIMIT 1
+                LIMIT $2
                 FOR UPDATE SKIP LOCKED
             )
             UPDATE workflow_runs
@@ -36,24 +40,112 @@ async def claim_job(pool: asyncpg.pool.Pool, worker_id: str) -> Dict[str, Any] |
             RETURNING workflow_runs.*;
             """,
             worker_id,
+            limit,
+        )
+    return [dict(row) for row in rows]
+
+
+async def claim_job(pool: asyncpg.pool.Pool, worker_id: str) -> Dict[str, Any] | None:
+    jobs = await claim_jobs(pool, worker_id, 1)
+    return jobs[0] if jobs else None
+
+
+async def release_jobs(pool: asyncpg.pool.Pool, job_ids: List[str], worker_id: str) -> List[str]:
+    """Put claimed runs that never started back in the queue and wake the other workers.
+
+    The claim is undone, ``attempt`` included, so a released run is not taken for a retry.
+    """
+    async with pool.acquire() as conn, conn.transaction():
+        rows = await conn.fetch(
+            """
+            WITH released AS (
+                UPDATE workflow_runs
+                SET state = 'queued',
+                    worker_id = NULL,
+                    started_at = NULL,
+                    heartbeat_at = NULL,
+                    attempt = attempt - 1
+                WHERE id = ANY($1::VARCHAR[]) AND worker_id = $2 AND state = 'running'
+                RETURNING id
+            )
+            SELECT id, pg_notify($3, id) FROM released
+            """,
+            job_ids,
+            worker_id,
+            JOBS_CHANNEL,
+        )
+    return [row["id"] for row in rows]
+
+
+async def heartbeat_jobs(pool: asyncpg.pool.Pool, job_ids: List[str], worker_id: str) -> List[str]:
+    """Refresh ``heartbeat_at`` of the given runs still held by ``worker_id``, in one statement."""
+    async with pool.acquire() as conn:
+        rows = await conn.fetch(
+            """
+            UPDATE workflow_runs
+            SET heartbeat_at = now()
+            WHERE id = ANY($1::VARCHAR[]) AND worker_id = $2 AND state = 'running'
+            RETURNING id
+            """,
+            job_ids,
+            worker_id,
+        )
+    return [row["id"] for row in rows]
+
+
+async def reap_stale_jobs(pool: asyncpg.pool.Pool, stale_after: float) -> List[Dict[str, Any]]:
+    """Take back running runs whose heartbeat is older than ``stale_after`` seconds.
+
+    A run with attempts left goes back to the queue (and resumes from its last checkpoint);
+    one that used all of its ``max_attempts`` fails.
+    """
+    async with pool.acquire() as conn, conn.transaction():
+        rows = await conn.fetch(
+            """
+            WITH stale AS (
+                SELECT id, worker_id
+                FROM workflow_runs
+                WHERE state = 'running' AND heartbeat_at < now() - make_interval(secs => $1)
+                FOR UPDATE SKIP LOCKED
+            ),
+            reaped AS (
+                UPDATE workflow_runs
+                SET state = CASE WHEN attempt < max_attempts THEN 'queued' ELSE 'failed' END,
+                    worker_id = NULL,
+                    finished_at = CASE WHEN attempt < max_attempts THEN NULL ELSE now() END,
+                    error = CASE WHEN attempt < max_attempts THEN error ELSE 'Worker stopped responding on attempt ' || attempt || ' of ' || max_attempts END
+                FROM stale
+                WHERE workflow_runs.id = stale.id
+                RETURNING workflow_runs.id, workflow_runs.state, workflow_runs.attempt, stale.worker_id
+            )
+            SELECT id, state, attempt, worker_id, CASE WHEN state = 'queued' THEN pg_notify($2, id) END AS notified
+            FROM reaped
+            """,
+            stale_after,
+            JOBS_CHANNEL,
         )
-    return dict(row) if row else None
+    return [dict(row) for row in rows]
 
 
 async def set_state(
     pool: asyncpg.pool.Pool,
     job_id: str,
+    worker_id: str,
     new_state: str,
     result: Dict[str, Any] | None = None,
     error: str | None = None,
-) -> None:
+) -> bool:
+    """Record how a job ended, if it is still running on ``worker_id`` (see ``job_is_held``).
+
+    A job that was canceled, or reaped and claimed by another worker, is left alone.
+    """
     async with pool.acquire() as conn:
         try:
             res_str = json.dumps(result) if result is not None else "{}"
         except Exception as _:
             res_str = "{}"
 
-        await conn.execute(
+        status = await conn.execute(
             """
             UPDATE workflow_runs
             SET state = $2::VARCHAR,
@@ -61,50 +153,143 @@ async def set_state(
                 finished_at = CASE WHEN $2::VARCHAR IN ('succeeded','failed','canceled') THEN now() END,
                 error = $3,
                 result = COALESCE($4, result)
-            WHERE id = $1 AND state != 'canceled'
+            WHERE id = $1 AND worker_id = $5 AND state = 'running'
             """,
             job_id,
             new_state,
             error,
             res_str,
+            worker_id,
         )
+    return status != "UPDATE 0"
 
 
-async def run_wirl(job: Dict[str, Any]) -> tuple[str, Dict[str, Any]]:
-    tpl = get_template(job["graph_name"])
-    if not tpl:
-        raise ValueError("Template not found")
-    params = json.loads(job.get("inputs", "{}"))
-    resume = job.get("resume_payload")
-    # Resume after interrupt or after continue failed job
-    if resume or job.get("attempt", 0) > 1:
-        params = None
-        logger.info(f"Resuming job {job['id']} with params {params}")
-    # Convert absolute path to relative module path
-    workflow_path = tpl["path"]
+async def save_progress(pool: asyncpg.pool.Pool, job_id: str, worker_id: str, partial: Dict[str, Any]) -> None:
+    """Store the outputs produced so far on a job running on ``worker_id`` and refresh its heartbeat."""
+    try:
+        res_str = json.dumps(partial, default=str)
+    except Exception as _:
+        return
+
+    async with pool.acquire() as conn:
+        await conn.execute(
+            """
+            UPDATE workflow_runs
+            SET result = $2, heartbeat_at = now()
+            WHERE id = $1 AND worker_id = $3 AND state = 'running'
+            """,
+            job_id,
+            res_str,
+            worker_id,
+        )
+
+
+async def job_is_held(pool: asyncpg.pool.Pool, job_id: str, worker_id: str) -> bool:
+    """Whether the run is still running on ``worker_id`` (not canceled, finished or reaped)."""
+    async with pool.acquire() as conn:
+        return bool(await conn.fetchval("SELECT 1 FROM workflow_runs WHERE id = $1 AND worker_id = $2 AND state = 'running'", job_id, worker_id))
+
+
+# Key of the advisory lock held by the one worker collecting blobs
+BLOB_GC_LOCK = 0x7769726C626C6F62
 
-    rel_path = os.path.relpath(workflow_path, start=os.getcwd())
+
+async def delete_orphaned_blobs(pool: asyncpg.pool.Pool) -> List[str] | None:
+    """Delete the blob directories of threads that have no checkpoints left.
+
+    Blobs live as long as the checkpoints that reference them: the backend shows the
+    checkpoints of finished runs too. Runs that are queued or running keep theirs even
+    before their first checkpoint is written. Only one worker collects at a time; the
+    others get ``None``.
+    """
+    root = blob_root()
+    thread_ids = [entry.name for entry in root.iterdir() if entry.is_dir()] if root.is_dir() else []
+    async with pool.acquire() as conn:
+        async with conn.transaction():
+            if not await conn.fetchval("SELECT pg_try_advisory_xact_lock($1)", BLOB_GC_LOCK):
+                return None
+            if not thread_ids or not await conn.fetchval("SELECT to_regclass('checkpoints') IS NOT NULL"):
+                return []
+            rows = await conn.fetch(
+                """
+                SELECT DISTINCT thread_id AS id FROM checkpoints WHERE thread_id = ANY($1::TEXT[])
+                UNION
+                SELECT id FROM workflow_runs WHERE id = ANY($1::VARCHAR[]) AND state IN ('queued', 'running', 'needs_input')
+                """,
+                thread_ids,
+            )
+            kept = {row["id"] for row in rows}
+            orphaned = [thread_id for thread_id in thread_ids if thread_id not in kept]
+            for thread_id in orphaned:
+                await asyncio.to_thread(thread_blob_store(thread_id, root).clear)
+    return orphaned
+
+
+def load_functions(tpl: Dict[str, str]) -> Dict[str, Any]:
+    """Import the functions module next to a template's ``.wirl`` file."""
+    # Convert absolute path to relative module path
+    rel_path = os.path.relpath(tpl["path"], start=os.getcwd())
     functions_module = rel_path.replace(".wirl", "").replace(os.sep, ".")
 
     mod = __import__(functions_module, fromlist=["*"])
-    fn_map = {k: getattr(mod, k) for k in dir(mod) if not k.startswith("_")}
+    return {k: getattr(mod, k) for k in dir(mod) if not k.startswith("_")}
+
+
+async def start_params(job: Dict[str, Any], checkpointer: BaseCheckpointSaver) -> tuple[Dict[str, Any] | None, str | None]:
+    """Inputs and resume payload to run a claimed job with.
+
+    A HITL answer, or a retry after a failure or a reaped worker, continues the thread from
+    its last checkpoint. Without one (the worker died before the first checkpoint, or the
+    template only checkpoints on exit) the run starts over from its stored inputs.
+    """
+    params = json.loads(job.get("inputs") or "{}")
+    resume = job.get("resume_payload")
+    if not resume and job.get("attempt", 0) <= 1:
+        return params, None
+    if await checkpointer.aget_tuple({"configurable": {"thread_id": job["id"]}}) is None:
+        logger.warning(f"Job {job['id']} has no checkpoint to resume from, starting it over on attempt {job.get('attempt')}")
+        return params, None
+    logger.info(f"Resuming job {job['id']} from its last checkpoint")
+    return None, resume
+
+
+async def run_wirl(
+    job: Dict[str, Any],
+    on_progress: Callable[[Dict[str, Any]], Awaitable[None]] | None = None,
+    deadline: float | None = None,
+    cancel_token: CancelToken | None = None,
+) -> tuple[str, Dict[str, Any]]:
+    tpl = get_template(job["graph_name"])
+    if not tpl:
+        raise ValueError("Template not found")
+    fn_map = load_functions(tpl)
     db_url = os.environ.get("DATABASE_URL")
     if not isinstance(db_url, str) or not db_url:
         raise RuntimeError("DATABASE_URL is not set")
 
-    def _run_in_thread():
-        # Create the saver and its DB connection inside the worker thread
-        with PostgresSaver.from_conn_string(db_url) as saver:
-            saver.setup()
-            return run_workflow(
-                tpl["path"],
-                fn_map=fn_map,
-                params=params,
-                thread_id=job["id"],
-                resume=resume,
-                checkpointer=saver,
-            )
-
-    result = await asyncio.to_thread(_run_in_thread)
+    # Run on the worker's event loop: async node functions are awaited directly and
+    # sync ones are dispatched to the default executor by the runner. Large channel
+    # values (e.g. images) are checkpointed as references into the run's blob store.
+    async with AsyncPostgresSaver.from_conn_string(db_url, serde=BlobSerializer(thread_blob_store(job["id"]))) as saver:
+        await saver.setup()
+        params, resume = await start_params(job, saver)
+        partial: Dict[str, Any] = {}
+        async for event in astream_workflow(
+            tpl["path"],
+            fn_map=fn_map,
+            params=params,
+            thread_id=job["id"],
+            resume=resume,
+            checkpointer=saver,
+            deadline=deadline,
+            cancel_token=cancel_token,
+        ):
+            if not isinstance(event, NodeUpdate):
+                result = event.values
+                continue
+            logger.info(f"Job {job['id']}: {event.node} finished step {event.step} in {event.duration:.3f}s")
+            if on_progress is not None and event.outputs:
+                partial.update(event.outputs)
+                await on_progress(partial)
     state = "needs_input" if "__interrupt__" in result else "succeeded"
     return state, result
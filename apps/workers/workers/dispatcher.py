@@ -0,0 +1,93 @@
+import asyncio
+import logging
+from typing import Callable
+
+import asyncpg
+
+logger = logging.getLogger(__name__)
+
+# Postgres channels the backend NOTIFYs when a run is queued or canceled (see backend.models)
+JOBS_CHANNEL = "workflow_runs_queued"
+CANCEL_CHANNEL = "workflow_runs_canceled"
+
+
+class JobDispatcher:
+    """Wakes idle workers as soon as the backend queues a run.
+
+    One connection per worker process LISTENs on ``JOBS_CHANNEL``. Callers read
+    ``generation`` before looking for jobs and pass it to ``wait``, so a notification
+    that arrives while they query is not lost. When the connection drops, workers are
+    woken (notifications may have been missed) and fall back to polling until it is back.
+    ``on_cancel`` is called with the id of each run canceled through the backend.
+    """
+
+    def __init__(self, dsn: str | None, reconnect_delay: float = 5.0, on_cancel: Callable[[str], None] | None = None):
+        self._dsn = dsn
+        self._reconnect_delay = reconnect_delay
+        self._on_cancel = on_cancel
+        self._wakeup = asyncio.Event()
+        self._task: asyncio.Task[None] | None = None
+        self.generation = 0
+
+    def start(self) -> None:
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        finally:
+            self._task = None
+
+    def wake(self) -> None:
+        self.generation += 1
+        self._wakeup.set()
+        self._wakeup = asyncio.Event()
+
+    async def wait(self, generation: int, timeout: float) -> None:
+        """Return on the first wake-up after ``generation``, or after ``timeout`` seconds."""
+        if generation != self.generation:
+            return
+        try:
+            await asyncio.wait_for(self._wakeup.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+
+    def _on_notify(self, conn: asyncpg.Connection, pid: int, channel: str, payload: str) -> None:
+        logger.debug(f"Run {payload} queued")
+        self.wake()
+
+    def _on_cancel_notify(self, conn: asyncpg.Connection, pid: int, channel: str, payload: str) -> None:
+        logger.debug(f"Run {payload} canceled")
+        if self._on_cancel is not None:
+            self._on_cancel(payload)
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                conn = await asyncpg.connect(dsn=self._dsn)
+            except Exception as exc:
+                logger.warning(f"Could not connect to listen for jobs, polling until it works: {exc}")
+                await asyncio.sleep(self._reconnect_delay)
+                continue
+            closed = asyncio.Event()
+            conn.add_termination_listener(lambda _: closed.set())
+            try:
+                await conn.add_listener(JOBS_CHANNEL, self._on_notify)
+                await conn.add_listener(CANCEL_CHANNEL, self._on_cancel_notify)
+                # Runs queued while we were not listening
+                self.wake()
+                await closed.wait()
+                logger.warning("Job listener connection closed, reconnecting")
+            except Exception as exc:
+                logger.warning(f"Job listener failed, reconnecting: {exc}")
+            finally:
+                if not conn.is_closed():
+                    await conn.close()
+            self.wake()
+            await asyncio.sleep(self._reconnect_delay)
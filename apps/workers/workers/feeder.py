@@ -0,0 +1,100 @@
+import asyncio
+import logging
+from typing import Any, Dict
+
+import asyncpg
+
+from workers.db import claim_jobs, release_jobs
+from workers.dispatcher import JobDispatcher
+from workers.heartbeat import Heartbeat
+
+logger = logging.getLogger(__name__)
+
+
+class JobFeeder:
+    """Claims queued runs in batches and hands them to the worker coroutines of a process.
+
+    Each claim takes as many runs as there is free capacity: idle workers plus up to
+    ``prefetch`` runs waiting in the local queue, minus the runs already waiting there. A
+    burst of queued runs is claimed in a few transactions instead of one per run. Prefetched
+    runs are already ``running`` in the database; ``stop`` puts the ones no worker took back
+    in the queue.
+    """
+
+    def __init__(
+        self,
+        pool: asyncpg.pool.Pool,
+        dispatcher: JobDispatcher,
+        worker_id: str,
+        workers: int,
+        prefetch: int = 0,
+        poll_interval: float = 30.0,
+        heartbeat: Heartbeat | None = None,
+    ):
+        self.worker_id = worker_id
+        self._pool = pool
+        self._dispatcher = dispatcher
+        self._heartbeat = heartbeat
+        self._prefetch = prefetch
+        self._poll_interval = poll_interval
+        self._queue: asyncio.Queue[Dict[str, Any]] = asyncio.Queue(maxsize=workers + prefetch)
+        self._idle = 0
+        self._wanted = asyncio.Event()
+        self._task: asyncio.Task[None] | None = None
+
+    def start(self) -> None:
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop claiming and release the prefetched runs no worker has taken."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            finally:
+                self._task = None
+        job_ids = []
+        while not self._queue.empty():
+            job_ids.append(self._queue.get_nowait()["id"])
+        if job_ids:
+            released = await release_jobs(self._pool, job_ids, self.worker_id)
+            if self._heartbeat is not None:
+                for job_id in job_ids:
+                    self._heartbeat.discard(job_id)
+            logger.info(f"Released {len(released)} prefetched jobs")
+
+    async def get(self) -> Dict[str, Any]:
+        """Wait for the next claimed run."""
+        self._idle += 1
+        self._wanted.set()
+        try:
+            return await self._queue.get()
+        finally:
+            self._idle -= 1
+
+    def free(self) -> int:
+        return self._idle + self._prefetch - self._queue.qsize()
+
+    async def _run(self) -> None:
+        while True:
+            wanted = self.free()
+            if wanted <= 0:
+                self._wanted.clear()
+                await self._wanted.wait()
+                continue
+            generation = self._dispatcher.generation
+            try:
+                jobs = await claim_jobs(self._pool, self.worker_id, wanted)
+            except Exception as exc:
+                logger.error(f"Could not claim jobs: {exc}")
+                jobs = []
+            for job in jobs:
+                if self._heartbeat is not None:
+                    self._heartbeat.add(job["id"])
+                self._queue.put_nowait(job)
+            if len(jobs) < wanted:
+                # The queue is drained: wait for a notification or the next poll
+                await self._dispatcher.wait(generation, self._poll_interval)
@@ -0,0 +1,125 @@
+import asyncio
+import logging
+from abc import ABC, abstractmethod
+from typing import Dict, Set
+
+import asyncpg
+from wirl_pregel_runner import CancelToken
+
+from workers.db import delete_orphaned_blobs, heartbeat_jobs, reap_stale_jobs
+
+logger = logging.getLogger(__name__)
+
+
+class _Loop(ABC):
+    """Background task calling ``tick`` every ``interval`` seconds until stopped."""
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        self._task: asyncio.Task[None] | None = None
+
+    def start(self) -> None:
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        finally:
+            self._task = None
+
+    @abstractmethod
+    async def tick(self) -> None: ...
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await self.tick()
+            except Exception as exc:  # pragma: no cover - background safety
+                logger.error(f"{type(self).__name__} failed: {exc}")
+
+
+class Heartbeat(_Loop):
+    """Keeps ``heartbeat_at`` fresh for every run a worker process holds.
+
+    Runs are added when they are claimed (prefetched ones included) and discarded when
+    they finish or are released. One ``UPDATE`` per interval covers all of them. Each run
+    has a ``CancelToken``: it is cancelled when the run is canceled through the backend
+    (``cancel``) or when a beat finds it no longer running on this worker.
+    """
+
+    def __init__(self, pool: asyncpg.pool.Pool, worker_id: str, interval: float = 15.0):
+        super().__init__(interval)
+        self.worker_id = worker_id
+        self._pool = pool
+        self._jobs: Set[str] = set()
+        self._tokens: Dict[str, CancelToken] = {}
+
+    def add(self, job_id: str) -> None:
+        self._jobs.add(job_id)
+        self._tokens.setdefault(job_id, CancelToken())
+
+    def discard(self, job_id: str) -> None:
+        self._jobs.discard(job_id)
+        self._tokens.pop(job_id, None)
+
+    def token(self, job_id: str) -> CancelToken:
+        return self._tokens.setdefault(job_id, CancelToken())
+
+    def cancel(self, job_id: str, reason: str = "Run canceled") -> None:
+        token = self._tokens.get(job_id)
+        if token is not None:
+            token.cancel(reason)
+
+    async def tick(self) -> None:
+        if not self._jobs:
+            return
+        job_ids = sorted(self._jobs)
+        alive = set(await heartbeat_jobs(self._pool, job_ids, self.worker_id))
+        for job_id in job_ids:
+            if job_id not in alive and job_id in self._jobs:
+                # Finished, canceled or reaped since the last beat: stop reporting it and stop running it
+                logger.info(f"Job {job_id} is no longer running on {self.worker_id}")
+                self._jobs.discard(job_id)
+                self.cancel(job_id, f"Job {job_id} is no longer running on {self.worker_id}")
+
+
+class Reaper(_Loop):
+    """Re-queues or fails runs whose worker stopped sending heartbeats.
+
+    Every worker process runs one; ``FOR UPDATE SKIP LOCKED`` keeps them from reaping the
+    same run twice. ``stale_after`` must be well above the heartbeat interval.
+    """
+
+    def __init__(self, pool: asyncpg.pool.Pool, stale_after: float = 120.0, interval: float = 60.0):
+        super().__init__(interval)
+        self.stale_after = stale_after
+        self._pool = pool
+
+    async def tick(self) -> None:
+        for job in await reap_stale_jobs(self._pool, self.stale_after):
+            action = "re-queued" if job["state"] == "queued" else "failed"
+            logger.warning(f"Job {job['id']} of {job['worker_id']} had no heartbeat for {self.stale_after:g}s, {action} after attempt {job['attempt']}")
+
+
+class BlobCollector(_Loop):
+    """Deletes the checkpoint blobs of threads whose checkpoints are gone (see ``delete_orphaned_blobs``).
+
+    Every worker process runs one, but an advisory lock lets only one of them list the
+    blob root at a time.
+    """
+
+    def __init__(self, pool: asyncpg.pool.Pool, interval: float = 3600.0):
+        super().__init__(interval)
+        self._pool = pool
+
+    async def tick(self) -> None:
+        deleted = await delete_orphaned_blobs(self._pool)
+        if deleted:
+            logger.info(f"Deleted the blobs of {len(deleted)} threads without checkpoints")
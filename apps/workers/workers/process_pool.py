@@ -0,0 +1,243 @@
+import asyncio
+import logging
+import multiprocessing
+import os
+import pickle
+from concurrent.futures.process import BrokenProcessPool
+from multiprocessing.connection import Connection
+from typing import Any, Dict, List, Set
+
+import asyncpg
+from wirl_lang import Workflow, parse_wirl_to_objects
+from wirl_pregel_runner import CancelToken, get_pregel_app
+
+from workers.db import job_is_held, load_functions, run_wirl, save_progress
+from workers.workflow_loader import get_template, list_templates
+
+logger = logging.getLogger(__name__)
+
+# Where a job runs: on the worker's event loop and threads, or in a worker process
+EXECUTORS = ("thread", "process")
+# WIRL ``metadata`` entry overriding JOB_EXECUTOR for one template
+EXECUTOR_KEY = "job_executor"
+
+# Imported once by the fork server, so new worker processes start with them loaded
+PRELOAD = ["asyncpg", "langgraph.checkpoint.postgres.aio", "wirl_lang", "wirl_pregel_runner", "workers.db"]
+
+
+def workflow_resources(workflow: Workflow) -> Set[str]:
+    """Resources named by the ``resource:`` of the workflow's nodes, inner nodes included."""
+    resources = set()
+    for node in workflow.nodes:
+        for inner in getattr(node, "nodes", [node]):
+            if getattr(inner, "resource", None):
+                resources.add(inner.resource)
+    return resources
+
+
+def job_executor(job: Dict[str, Any], default: str) -> str:
+    """``job_executor`` of the job's template, or ``default``.
+
+    Resource limits hold within one process, so every worker process would get its own
+    slots. A template with ``resource:`` nodes cannot ask for ``process``; when ``default``
+    is ``process`` it runs on the worker's threads instead.
+    """
+    tpl = get_template(job["graph_name"])
+    executor = default
+    if tpl is None:
+        return _checked(executor)
+    workflow = parse_wirl_to_objects(tpl["path"])
+    metadata = workflow.metadata.entries if workflow.metadata is not None else {}
+    executor = _checked(metadata.get(EXECUTOR_KEY, default))
+    resources = workflow_resources(workflow) if executor == "process" else set()
+    if resources and EXECUTOR_KEY in metadata:
+        raise ValueError(f"{tpl['id']} has nodes limited by {', '.join(sorted(resources))}, whose limits are per process; it cannot use {EXECUTOR_KEY}: process")
+    if resources:
+        logger.warning(f"Running {tpl['id']} on threads: its nodes are limited by {', '.join(sorted(resources))}, whose limits are per process")
+        executor = "thread"
+    return executor
+
+
+def _checked(executor: str) -> str:
+    if executor not in EXECUTORS:
+        raise ValueError(f"Unknown job executor {executor!r}, expected one of {', '.join(EXECUTORS)}")
+    return executor
+
+
+def _warm_up(log_level: int) -> None:
+    """Import every template's functions and build its graph, before a process's first job."""
+    logging.basicConfig(level=log_level)
+    for tpl in list_templates():
+        try:
+            get_pregel_app(tpl["path"], load_functions(tpl))
+        except Exception as exc:
+            logger.warning(f"Could not warm up {tpl['id']}: {exc}")
+
+
+def _run_job(job: Dict[str, Any], deadline: float, worker_id: str, watch_interval: float) -> tuple[str, Dict[str, Any]]:
+    return asyncio.run(_arun_job(job, deadline, worker_id, watch_interval))
+
+
+async def _watch(pool: asyncpg.pool.Pool, job_id: str, worker_id: str, token: CancelToken, interval: float) -> None:
+    # The parent's token does not cross the process boundary; the row is the signal
+    while not token.cancelled:
+        await asyncio.sleep(interval)
+        if not await job_is_held(pool, job_id, worker_id):
+            token.cancel(f"Job {job_id} is no longer running on {worker_id}")
+
+
+async def _arun_job(job: Dict[str, Any], deadline: float, worker_id: str, watch_interval: float) -> tuple[str, Dict[str, Any]]:
+    token = CancelToken()
+    async with asyncpg.create_pool(dsn=os.getenv("DATABASE_URL"), min_size=1, max_size=2) as pool:
+
+        async def on_progress(partial):
+            await save_progress(pool, job["id"], worker_id, partial)
+
+        watcher = asyncio.create_task(_watch(pool, job["id"], worker_id, token, watch_interval))
+        try:
+            return await run_wirl(job, on_progress=on_progress, deadline=deadline, cancel_token=token)
+        finally:
+            watcher.cancel()
+            await asyncio.gather(watcher, return_exceptions=True)
+
+
+def _serve(conn: Connection, log_level: int) -> None:
+    """Main loop of a worker process: run each job received on ``conn`` and send back its outcome."""
+    _warm_up(log_level)
+    while True:
+        request = conn.recv()
+        if request is None:
+            return
+        try:
+            outcome = (True, _run_job(*request))
+        except Exception as exc:
+            outcome = (False, exc)
+        try:
+            conn.send(outcome)
+        except (pickle.PicklingError, TypeError, AttributeError):
+            conn.send((False, RuntimeError(f"{type(outcome[1]).__name__}: {outcome[1]}")))
+
+
+class _Process:
+    """One worker process and the parent's end of its pipe."""
+
+    def __init__(self, context: multiprocessing.context.BaseContext, log_level: int):
+        self.conn, child_conn = context.Pipe()
+        self.process = context.Process(target=_serve, args=(child_conn, log_level), daemon=True)
+        self.process.start()
+        child_conn.close()
+        self.jobs = 0
+
+    @property
+    def pid(self) -> int | None:
+        return self.process.pid
+
+    async def call(self, *request: Any) -> Any:
+        loop = asyncio.get_running_loop()
+        reply = loop.create_future()
+
+        def on_readable() -> None:
+            loop.remove_reader(self.conn.fileno())
+            try:
+                reply.set_result(self.conn.recv())
+            except (EOFError, OSError) as exc:
+                reply.set_exception(BrokenProcessPool(f"Worker process {self.pid} exited with code {self.process.exitcode}: {exc}"))
+
+        self.conn.send(request)
+        loop.add_reader(self.conn.fileno(), on_readable)
+        try:
+            ok, value = await reply
+        finally:
+            if not reply.done() or reply.cancelled():
+                loop.remove_reader(self.conn.fileno())
+        if not ok:
+            raise value
+        return value
+
+    def stop(self) -> None:
+        """Let the process exit once it is idle."""
+        try:
+            self.conn.send(None)
+        except OSError:
+            pass
+        self.conn.close()
+
+    def terminate(self) -> None:
+        self.process.terminate()
+        self.conn.close()
+
+
+class ProcessPool:
+    """Runs jobs in a pool of worker processes, so CPU-bound nodes of different jobs use different cores.
+
+    Processes are forked from a fork server that has ``PRELOAD`` imported, and each one
+    imports every template's functions and builds its graph before its first job. Each
+    process runs one job at a time and is replaced after ``max_jobs`` jobs, which returns
+    memory leaked by node libraries. Inside a process, the job runs as on the worker:
+    progress, deadline and checkpoints are the same. Cancellation is seen by polling the
+    run's row every ``watch_interval`` seconds.
+
+    A job whose ``run`` is cancelled (e.g. by the worker's ``wait_for`` timeout) would keep
+    running in its process, so that process is terminated at once and replaced on demand.
+    """
+
+    def __init__(self, size: int, max_jobs: int | None = None, watch_interval: float = 2.0):
+        self.size = size
+        self.max_jobs = max_jobs
+        self.watch_interval = watch_interval
+        self._context = multiprocessing.get_context("forkserver")
+        self._context.set_forkserver_preload(PRELOAD)
+        self._idle: List[_Process] = []
+        self._busy: Set[_Process] = set()
+        self._slots: asyncio.Semaphore | None = None
+
+    def start(self) -> None:
+        """Fork and warm up the processes now instead of on the first jobs."""
+        while len(self._idle) + len(self._busy) < self.size:
+            self._idle.append(self._spawn())
+
+    def pids(self) -> List[int]:
+        return [proc.pid for proc in [*self._idle, *self._busy] if proc.pid is not None]
+
+    def _spawn(self) -> _Process:
+        return _Process(self._context, logging.getLogger().level)
+
+    async def run(self, job: Dict[str, Any], deadline: float, worker_id: str) -> tuple[str, Dict[str, Any]]:
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.size)
+        async with self._slots:
+            proc = self._idle.pop() if self._idle else self._spawn()
+            self._busy.add(proc)
+            try:
+                result = await proc.call(job, deadline, worker_id, self.watch_interval)
+            except asyncio.CancelledError:
+                # The job goes on in its process, which only terminating it can stop
+                logger.warning(f"Job {job['id']} was abandoned, terminating worker process {proc.pid}")
+                self._busy.discard(proc)
+                proc.terminate()
+                raise
+            except BrokenProcessPool:
+                # The process died (e.g. out of memory); the next job gets a new one
+                self._busy.discard(proc)
+                proc.terminate()
+                raise
+            except BaseException:
+                self._release(proc)
+                raise
+            self._release(proc)
+            return result
+
+    def _release(self, proc: _Process) -> None:
+        self._busy.discard(proc)
+        proc.jobs += 1
+        if self.max_jobs and proc.jobs >= self.max_jobs:
+            logger.info(f"Recycling worker process {proc.pid} after {proc.jobs} jobs")
+            proc.stop()
+        else:
+            self._idle.append(proc)
+
+    def shutdown(self) -> None:
+        for proc in [*self._idle, *self._busy]:
+            proc.terminate()
+        self._idle.clear()
+        self._busy.clear()
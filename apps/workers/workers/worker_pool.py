@@ -1,44 +1,106 @@
 import asyncio
 import logging
 import os
+import time
 import uuid
+from typing import Any, Dict
 
 import asyncpg
 import dotenv
+from wirl_pregel_runner import RunCancelledError
+from wirl_pregel_runner.blobs import BLOB_DIR_ENV, blob_root
 
 dotenv.load_dotenv()
 
-from workers.db import claim_job, run_wirl, set_state  # noqa: E402
+from workers.db import run_wirl, save_progress, set_state  # noqa: E402
+from workers.dispatcher import JobDispatcher  # noqa: E402
+from workers.feeder import JobFeeder  # noqa: E402
+from workers.heartbeat import BlobCollector, Heartbeat, Reaper  # noqa: E402
+from workers.process_pool import ProcessPool, job_executor  # noqa: E402
 
 CONCURRENCY = int(os.getenv("WORKERS", 4))
 TASK_TIMEOUT = int(os.getenv("TASK_TIMEOUT_MINUTES", 30)) * 60  # Convert minutes to seconds
+# Idle workers are woken by NOTIFY; polling only catches what the listener missed
+POLL_INTERVAL = float(os.getenv("JOB_POLL_SECONDS", 30))
+# Runs claimed ahead of a free worker; they wait in the process, already marked running
+PREFETCH = int(os.getenv("JOB_PREFETCH", 0))
+# Running jobs report every HEARTBEAT_INTERVAL; a job silent for STALE_AFTER is taken back
+HEARTBEAT_INTERVAL = float(os.getenv("JOB_HEARTBEAT_SECONDS", 15))
+STALE_AFTER = float(os.getenv("JOB_STALE_SECONDS", 120))
+# How often one of the workers deletes the blobs of threads without checkpoints
+BLOB_GC_INTERVAL = float(os.getenv("BLOB_GC_SECONDS", 3600))
+# "thread" runs jobs on this process's event loop and threads; "process" in a pool of
+# worker processes, each replaced after PROCESS_MAX_JOBS jobs. Templates may override it with a ``job_executor`` metadata entry.
+JOB_EXECUTOR = os.getenv("JOB_EXECUTOR", "thread")
+PROCESS_POOL_SIZE = int(os.getenv("PROCESS_POOL_SIZE", CONCURRENCY))
+PROCESS_MAX_JOBS = int(os.getenv("PROCESS_MAX_JOBS", 20))
 
 logger = logging.getLogger(__name__)
 
 
-async def worker(pool: asyncpg.pool.Pool, wid: str) -> None:
+def queue_latency(job: Dict[str, Any]) -> float | None:
+    """Seconds between the run being queued (created or continued) and a worker claiming it."""
+    queued_at = job.get("updated_at") or job.get("created_at")
+    if queued_at is None or job.get("started_at") is None:
+        return None
+    return (job["started_at"] - queued_at).total_seconds()
+
+
+async def worker(pool: asyncpg.pool.Pool, feeder: JobFeeder, heartbeat: Heartbeat, processes: ProcessPool) -> None:
     while True:
-        job = await claim_job(pool, wid)
-        if job is None:
-            await asyncio.sleep(10)
-            continue
+        job = await feeder.get()
+        latency = queue_latency(job)
+        if latency is not None:
+            logger.info(f"Job {job['id']} started {latency:.3f}s after it was queued")
         try:
-            # Run the workflow with timeout
-            new_state, result = await asyncio.wait_for(run_wirl(job), timeout=TASK_TIMEOUT)
-            await set_state(pool, job["id"], new_state, result=result)
+            # Run the workflow with timeout, saving partial results as nodes finish
+            async def on_progress(partial, job_id=job["id"]):
+                await save_progress(pool, job_id, heartbeat.worker_id, partial)
+
+            # Nodes see the deadline and fail once it passes; wait_for is the backstop
+            deadline = time.time() + TASK_TIMEOUT
+            if job_executor(job, JOB_EXECUTOR) == "process":
+                run = processes.run(job, deadline, heartbeat.worker_id)
+            else:
+                run = run_wirl(job, on_progress=on_progress, deadline=deadline, cancel_token=heartbeat.token(job["id"]))
+            new_state, result = await asyncio.wait_for(run, timeout=TASK_TIMEOUT)
+            if not await set_state(pool, job["id"], heartbeat.worker_id, new_state, result=result):
+                logger.info(f"Job {job['id']} finished as {new_state}, but it no longer runs on {heartbeat.worker_id}")
+        except RunCancelledError as exc:
+            # Canceled through the backend or taken back by the reaper: the row is no longer ours to update
+            logger.info(f"Job {job['id']} stopped: {exc}")
         except asyncio.TimeoutError:
             # Task timed out - mark as failed
             logger.info(f"Task timed out after {TASK_TIMEOUT // 60} minutes")
             timeout_msg = f"Task timed out after {TASK_TIMEOUT // 60} minutes"
-            await set_state(pool, job["id"], "failed", error=timeout_msg)
+            await set_state(pool, job["id"], heartbeat.worker_id, "failed", error=timeout_msg)
         except Exception as exc:  # pragma: no cover - errors in worker
             logger.error(f"Error running job {job}: {exc}")
-            await set_state(pool, job["id"], "failed", error=str(exc))
+            await set_state(pool, job["id"], heartbeat.worker_id, "failed", error=str(exc))
+        finally:
+            heartbeat.discard(job["id"])
 
 
 async def main() -> None:
+    if not os.getenv(BLOB_DIR_ENV):
+        # Fine on one host; a run resumed on another host must find its checkpoints' blobs
+        logger.warning(f"{BLOB_DIR_ENV} is not set, keeping checkpoint blobs in {blob_root()}; set it to a shared directory when workers run on several hosts")
     pool = await asyncpg.create_pool(dsn=os.getenv("DATABASE_URL"))
-    tasks = [asyncio.create_task(worker(pool, f"w{uuid.uuid4()}")) for _ in range(CONCURRENCY)]
+    worker_id = f"w{uuid.uuid4()}"
+    heartbeat = Heartbeat(pool, worker_id, interval=HEARTBEAT_INTERVAL)
+    heartbeat.start()
+    dispatcher = JobDispatcher(os.getenv("DATABASE_URL"), on_cancel=heartbeat.cancel)
+    dispatcher.start()
+    reaper = Reaper(pool, stale_after=STALE_AFTER, interval=STALE_AFTER / 2)
+    reaper.start()
+    blob_collector = BlobCollector(pool, interval=BLOB_GC_INTERVAL)
+    blob_collector.start()
+    feeder = JobFeeder(pool, dispatcher, worker_id, CONCURRENCY, prefetch=PREFETCH, poll_interval=POLL_INTERVAL, heartbeat=heartbeat)
+    feeder.start()
+    processes = ProcessPool(PROCESS_POOL_SIZE, max_jobs=PROCESS_MAX_JOBS)
+    if JOB_EXECUTOR == "process":
+        processes.start()
+    tasks = [asyncio.create_task(worker(pool, feeder, heartbeat, processes)) for _ in range(CONCURRENCY)]
     try:
         await asyncio.gather(*tasks)
     except asyncio.CancelledError:
@@ -47,6 +109,12 @@ async def main() -> None:
         await asyncio.gather(*tasks, return_exceptions=True)
         raise
     finally:
+        await feeder.stop()
+        await reaper.stop()
+        await blob_collector.stop()
+        await heartbeat.stop()
+        await dispatcher.stop()
+        processes.shutdown()
         await pool.close()
 
 
@@ -0,0 +1,76 @@
+"""Micro-benchmark: Earley parser rebuilt per call vs. the shared LALR parser vs. a warm compile cache.
+
+Usage:
+    python benchmarks/bench_parser.py [--repeat 50] [files ...]
+
+Without explicit files it parses every bundled ``workflow_definitions/**/*.wirl``.
+"""
+
+from __future__ import annotations
+
+import argparse
+import statistics
+import tempfile
+import time
+from pathlib import Path
+from typing import Callable, List
+
+from lark import Lark
+
+from wirl_lang.wirl_parser import ASTBuilder, load_grammar, parse_wirl_to_objects
+
+ROOT = Path(__file__).resolve().parents[3]
+
+
+def legacy_parse(path: str):
+    """The pre-LALR path: read the grammar and build an Earley parser on every call."""
+    parser = Lark(load_grammar(), start="workflow")
+    tree = parser.parse(Path(path).read_text())
+    return ASTBuilder().transform(tree)
+
+
+def lalr_parse(path: str):
+    return parse_wirl_to_objects(path, use_cache=False)
+
+
+def measure(fn: Callable[[str], object], path: str, repeat: int) -> List[float]:
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn(path)
+        timings.append(time.perf_counter() - started)
+    return timings
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("files", nargs="*", help="WIRL files to parse")
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+
+    files = args.files or sorted(str(p) for p in (ROOT / "workflow_definitions").glob("**/*.wirl"))
+    if not files:
+        raise SystemExit("No .wirl files found")
+
+    # Warm up the shared parser so the one-off grammar compilation is reported separately
+    started = time.perf_counter()
+    lalr_parse(files[0])
+    print(f"LALR parser construction + first parse: {(time.perf_counter() - started) * 1000:.2f} ms\n")
+
+    with tempfile.TemporaryDirectory() as cache_dir:
+
+        def cached_parse(path: str):
+            return parse_wirl_to_objects(path, cache_dir=cache_dir)
+
+        print(f"{'file':<40} {'earley (ms)':>12} {'lalr (ms)':>12} {'cached (ms)':>12} {'speedup':>9}")
+        for path in files:
+            expected = legacy_parse(path)
+            assert expected == lalr_parse(path) == cached_parse(path), f"AST mismatch for {path}"
+            old = statistics.median(measure(legacy_parse, path, args.repeat))
+            new = statistics.median(measure(lalr_parse, path, args.repeat))
+            cached = statistics.median(measure(cached_parse, path, args.repeat))
+            print(f"{Path(path).name:<40} {old * 1000:>12.3f} {new * 1000:>12.3f} {cached * 1000:>12.3f} {old / cached:>8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
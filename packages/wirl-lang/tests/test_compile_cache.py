@@ -0,0 +1,100 @@
+import pytest
+
+from wirl_lang import compile_cache, wirl_parser
+from wirl_lang.compile_cache import CompileCache, cache_key
+
+WIRL = """
+workflow Greeting {
+  inputs {
+    String name
+  }
+
+  outputs {
+    String greeting = Greet.greeting
+  }
+
+  node Greet {
+    call greet
+    inputs {
+      String name = name
+    }
+    outputs {
+      String greeting
+    }
+  }
+}
+"""
+
+
+@pytest.fixture
+def parses(monkeypatch):
+    """Texts actually parsed by Lark, i.e. the cache misses."""
+    texts = []
+    parse = wirl_parser.parse_wirl_text
+
+    def counting_parse(text):
+        texts.append(text)
+        return parse(text)
+
+    monkeypatch.setattr(wirl_parser, "parse_wirl_text", counting_parse)
+    return texts
+
+
+@pytest.fixture
+def wirl_path(tmp_path):
+    path = tmp_path / "greeting.wirl"
+    path.write_text(WIRL)
+    return path
+
+
+@pytest.fixture
+def cache_dir(tmp_path):
+    return tmp_path / "cache"
+
+
+def test_unchanged_file_is_loaded_from_the_cache(wirl_path, cache_dir, parses):
+    first = wirl_parser.parse_wirl_to_objects(str(wirl_path), cache_dir=cache_dir)
+    second = wirl_parser.parse_wirl_to_objects(str(wirl_path), cache_dir=cache_dir)
+
+    assert len(parses) == 1
+    assert second == first
+    assert cache_dir.stat().st_mode & 0o777 == 0o700
+
+
+def test_edited_file_is_parsed_again(wirl_path, cache_dir, parses):
+    wirl_parser.parse_wirl_to_objects(str(wirl_path), cache_dir=cache_dir)
+    wirl_path.write_text(WIRL.replace("Greeting", "Welcome"))
+    workflow = wirl_parser.parse_wirl_to_objects(str(wirl_path), cache_dir=cache_dir)
+
+    assert len(parses) == 2
+    assert workflow.name == "Welcome"
+
+
+def test_new_grammar_version_invalidates_entries(wirl_path, cache_dir, parses, monkeypatch):
+    wirl_parser.parse_wirl_to_objects(str(wirl_path), cache_dir=cache_dir)
+    monkeypatch.setattr(compile_cache, "grammar_version", lambda: "next-grammar")
+    wirl_parser.parse_wirl_to_objects(str(wirl_path), cache_dir=cache_dir)
+
+    assert len(parses) == 2
+
+
+def test_corrupted_entry_is_a_miss_and_is_overwritten(wirl_path, cache_dir, parses):
+    wirl_parser.parse_wirl_to_objects(str(wirl_path), cache_dir=cache_dir)
+    entry = cache_dir / f"{cache_key(WIRL)}.pickle"
+    entry.write_bytes(b"not a pickle")
+
+    workflow = wirl_parser.parse_wirl_to_objects(str(wirl_path), cache_dir=cache_dir)
+    wirl_parser.parse_wirl_to_objects(str(wirl_path), cache_dir=cache_dir)
+
+    assert workflow.name == "Greeting"
+    assert len(parses) == 2
+    assert CompileCache(cache_dir).load(cache_key(WIRL)) == workflow
+
+
+def test_directory_others_can_write_is_not_trusted(wirl_path, cache_dir, parses):
+    wirl_parser.parse_wirl_to_objects(str(wirl_path), cache_dir=cache_dir)
+    cache_dir.chmod(0o777)
+
+    assert CompileCache(cache_dir).load(cache_key(WIRL)) is None
+    wirl_parser.parse_wirl_to_objects(str(wirl_path), cache_dir=cache_dir)
+    assert len(parses) == 2
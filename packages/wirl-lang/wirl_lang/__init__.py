@@ -1,21 +1,36 @@
+from .compile_cache import CompileCache, grammar_version
 from .wirl_parser import (
+    CacheConfig,
     CycleClass,
     Input,
+    MapClass,
     Metadata,
     NodeClass,
     Output,
     Reducer,
+    RetryConfig,
+    TopKConfig,
     Workflow,
+    get_parser,
+    parse_wirl_text,
     parse_wirl_to_objects,
 )
 
 __all__ = [
     "parse_wirl_to_objects",
+    "parse_wirl_text",
+    "get_parser",
+    "CompileCache",
+    "grammar_version",
     "Workflow",
     "NodeClass",
     "CycleClass",
+    "MapClass",
     "Input",
     "Output",
     "Metadata",
     "Reducer",
+    "RetryConfig",
+    "CacheConfig",
+    "TopKConfig",
 ]
@@ -0,0 +1,119 @@
+"""Content-addressed on-disk cache of parsed WIRL workflows.
+
+Entries are pickled ``Workflow`` trees keyed by a hash of the ``.wirl`` source
+and the grammar version, so a warm load is one file read plus an unpickle.
+
+Loading an entry unpickles it, which can run arbitrary code, so entries are only read
+from a directory owned by the current user and not writable by group or others. It is
+created with mode ``0700``; an existing directory with looser permissions is not used.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import logging
+import os
+import pickle
+import stat
+import tempfile
+from functools import lru_cache
+from pathlib import Path
+from typing import Any
+
+logger = logging.getLogger(__name__)
+
+CACHE_DIR_ENV = "WIRL_CACHE_DIR"
+
+
+@lru_cache(maxsize=1)
+def grammar_version() -> str:
+    """Hash of the grammar and the AST builder.
+
+    Any change to either produces different ``Workflow`` trees, so both are part
+    of every cache key and stale entries are simply never looked up again.
+    """
+    digest = hashlib.sha256()
+    package_dir = Path(__file__).parent
+    for name in ("wirl.bnf", "wirl_parser.py"):
+        digest.update((package_dir / name).read_bytes())
+    return digest.hexdigest()[:16]
+
+
+def default_cache_dir() -> Path:
+    configured = os.getenv(CACHE_DIR_ENV)
+    if configured:
+        return Path(configured).expanduser()
+    return Path.home() / ".cache" / "wirl"
+
+
+def is_private(directory: Path) -> bool:
+    """Whether ``directory`` exists, is owned by the current user and only they can write to it."""
+    try:
+        st = directory.stat()
+    except OSError:
+        return False
+    if hasattr(os, "getuid") and st.st_uid != os.getuid():
+        return False
+    return not st.st_mode & (stat.S_IWGRP | stat.S_IWOTH)
+
+
+@lru_cache(maxsize=None)
+def _warn_not_private(directory: Path) -> None:
+    logger.warning(f"Not using the WIRL cache in {directory}: it must be owned by the current user and not writable by group or others")
+
+
+def cache_key(text: str) -> str:
+    digest = hashlib.sha256()
+    digest.update(grammar_version().encode())
+    digest.update(text.encode())
+    return digest.hexdigest()
+
+
+class CompileCache:
+    """Directory of ``<key>.pickle`` files holding parsed workflows."""
+
+    def __init__(self, directory: str | Path | None = None):
+        self.directory = Path(directory) if directory is not None else default_cache_dir()
+
+    def _path(self, key: str) -> Path:
+        return self.directory / f"{key}.pickle"
+
+    def load(self, key: str) -> Any | None:
+        try:
+            data = self._path(key).read_bytes()
+        except OSError:
+            return None
+        if not is_private(self.directory):
+            _warn_not_private(self.directory)
+            return None
+        try:
+            return pickle.loads(data)
+        except Exception as e:
+            # A truncated or incompatible entry is treated as a miss and overwritten on store
+            logger.warning(f"Ignoring unreadable WIRL cache entry {key}: {e}")
+            return None
+
+    def store(self, key: str, workflow: Any) -> None:
+        tmp_path = None
+        try:
+            # User-only: entries are unpickled on load, so nobody else may write them
+            self.directory.mkdir(mode=0o700, parents=True, exist_ok=True)
+            if not is_private(self.directory):
+                _warn_not_private(self.directory)
+                return
+            # Write to a temp file and rename so concurrent workers never read a partial entry
+            fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+            with os.fdopen(fd, "wb") as f:
+                pickle.dump(workflow, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, self._path(key))
+            tmp_path = None
+        except OSError as e:
+            # The cache is an optimization only, e.g. a read-only home directory must not fail parsing
+            logger.debug(f"Could not write WIRL cache entry {key}: {e}")
+        finally:
+            if tmp_path is not None:
+                Path(tmp_path).unlink(missing_ok=True)
+
+    def clear(self) -> None:
+        for entry in self.directory.glob("*.pickle"):
+            entry.unlink(missing_ok=True)
@@ -1,10 +1,13 @@
 from dataclasses import dataclass, field
 from enum import Enum
+from functools import lru_cache
 from pathlib import Path
 from typing import Any, Dict, List, Optional
 
 from lark import Lark, Transformer
 
+from .compile_cache import CompileCache, cache_key
+
 
 def load_grammar() -> str:
     return (Path(__file__).with_name("wirl.bnf")).read_text()
@@ -13,6 +16,21 @@ def load_grammar() -> str:
 class Reducer(Enum):
     LAST = "last"
     APPEND = "append"
+    SUM = "sum"
+    COUNT = "count"
+    MIN = "min"
+    MAX = "max"
+    MERGE = "merge"
+    UNION = "union"
+    TOPK = "topk"
+
+
+@dataclass
+class TopKConfig:
+    """Represents the arguments of a ``(topk(k, key))`` reducer"""
+
+    k: int
+    key: Optional[str] = None
 
 
 @dataclass
@@ -48,6 +66,7 @@ class Output:
     reducer: Reducer = Reducer.LAST
     default_value: Optional[Any] = None
     optional: bool = False
+    topk: Optional[TopKConfig] = None
 
     @property
     def target_node_name(self):
@@ -80,6 +99,14 @@ class RetryConfig:
     policy: str
 
 
+@dataclass
+class CacheConfig:
+    """Represents node output caching configuration"""
+
+    ttl: str
+    key: List[str] = field(default_factory=list)
+
+
 @dataclass
 class NodeClass:
     """Represents a workflow node"""
@@ -92,6 +119,9 @@ class NodeClass:
     hitl: Optional[HitlConfig] = None
     retry: Optional[RetryConfig] = None
     constants: List[Constant] = field(default_factory=list)
+    cache: Optional[CacheConfig] = None
+    resource: Optional[str] = None
+    timeout: Optional[str] = None
 
 
 @dataclass
@@ -115,6 +145,19 @@ class CycleClass:
     nodes_outputs: List[str] = field(default_factory=list)
 
 
+@dataclass
+class MapClass:
+    """Represents a parallel map of inner nodes over the items of a list input"""
+
+    name: str
+    over: str
+    item: str
+    inputs: List[Input] = field(default_factory=list)
+    outputs: List[Output] = field(default_factory=list)
+    nodes: List[NodeClass] = field(default_factory=list)
+    max_concurrency: int = 4
+
+
 @dataclass
 class Workflow:
     """Represents the complete workflow"""
@@ -123,7 +166,7 @@ class Workflow:
     metadata: Optional[Metadata] = None
     inputs: List[Input] = field(default_factory=list)
     outputs: List[Output] = field(default_factory=list)
-    nodes: List[NodeClass | CycleClass] = field(default_factory=list)
+    nodes: List[NodeClass | CycleClass | MapClass] = field(default_factory=list)
 
 
 class ASTBuilder(Transformer):
@@ -138,7 +181,7 @@ class ASTBuilder(Transformer):
                 wf.inputs = it
             elif isinstance(it, list) and len(it) > 0 and isinstance(it[0], Output):
                 wf.outputs = it
-            elif isinstance(it, (NodeClass, CycleClass)):
+            elif isinstance(it, (NodeClass, CycleClass, MapClass)):
                 wf.nodes.append(it)
         return wf
 
@@ -174,13 +217,15 @@ class ASTBuilder(Transformer):
         return Input(type=type_name, name=name, default_value=default_value, optional=optional)
 
     def output_param_decl(self, items):
-        reducer = items[0] if isinstance(items[0], Reducer) else None
+        reducer = items[0] if isinstance(items[0], (Reducer, TopKConfig)) else None
         reducer_offset = 1 if reducer else 0
         type_name = items[0 + reducer_offset]
         name = items[1 + reducer_offset]
         default_value = items[2 + reducer_offset] if len(items) > 2 + reducer_offset else None
         optional = items[3 + reducer_offset] if len(items) > 3 + reducer_offset else False
 
+        if isinstance(reducer, TopKConfig):
+            return Output(reducer=Reducer.TOPK, topk=reducer, type=type_name, name=name, default_value=default_value, optional=optional)
         return Output(reducer=reducer or Reducer.LAST, type=type_name, name=name, default_value=default_value, optional=optional)
 
     def param_value(self, items):
@@ -207,6 +252,12 @@ class ASTBuilder(Transformer):
             node.retry = body["retry"]
         if "constants" in body:
             node.constants = body["constants"]
+        if "cache" in body:
+            node.cache = body["cache"]
+        if "resource" in body:
+            node.resource = body["resource"]
+        if "timeout" in body:
+            node.timeout = body["timeout"]
 
         return node
 
@@ -239,6 +290,21 @@ class ASTBuilder(Transformer):
         # For now, return basic config - can be enhanced later
         return {"hitl": HitlConfig(correlation="default", timeout="24h")}
 
+    def retry_block(self, items):
+        return {"retry": RetryConfig(attempts=items[0], backoff=items[1], policy=items[2])}
+
+    def cache_block(self, items):
+        return {"cache": CacheConfig(ttl=items[0], key=items[1] if len(items) > 1 else [])}
+
+    def cache_key(self, items):
+        return list(items)
+
+    def resource_clause(self, items):
+        return {"resource": items[0]}
+
+    def timeout_clause(self, items):
+        return {"timeout": items[0]}
+
     def cycle_block(self, items):
         name = items[0]
         body = items[1]
@@ -273,6 +339,28 @@ class ASTBuilder(Transformer):
                 res["max_iterations"] = it
         return res
 
+    def map_block(self, items):
+        name = items[0]
+        body = items[1]
+        return MapClass(name=name, **body)
+
+    def map_body(self, items):
+        res: dict[str, Any] = {"inputs": items[0], "outputs": items[1], "nodes": []}
+        for it in items[2:]:
+            if isinstance(it, NodeClass):
+                res["nodes"].append(it)
+            elif isinstance(it, tuple):
+                res["over"], res["item"] = it
+            elif isinstance(it, int):
+                res["max_concurrency"] = it
+        return res
+
+    def over_clause(self, items):
+        return (items[0], items[1])
+
+    def max_concurrency(self, items):
+        return items[0]
+
     def guard_clause(self, items):
         return {"guard": items[0]}
 
@@ -286,7 +374,10 @@ class ASTBuilder(Transformer):
         return text
 
     def reducer_decl(self, items):
-        return Reducer(items[0])
+        return items[0] if isinstance(items[0], TopKConfig) else Reducer(items[0])
+
+    def topk_reducer(self, items):
+        return TopKConfig(k=items[0], key=str(items[1]) if len(items) > 1 else None)
 
     def default_value(self, items):
         return items[0]
@@ -294,6 +385,9 @@ class ASTBuilder(Transformer):
     def literal(self, items):
         return items[0]
 
+    def const_value(self, items):
+        return items[0]
+
     def INT(self, token):
         return int(token)
 
@@ -320,10 +414,35 @@ class ASTBuilder(Transformer):
         return str(token)
 
 
-def parse_wirl_to_objects(path: str) -> Workflow:
-    """Parse Wirl file and return structured object hierarchy"""
-    grammar = load_grammar()
-    parser = Lark(grammar, start="workflow")
-    tree = parser.parse(Path(path).read_text())
-    transformer = ASTBuilder()
-    return transformer.transform(tree)
+@lru_cache(maxsize=1)
+def get_parser() -> Lark:
+    """Return the process-wide LALR parser.
+
+    The grammar is compiled once per process and ``ASTBuilder`` is applied inline
+    while parsing, so no intermediate parse tree is built.
+    """
+    return Lark(load_grammar(), start="workflow", parser="lalr", transformer=ASTBuilder())
+
+
+def parse_wirl_text(text: str) -> Workflow:
+    """Parse Wirl source text and return structured object hierarchy"""
+    return get_parser().parse(text)
+
+
+def parse_wirl_to_objects(path: str, use_cache: bool = True, cache_dir: str | None = None) -> Workflow:
+    """Parse Wirl file and return structured object hierarchy
+
+    Parsed workflows are stored in the on-disk compile cache (``WIRL_CACHE_DIR``,
+    ``~/.cache/wirl`` by default), so unchanged files skip Lark and ``ASTBuilder``.
+    """
+    text = Path(path).read_text()
+    if not use_cache:
+        return parse_wirl_text(text)
+
+    cache = CompileCache(cache_dir)
+    key = cache_key(text)
+    workflow = cache.load(key)
+    if workflow is None:
+        workflow = parse_wirl_text(text)
+        cache.store(key, workflow)
+    return workflow
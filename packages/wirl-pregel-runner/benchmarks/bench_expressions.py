@@ -0,0 +1,94 @@
+"""Benchmark: legacy per-activation ``eval`` of guards vs. expressions compiled at build time.
+
+Usage:
+    python benchmarks/bench_expressions.py [--channels 500] [--repeat 20000]
+"""
+
+from __future__ import annotations
+
+import argparse
+import time
+from typing import Any, Dict
+
+from wirl_pregel_runner.expressions import compile_condition
+
+GUARDS = [
+    "CollectEvaluations.is_done",
+    "Retrieve.need_filtering and FilterChunks.filtered_chunks or not Retrieve.need_filtering",
+]
+
+
+def legacy_eval_condition(expr: str, state: Dict[str, Any]) -> bool:
+    """Copy of the pre-compilation ``_eval_condition`` from ``pregel_graph_builder``."""
+    expr = str(expr).strip()
+    safe_globals = {"__builtins__": {}}
+    safe_locals = {"true": True, "false": False, "null": None}
+    for key, value in state.items():
+        if "." in key:
+            parts = key.split(".")
+            if len(parts) == 2:
+                node_name, attr_name = parts
+                if node_name not in safe_locals:
+                    safe_locals[node_name] = {}
+                safe_locals[node_name][attr_name] = value
+        else:
+            safe_locals[key] = value
+
+    class StateObject:
+        def __init__(self, data):
+            for k, v in data.items():
+                setattr(self, k, v)
+
+        def __getattr__(self, name):
+            return False
+
+    for key, value in list(safe_locals.items()):
+        if isinstance(value, dict):
+            safe_locals[key] = StateObject(value)
+
+    class FalsyDict(dict):
+        def __missing__(self, key):
+            return StateObject({})
+
+    safe_locals = FalsyDict(safe_locals)
+    try:
+        result = eval(expr, safe_globals, safe_locals)
+        return result is not None and result is not False
+    except (NameError, AttributeError):
+        return False
+
+
+def make_state(channels: int) -> Dict[str, Any]:
+    state: Dict[str, Any] = {f"Node{i // 4}.output_{i % 4}": [i] * 8 for i in range(channels)}
+    state.update({"CollectEvaluations.is_done": False, "Retrieve.need_filtering": True, "FilterChunks.filtered_chunks": ["chunk"]})
+    return state
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--channels", type=int, default=500)
+    parser.add_argument("--repeat", type=int, default=20000)
+    args = parser.parse_args()
+
+    state = make_state(args.channels)
+    print(f"State with {len(state)} channels, {args.repeat} evaluations per guard\n")
+    print(f"{'guard':<60} {'legacy (us)':>12} {'compiled (us)':>14} {'speedup':>9}")
+    for guard in GUARDS:
+        compiled = compile_condition(guard)
+        assert compiled(state) == legacy_eval_condition(guard, state)
+
+        started = time.perf_counter()
+        for _ in range(args.repeat):
+            legacy_eval_condition(guard, state)
+        legacy = (time.perf_counter() - started) / args.repeat
+
+        started = time.perf_counter()
+        for _ in range(args.repeat):
+            compiled(state)
+        fast = (time.perf_counter() - started) / args.repeat
+
+        print(f"{guard[:60]:<60} {legacy * 1e6:>12.2f} {fast * 1e6:>14.2f} {legacy / fast:>8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""Benchmark: Pregel runner vs. native DAG executor on workflows without HITL.
+
+Runs the bundled workflows that need no checkpoints with the mocked functions from
+their tests, checks that both executors return the same result and reports the
+mean time per run. The mocks return immediately, so the numbers are the overhead of
+each executor.
+
+Usage (from the repository root):
+    python packages/wirl-pregel-runner/benchmarks/bench_native.py [--repeat 50]
+"""
+
+from __future__ import annotations
+
+import argparse
+import copy
+import importlib
+import os
+import random
+import sys
+import time
+from typing import Any, Callable, Dict
+
+from wirl_pregel_runner.native_executor import build_native_workflow
+from wirl_pregel_runner.pregel_graph_builder import build_pregel_graph
+
+WORKFLOWS = [
+    (
+        "autorater_eval_workflow",
+        "workflow_definitions.autorater_eval_workflow.tests.test_autorater_eval_workflow",
+        {"dataset_path": "mock_dataset.json", "sample_size": 10},
+    ),
+    (
+        "news_digest_workflow",
+        "workflow_definitions.news_digest_workflow.tests.test_news_digest_workflow",
+        {"resources": [{"url": "u1", "type": "web"}, {"url": "u2", "type": "web"}, {"url": "u3", "type": "web"}]},
+    ),
+    (
+        "paper_rename_workflow",
+        "workflow_definitions.paper_rename_workflow.tests.test_workflow",
+        {"drafts_folder_path": "drafts", "processed_folder_path": "processed"},
+    ),
+]
+
+
+def seed_mocks() -> None:
+    # The autorater mocks draw random verdicts from ``random.random``. Pregel draws from the
+    # same global generator for checkpoint ids, so the mocks get a generator of their own.
+    random.random = random.Random(0).random
+
+
+def timed(invoke: Callable[[Dict[str, Any]], Dict[str, Any]], params: Dict[str, Any], repeat: int) -> tuple[Dict[str, Any], float]:
+    # The news mocks mutate their input
+    seed_mocks()
+    result = invoke(copy.deepcopy(params))
+    started = time.perf_counter()
+    for _ in range(repeat):
+        seed_mocks()
+        invoke(copy.deepcopy(params))
+    return result, (time.perf_counter() - started) / repeat * 1000
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+    # The workflow test modules are imported from the repository root
+    sys.path.insert(0, os.getcwd())
+
+    config = {"configurable": {"thread_id": "bench"}, "recursion_limit": 1000}
+    print(f"{'workflow':<26} {'ms pregel':>10} {'ms native':>10} {'speedup':>8}")
+    for name, module, params in WORKFLOWS:
+        fn_map = importlib.import_module(module).FN_MAP
+        path = f"workflow_definitions/{name}/{name}.wirl"
+        app = build_pregel_graph(path, functions=fn_map)
+        native = build_native_workflow(path, functions=fn_map)
+        assert native is not None, f"{name} cannot run on the native executor"
+
+        pregel_result, pregel_ms = timed(lambda p: app.invoke(p, config), params, args.repeat)
+        native_result, native_ms = timed(lambda p: native.invoke(p, config), params, args.repeat)
+        assert pregel_result == native_result, f"{name}: the executors returned different results"
+        print(f"{name:<26} {pregel_ms:>10.2f} {native_ms:>10.2f} {pregel_ms / native_ms:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,283 @@
+"""Benchmark suite: synthetic workloads of configurable shape, results saved as JSON.
+
+For every workload (see ``workloads.py``) the suite generates a ``.wirl`` file and
+measures parse time, ``build_pregel_graph`` time and, for each checkpointer (none,
+in-memory and, with ``--postgres-url``, Postgres), the time per run, the Pregel overhead
+per superstep (run time minus time spent in node functions), peak memory of a run and
+the bytes checkpointed for a thread. The native executor's time per run is recorded
+for comparison.
+
+Results go to ``--output`` with the commit they were measured on. Pass ``--baseline``
+with an earlier file to print the relative change of the main metrics.
+
+Usage:
+    python benchmarks/bench_suite.py [--workload wide --workload cycles] [--shape big:width=16,depth=8]
+        [--repeat 5] [--postgres-url postgresql://...] [--output bench-results.json] [--baseline old.json]
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import platform
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+import uuid
+from datetime import datetime, timezone
+from importlib.metadata import version
+from pathlib import Path
+from typing import Any, Callable, Dict, List
+
+from langgraph.checkpoint.memory import InMemorySaver
+from langgraph.pregel import Pregel
+from wirl_lang import parse_wirl_text
+from workloads import PRESETS, WorkloadShape, generate_wirl, make_fn_map, parse_shape
+
+from wirl_pregel_runner.native_executor import build_native_workflow
+from wirl_pregel_runner.pregel_graph_builder import build_pregel_graph
+
+# Metrics compared against --baseline; all of them are "lower is better"
+TRACKED = ["parse_ms", "build_ms", "native_ms", "none.run_ms", "memory.run_ms", "memory.superstep_overhead_us", "memory.peak_memory_bytes", "memory.checkpoint_bytes"]
+
+
+class FunctionTimer:
+    """Wraps a function map and records when node functions run.
+
+    Nodes of one superstep run in parallel, so ``busy()`` is the wall time during which
+    at least one node function was running, not the sum of their times.
+    """
+
+    def __init__(self, fn_map: Dict[str, Callable]):
+        self.intervals: List[tuple[float, float]] = []
+        self._lock = threading.Lock()
+        self.fn_map = {name: self._wrap(fn) for name, fn in fn_map.items()}
+
+    def _wrap(self, fn: Callable) -> Callable:
+        def timed(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                with self._lock:
+                    self.intervals.append((started, time.perf_counter()))
+
+        return timed
+
+    def busy(self) -> float:
+        total, end = 0.0, float("-inf")
+        for start, stop in sorted(self.intervals):
+            if stop > end:
+                total += stop - max(start, end)
+                end = stop
+        return total
+
+
+def mean_ms(fn: Callable[[], Any], repeat: int, warm_up: bool = True) -> float:
+    if warm_up:
+        fn()  # imports and caches
+    started = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - started) / repeat * 1000
+
+
+def count_supersteps(app: Pregel, params: Dict[str, Any]) -> int:
+    steps = 0
+    for event in app.stream(params, {"recursion_limit": 10_000}, stream_mode="debug"):
+        steps = max(steps, event["step"] + 1)
+    return steps
+
+
+def stored_bytes(value: Any) -> int:
+    """Bytes held by an ``InMemorySaver``'s storage, writes and blobs."""
+    if isinstance(value, (bytes, bytearray)):
+        return len(value)
+    if isinstance(value, dict):
+        return sum(stored_bytes(v) for v in value.values())
+    if isinstance(value, (list, tuple)):
+        return sum(stored_bytes(v) for v in value)
+    return 0
+
+
+class MemoryCheckpointer:
+    name = "memory"
+
+    def saver(self) -> InMemorySaver:
+        return InMemorySaver()
+
+    def checkpoint_bytes(self, saver: InMemorySaver, thread_id: str) -> int:
+        return stored_bytes(saver.storage) + stored_bytes(saver.writes) + stored_bytes(saver.blobs)
+
+    def close(self) -> None:
+        pass
+
+
+class PostgresCheckpointer:
+    name = "postgres"
+    TABLES = ("checkpoints", "checkpoint_blobs", "checkpoint_writes")
+
+    def __init__(self, url: str):
+        from langgraph.checkpoint.postgres import PostgresSaver
+
+        self._context = PostgresSaver.from_conn_string(url)
+        self._saver = self._context.__enter__()
+        self._saver.setup()
+        self._threads: List[str] = []
+
+    def saver(self):
+        return self._saver
+
+    def checkpoint_bytes(self, saver, thread_id: str) -> int:
+        self._threads.append(thread_id)
+        with saver.conn.cursor() as cur:
+            total = 0
+            for table in self.TABLES:
+                cur.execute(f"SELECT coalesce(sum(pg_column_size(t.*)), 0) AS size FROM {table} t WHERE thread_id = %s", (thread_id,))
+                total += int(cur.fetchone()["size"])
+        return total
+
+    def close(self) -> None:
+        for thread_id in self._threads:
+            self._saver.delete_thread(thread_id)
+        self._context.__exit__(None, None, None)
+
+
+def bench_checkpointer(app: Pregel, timer: FunctionTimer, params: Dict[str, Any], supersteps: int, repeat: int, checkpointer) -> Dict[str, Any]:
+    def run(saver=None, thread_id: str | None = None) -> None:
+        bound = app.copy({"checkpointer": saver}) if saver is not None else app
+        bound.invoke(dict(params), {"configurable": {"thread_id": thread_id or str(uuid.uuid4())}, "recursion_limit": 10_000})
+
+    saver = checkpointer.saver() if checkpointer else None
+    run(saver)
+    timer.intervals.clear()
+    run_ms = mean_ms(lambda: run(saver), repeat, warm_up=False)
+    function_ms = timer.busy() / repeat * 1000
+
+    # One more run, alone in its thread, for memory and checkpoint size
+    thread_id = f"bench-{uuid.uuid4()}"
+    saver = checkpointer.saver() if checkpointer else None
+    tracemalloc.start()
+    run(saver, thread_id)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        "run_ms": run_ms,
+        "function_ms": function_ms,
+        "superstep_overhead_us": (run_ms - function_ms) / supersteps * 1000 if supersteps else 0.0,
+        "peak_memory_bytes": peak,
+        "checkpoint_bytes": checkpointer.checkpoint_bytes(saver, thread_id) if checkpointer else 0,
+    }
+
+
+def bench_workload(shape: WorkloadShape, directory: Path, repeat: int, checkpointers: List[Any]) -> Dict[str, Any]:
+    text = generate_wirl(shape)
+    path = directory / f"{shape.name}.wirl"
+    path.write_text(text)
+    params = {"seed": "seed"}
+    timer = FunctionTimer(make_fn_map(shape))
+
+    parse_ms = mean_ms(lambda: parse_wirl_text(text), repeat)
+    build_ms = mean_ms(lambda: build_pregel_graph(str(path), functions=timer.fn_map), repeat)
+    app = build_pregel_graph(str(path), functions=timer.fn_map)
+    supersteps = count_supersteps(app, params)
+    native = build_native_workflow(str(path), functions=timer.fn_map)
+
+    result: Dict[str, Any] = {
+        "shape": shape.to_dict(),
+        "nodes": shape.nodes,
+        "parse_ms": parse_ms,
+        "build_ms": build_ms,
+        "supersteps": supersteps,
+        "native_ms": mean_ms(lambda: native.invoke(dict(params)), repeat),
+        "none": bench_checkpointer(app, timer, params, supersteps, repeat, None),
+    }
+    for checkpointer in checkpointers:
+        result[checkpointer.name] = bench_checkpointer(app, timer, params, supersteps, repeat, checkpointer)
+    return result
+
+
+def metric(entry: Dict[str, Any], name: str) -> float | None:
+    value: Any = entry
+    for part in name.split("."):
+        if not isinstance(value, dict) or part not in value:
+            return None
+        value = value[part]
+    return value
+
+
+def compare(results: Dict[str, Any], baseline: Dict[str, Any]) -> None:
+    previous = {entry["shape"]["name"]: entry for entry in baseline["workloads"]}
+    print(f"\nChange vs. {baseline.get('commit') or 'baseline'} (positive is slower or bigger)")
+    for entry in results["workloads"]:
+        old = previous.get(entry["shape"]["name"])
+        if old is None or old["shape"] != entry["shape"]:
+            continue
+        changes = []
+        for name in TRACKED:
+            new_value, old_value = metric(entry, name), metric(old, name)
+            if new_value is not None and old_value:
+                changes.append(f"{name} {new_value / old_value - 1:+.0%}")
+        print(f"  {entry['shape']['name']:<12} " + ", ".join(changes))
+
+
+def git_commit() -> str | None:
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--workload", action="append", choices=[shape.name for shape in PRESETS], help="Preset workload (default: all)")
+    parser.add_argument("--shape", action="append", default=[], help="Custom workload, e.g. big:width=16,depth=8,cycles=1,iterations=20")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--postgres-url", default=None, help="Also measure with PostgresSaver on this database")
+    parser.add_argument("--output", default="bench-results.json")
+    parser.add_argument("--baseline", default=None, help="Earlier results to compare with")
+    args = parser.parse_args()
+
+    shapes = [shape for shape in PRESETS if not args.workload or shape.name in args.workload] + [parse_shape(spec) for spec in args.shape]
+    checkpointers: List[Any] = [MemoryCheckpointer()]
+    if args.postgres_url:
+        checkpointers.append(PostgresCheckpointer(args.postgres_url))
+
+    results: Dict[str, Any] = {
+        "commit": git_commit(),
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "langgraph": version("langgraph"),
+        "repeat": args.repeat,
+        "workloads": [],
+    }
+    print(f"{'workload':<12} {'nodes':>5} {'steps':>5} {'parse ms':>9} {'build ms':>9} {'run ms':>8} {'+memory':>8} {'step us':>8} {'peak KiB':>9} {'ckpt KiB':>9} {'native ms':>9}")
+    try:
+        with tempfile.TemporaryDirectory() as directory:
+            for shape in shapes:
+                entry = bench_workload(shape, Path(directory), args.repeat, checkpointers)
+                results["workloads"].append(entry)
+                memory = entry["memory"]
+                print(
+                    f"{shape.name:<12} {entry['nodes']:>5} {entry['supersteps']:>5} {entry['parse_ms']:>9.2f} {entry['build_ms']:>9.2f} {entry['none']['run_ms']:>8.2f} "
+                    f"{memory['run_ms']:>8.2f} {memory['superstep_overhead_us']:>8.0f} {memory['peak_memory_bytes'] / 1024:>9.0f} {memory['checkpoint_bytes'] / 1024:>9.0f} {entry['native_ms']:>9.2f}"
+                )
+                if "postgres" in entry:
+                    postgres = entry["postgres"]
+                    print(f"{'  postgres':<12} {'':>45} {postgres['run_ms']:>8.2f} {postgres['superstep_overhead_us']:>8.0f} {'':>9} {postgres['checkpoint_bytes'] / 1024:>9.0f}")
+    finally:
+        for checkpointer in checkpointers:
+            checkpointer.close()
+
+    Path(args.output).write_text(json.dumps(results, indent=2))
+    print(f"\nSaved {len(results['workloads'])} workloads to {args.output}")
+    if args.baseline:
+        compare(results, json.loads(Path(args.baseline).read_text()))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
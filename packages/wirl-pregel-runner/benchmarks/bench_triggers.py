@@ -0,0 +1,98 @@
+"""Benchmark: superstep activations with every input as a trigger vs. pruned triggers.
+
+Counts the Pregel tasks scheduled for the bundled cycle workflows, using the mocked
+functions from each workflow's tests, and checks that both builds return the same result.
+
+Usage (from the repository root):
+    python packages/wirl-pregel-runner/benchmarks/bench_triggers.py [--repeat 20]
+"""
+
+from __future__ import annotations
+
+import argparse
+import copy
+import importlib
+import os
+import random
+import sys
+import time
+from collections import Counter
+from typing import Any, Dict, Tuple
+
+from langgraph.pregel import Pregel
+
+from wirl_pregel_runner.pregel_graph_builder import build_pregel_graph
+
+WORKFLOWS = [
+    (
+        "autorater_eval_workflow",
+        "workflow_definitions.autorater_eval_workflow.tests.test_autorater_eval_workflow",
+        {"dataset_path": "mock_dataset.json", "sample_size": 10},
+    ),
+    (
+        "news_digest_workflow",
+        "workflow_definitions.news_digest_workflow.tests.test_news_digest_workflow",
+        {"resources": [{"url": "u1", "type": "web"}, {"url": "u2", "type": "web"}, {"url": "u3", "type": "web"}]},
+    ),
+    (
+        "paper_rename_workflow",
+        "workflow_definitions.paper_rename_workflow.tests.test_workflow",
+        {"drafts_folder_path": "drafts", "processed_folder_path": "processed"},
+    ),
+    (
+        "photo_notes_workflow",
+        "workflow_definitions.photo_notes_workflow.tests.test_photo_notes_workflow",
+        {"obsidian_folder_path": "obs"},
+    ),
+]
+
+
+def run(app: Pregel, params: Dict[str, Any]) -> Tuple[Counter, int, Dict[str, Any]]:
+    activations: Counter = Counter()
+    steps = 0
+    values: Dict[str, Any] = {}
+    # Photo notes stops at its HITL node; the run up to the interrupt is counted
+    # The autorater mocks draw random verdicts
+    random.seed(0)
+    config = {"configurable": {"thread_id": "bench"}, "recursion_limit": 1000}
+    for mode, payload in app.stream(copy.deepcopy(params), config, stream_mode=["debug", "values"], output_keys=app.output_channels):
+        if mode == "values":
+            values = payload
+        elif payload["type"] == "task":
+            activations[payload["payload"]["name"]] += 1
+            steps = max(steps, payload["step"] + 1)
+    return activations, steps, values
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+    # The workflow test modules are imported from the repository root
+    sys.path.insert(0, os.getcwd())
+
+    print(f"{'workflow':<26} {'supersteps':>10} {'tasks before':>13} {'tasks after':>12} {'saved':>7} {'ms before':>10} {'ms after':>9}")
+    for name, module, params in WORKFLOWS:
+        fn_map = importlib.import_module(module).FN_MAP
+        apps = {prune: build_pregel_graph(f"workflow_definitions/{name}/{name}.wirl", functions=fn_map, prune_triggers=prune) for prune in (False, True)}
+        before, steps_before, values_before = run(apps[False], params)
+        after, steps_after, values_after = run(apps[True], params)
+        assert values_before == values_after, f"{name}: pruned triggers changed the result"
+        assert steps_before == steps_after, f"{name}: pruned triggers changed the number of supersteps"
+
+        timings = {}
+        for prune in (False, True):
+            started = time.perf_counter()
+            for _ in range(args.repeat):
+                run(apps[prune], params)
+            timings[prune] = (time.perf_counter() - started) / args.repeat * 1000
+
+        total_before, total_after = sum(before.values()), sum(after.values())
+        print(f"{name:<26} {steps_after:>10} {total_before:>13} {total_after:>12} {1 - total_after / total_before:>7.0%} {timings[False]:>10.2f} {timings[True]:>9.2f}")
+        for node in sorted(before, key=lambda n: before[n] - after[n], reverse=True)[:3]:
+            if before[node] != after[node]:
+                print(f"    {node:<40} {before[node]:>4} -> {after[node]}")
+
+
+if __name__ == "__main__":
+    main()
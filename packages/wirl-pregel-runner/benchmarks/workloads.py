@@ -0,0 +1,157 @@
+"""Synthetic WIRL workloads for the benchmark suite.
+
+A workload is a grid of ``depth`` layers of ``width`` nodes. Each node of a layer reads
+the outputs of ``fan_in`` nodes of the previous layer, so every node is consumed. The
+grid is followed by a chain of ``cycles`` cycle blocks that run ``iterations`` times
+each and append to an ``(append)`` output, and by a ``Sink`` node that joins everything
+into the workflow output. Every node writes a string of ``payload_bytes`` bytes.
+"""
+
+from __future__ import annotations
+
+import time
+from dataclasses import asdict, dataclass
+from typing import Any, Callable, Dict, List
+
+
+@dataclass(frozen=True)
+class WorkloadShape:
+    name: str
+    width: int = 4
+    depth: int = 4
+    cycles: int = 0
+    iterations: int = 1
+    fan_in: int = 2
+    payload_bytes: int = 16
+    # Seconds every node function sleeps; 0 makes them no-ops
+    sleep: float = 0.0
+
+    def __post_init__(self):
+        if self.width < 1 or self.depth < 1:
+            raise ValueError(f"Workload {self.name} needs at least one layer of one node")
+        if not 1 <= self.fan_in <= self.width:
+            raise ValueError(f"Workload {self.name} needs 1 <= fan_in <= width, got {self.fan_in}")
+        if self.iterations < 1:
+            raise ValueError(f"Workload {self.name} needs at least one iteration per cycle")
+
+    @property
+    def nodes(self) -> int:
+        """Node functions called per run."""
+        return self.width * self.depth + self.cycles * self.iterations + 1
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+PRESETS = [
+    WorkloadShape("tiny", width=1, depth=3, fan_in=1),
+    WorkloadShape("wide", width=32, depth=2, fan_in=1),
+    WorkloadShape("deep", width=1, depth=64, fan_in=1),
+    WorkloadShape("fan_in", width=8, depth=8, fan_in=8),
+    WorkloadShape("cycles", width=2, depth=2, cycles=2, iterations=10, fan_in=1),
+    WorkloadShape("long_cycle", width=1, depth=1, cycles=1, iterations=100, fan_in=1),
+    WorkloadShape("payload", width=4, depth=4, fan_in=2, payload_bytes=256 * 1024),
+    WorkloadShape("sleep", width=8, depth=2, fan_in=1, sleep=0.01),
+]
+
+
+def parse_shape(spec: str) -> WorkloadShape:
+    """Build a shape from ``name:key=value,...``, e.g. ``big:width=16,depth=8,cycles=1``."""
+    name, _, fields = spec.partition(":")
+    kwargs: Dict[str, Any] = {}
+    for field in filter(None, fields.split(",")):
+        key, _, value = field.partition("=")
+        kwargs[key.strip()] = float(value) if key.strip() == "sleep" else int(value)
+    return WorkloadShape(name or "custom", **kwargs)
+
+
+def _node(name: str, call: str, inputs: List[str], outputs: List[str]) -> List[str]:
+    lines = [f"  node {name} {{", f"    call {call}", "    inputs {"]
+    lines += [f"      {line}" for line in inputs]
+    lines += ["    }", "    outputs {"]
+    lines += [f"      {line}" for line in outputs]
+    lines += ["    }", "  }", ""]
+    return lines
+
+
+def generate_wirl(shape: WorkloadShape) -> str:
+    lines = [
+        f"workflow Synthetic{shape.name.title().replace('_', '')} {{",
+        "",
+        "  metadata {",
+        f'    description: "Synthetic workload {shape.name}"',
+        '    owner: "benchmarks"',
+        '    version: "1.0"',
+        "  }",
+        "",
+        "  inputs {",
+        "    String seed",
+        "  }",
+        "",
+        "  outputs {",
+        "    String result = Sink.value",
+        "  }",
+        "",
+    ]
+    for layer in range(shape.depth):
+        for index in range(shape.width):
+            if layer == 0:
+                inputs = ["String in0 = seed"]
+            else:
+                inputs = [f"String in{k} = L{layer - 1}N{(index + k) % shape.width}.value" for k in range(shape.fan_in)]
+            lines += _node(f"L{layer}N{index}", "work", inputs, ["String value"])
+
+    previous = f"L{shape.depth - 1}N0.value"
+    for number in range(shape.cycles):
+        cycle = f"C{number}"
+        step = f"{cycle}Step"
+        lines += [
+            f"  cycle {cycle} {{",
+            "    inputs {",
+            f"      String source = {previous}",
+            "    }",
+            "    outputs {",
+            f"      String value = {step}.value",
+            f"      List<String> trail = {step}.trail",
+            "    }",
+        ]
+        lines += [f"  {line}" if line else line for line in _node(step, "step", [f"String source = {cycle}.source"], ["String value", "Bool done", "(append) List<String> trail"])]
+        lines += [
+            "    guard {",
+            "      inputs {",
+            f"        Bool done = {step}.done",
+            "      }",
+            "      when {",
+            f"        {step}.done",
+            "      }",
+            "    }",
+            f"    max_iterations: {shape.iterations}",
+            "  }",
+            "",
+        ]
+        previous = f"{cycle}.value"
+
+    sink_inputs = [f"String in{index} = L{shape.depth - 1}N{index}.value" for index in range(shape.width)]
+    if shape.cycles:
+        sink_inputs.append(f"String in{shape.width} = {previous}")
+    lines += _node("Sink", "work", sink_inputs, ["String value"])
+    lines.append("}")
+    return "\n".join(lines) + "\n"
+
+
+def make_fn_map(shape: WorkloadShape) -> Dict[str, Callable]:
+    """No-op (or sleeping) functions for a generated workload."""
+    payload = "x" * shape.payload_bytes
+
+    def work(config: dict, **inputs: Any) -> dict:
+        if shape.sleep:
+            time.sleep(shape.sleep)
+        return {"value": payload}
+
+    def step(source: str, config: dict) -> dict:
+        if shape.sleep:
+            time.sleep(shape.sleep)
+        # Never done: the cycle stops after max_iterations
+        return {"value": payload, "done": False, "trail": [payload]}
+
+    return {"work": work, "step": step}
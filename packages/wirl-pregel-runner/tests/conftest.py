@@ -0,0 +1,10 @@
+import pytest
+from wirl_lang.compile_cache import CACHE_DIR_ENV
+
+
+@pytest.fixture(autouse=True, scope="session")
+def wirl_cache_dir(tmp_path_factory):
+    """Keep the compile cache of parsed workflows out of ``~/.cache/wirl`` during tests."""
+    with pytest.MonkeyPatch.context() as mp:
+        mp.setenv(CACHE_DIR_ENV, str(tmp_path_factory.mktemp("wirl-cache")))
+        yield
@@ -0,0 +1,104 @@
+import json
+import shutil
+
+from langgraph.checkpoint.memory import InMemorySaver
+
+from wirl_pregel_runner import PregelAppCache, app_cache, run_workflow
+
+WIRL_PATH = "tests/wirls/sample.wirl"
+HITL_WIRL_PATH = "tests/wirls/sample_with_hitl.wirl"
+
+
+def query_extender(query: str, config: dict) -> dict:
+    return {"extended_query": "extended query"}
+
+
+def retrieve_from_web(extended_query: str, config: dict) -> dict:
+    return {"chunks": ["chunk for hello"], "need_filtering": False}
+
+
+def filter_chunks(query: str, need_filtering: bool, chunks: list[str], config: dict) -> dict:
+    return {"filtered_chunks": ["chunk for hello"]}
+
+
+def final_answer_generation(query: str, extended_query: str, need_filtering: bool, chunks: list[str], filtered_chunks_summary: str, config: dict) -> dict:
+    return {"final_answer": "final answer from chunks"}
+
+
+FN_MAP = {
+    "query_extender": query_extender,
+    "retrieve_from_web": retrieve_from_web,
+    "filter_chunks": filter_chunks,
+    "final_answer_generation": final_answer_generation,
+}
+
+
+def draft_answer(query: str, config: dict) -> dict:
+    return {"draft": f"draft for {query}"}
+
+
+def review(draft: str, config: dict) -> dict:
+    return {}
+
+
+def final_answer(draft: str, comments: dict, config: dict) -> dict:
+    return {"final_answer": f"{draft} / {comments['answer']}"}
+
+
+HITL_FN_MAP = {
+    "draft_answer": draft_answer,
+    "review": review,
+    "final_answer": final_answer,
+}
+
+
+def test_app_is_reused_for_same_template_and_functions():
+    cache = PregelAppCache(maxsize=4)
+    first = cache.get(WIRL_PATH, FN_MAP)
+    # A fresh dict with the same functions (as built by the worker per job) hits the cache
+    second = cache.get(WIRL_PATH, dict(FN_MAP))
+    assert first is second
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_app_is_rebuilt_when_functions_change():
+    cache = PregelAppCache(maxsize=4)
+    first = cache.get(WIRL_PATH, FN_MAP)
+    second = cache.get(WIRL_PATH, FN_MAP | {"query_extender": lambda query, config: {"extended_query": "other"}})
+    assert first is not second
+    assert cache.misses == 2
+
+
+def test_app_is_rebuilt_when_template_content_changes(tmp_path):
+    path = tmp_path / "sample.wirl"
+    shutil.copy(WIRL_PATH, path)
+    cache = PregelAppCache(maxsize=4)
+    first = cache.get(str(path), FN_MAP)
+    path.write_text(path.read_text().replace('version: "1.0"', 'version: "1.1"'))
+    second = cache.get(str(path), FN_MAP)
+    assert first is not second
+
+
+def test_least_recently_used_app_is_evicted():
+    cache = PregelAppCache(maxsize=1)
+    cache.get(WIRL_PATH, FN_MAP)
+    cache.get(HITL_WIRL_PATH, HITL_FN_MAP)
+    assert len(cache) == 1
+    cache.get(WIRL_PATH, FN_MAP)
+    assert cache.misses == 3
+
+
+def test_checkpointer_is_bound_per_invocation():
+    app_cache.clear()
+    saver = InMemorySaver()
+    result = run_workflow(HITL_WIRL_PATH, fn_map=HITL_FN_MAP, params={"query": "hello"}, thread_id="t1", checkpointer=saver)
+    assert "__interrupt__" in result
+
+    # Another job on the same cached app must not see the first job's checkpointer
+    other = run_workflow(WIRL_PATH, fn_map=FN_MAP, params={"query": "hello"}, thread_id="t2")
+    assert other.get("FinalAnswer.final_answer") == "final answer from chunks"
+
+    result = run_workflow(HITL_WIRL_PATH, fn_map=HITL_FN_MAP, thread_id="t1", resume=json.dumps({"answer": "looks good"}), checkpointer=saver)
+    assert result.get("FinalAnswer.final_answer") == "draft for hello / looks good"
+    assert app_cache.hits >= 1
+    assert all(entry[0].checkpointer is None for entry in app_cache._apps.values())
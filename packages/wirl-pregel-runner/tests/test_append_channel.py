@@ -0,0 +1,99 @@
+from langgraph.checkpoint.memory import InMemorySaver
+
+from wirl_pregel_runner import BlobSerializer, InMemoryBlobStore, run_workflow
+from wirl_pregel_runner.blobs import APPEND_TYPE
+from wirl_pregel_runner.channels import CHUNK_SIZE, AppendChannel, AppendLog
+
+WIRL_PATH = "tests/wirls/sample_with_cycle.wirl"
+
+
+class CountingStore(InMemoryBlobStore):
+    def __init__(self):
+        super().__init__()
+        self.puts = 0
+        self.reads = 0
+
+    def put(self, data):
+        self.puts += 1
+        return super().put(data)
+
+    def get(self, key):
+        self.reads += 1
+        return super().get(key)
+
+
+def test_appending_shares_sealed_chunks():
+    first = AppendLog.from_list(range(CHUNK_SIZE + 3))
+    second = first.extend([-1])
+
+    assert len(first.chunks) == 1 and len(first.tail) == 3
+    assert second.chunks[0] is first.chunks[0]
+    assert first.to_list() == list(range(CHUNK_SIZE + 3))
+    assert second.to_list() == list(range(CHUNK_SIZE + 3)) + [-1]
+    assert len(second) == CHUNK_SIZE + 4
+
+
+def test_checkpoints_hold_only_the_tail_and_chunk_keys():
+    store = CountingStore()
+    serde = BlobSerializer(store=store)
+    log = AppendLog()
+    sizes = []
+    for i in range(4 * CHUNK_SIZE):
+        log = log.extend([f"item {i} " * 10])
+        type_, data = serde.dumps_typed(log)
+        assert type_ == APPEND_TYPE
+        sizes.append(len(data))
+
+    # Each sealed chunk is written once, however many checkpoints include it
+    assert store.puts == 4
+    # and a checkpoint is never bigger than one chunk of items plus the keys
+    one_chunk = len(serde.serde.dumps_typed(log.to_list()[-CHUNK_SIZE:])[1])
+    assert max(sizes) < one_chunk + 4 * 100
+
+    restored = serde.loads_typed((type_, data))
+    assert store.reads == 0
+    assert restored.to_list() == log.to_list()
+    assert store.reads == 4
+
+
+def test_channel_restores_list_checkpoints():
+    # Checkpoints written before AppendChannel hold the whole list
+    channel = AppendChannel().from_checkpoint(["a", "b"])
+    channel.update([["c"]])
+    assert channel.get() == ["a", "b", "c"]
+    assert AppendChannel().get() == []
+
+
+def query_extender(query: str, add_query_aspect: str, config: dict) -> dict:
+    return {"extended_query": query}
+
+
+def retrieve_from_web(extended_query: str, config: dict) -> dict:
+    return {"chunks": [f"chunk {i}" for i in range(CHUNK_SIZE // 2 + 1)], "need_filtering": False}
+
+
+def retrieve_results_check_false(chunks: list[str], config: dict) -> dict:
+    return {"is_enough": False}
+
+
+def final_answer_generation(query: str, need_filtering: bool, filtered_chunks: list[str], retrieved_chunks: list[str], filtered_chunks_summary: str, config: dict) -> dict:
+    return {"final_answer": f"{len(retrieved_chunks)} chunks"}
+
+
+FN_MAP = {
+    "query_extender": query_extender,
+    "retrieve_from_web": retrieve_from_web,
+    "retrieve_results_check": retrieve_results_check_false,
+    "filter_chunks": lambda **kwargs: {},
+    "final_answer_generation": final_answer_generation,
+}
+
+
+def test_cycle_appends_through_blob_serializer():
+    store = CountingStore()
+    saver = InMemorySaver(serde=BlobSerializer(store=store))
+    result = run_workflow(WIRL_PATH, fn_map=FN_MAP, params={"query": "hello"}, thread_id="a1", checkpointer=saver)
+
+    assert result["FinalAnswer.final_answer"] == f"{4 * (CHUNK_SIZE // 2 + 1)} chunks"
+    assert run_workflow(WIRL_PATH, fn_map=FN_MAP, params={"query": "hello"}, executor="native") == result
+    assert store.puts == len(store) == 2
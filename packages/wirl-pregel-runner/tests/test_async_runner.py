@@ -0,0 +1,85 @@
+import asyncio
+import json
+import time
+
+from langgraph.checkpoint.memory import InMemorySaver
+
+from wirl_pregel_runner import arun_workflow, run_workflow
+
+WIRL_PATH = "tests/wirls/sample.wirl"
+HITL_WIRL_PATH = "tests/wirls/sample_with_hitl.wirl"
+
+
+async def query_extender(query: str, config: dict) -> dict:
+    await asyncio.sleep(0.05)
+    return {"extended_query": f"extended {query}"}
+
+
+def retrieve_from_web(extended_query: str, config: dict) -> dict:
+    return {"chunks": [f"chunk for {extended_query}"], "need_filtering": False}
+
+
+async def filter_chunks(query: str, need_filtering: bool, chunks: list[str], config: dict) -> dict:
+    return {"filtered_chunks": chunks}
+
+
+async def final_answer_generation(query: str, extended_query: str, need_filtering: bool, chunks: list[str], filtered_chunks_summary: str, config: dict) -> dict:
+    return {"final_answer": f"answer from {chunks[0]}"}
+
+
+FN_MAP = {
+    "query_extender": query_extender,
+    "retrieve_from_web": retrieve_from_web,
+    "filter_chunks": filter_chunks,
+    "final_answer_generation": final_answer_generation,
+}
+
+
+async def draft_answer(query: str, config: dict) -> dict:
+    return {"draft": f"draft for {query}"}
+
+
+async def review(draft: str, config: dict) -> dict:
+    return {}
+
+
+async def final_answer(draft: str, comments: dict, config: dict) -> dict:
+    return {"final_answer": f"{draft} / {comments['answer']}"}
+
+
+HITL_FN_MAP = {
+    "draft_answer": draft_answer,
+    "review": review,
+    "final_answer": final_answer,
+}
+
+
+def test_async_functions_with_arun_workflow():
+    result = asyncio.run(arun_workflow(WIRL_PATH, fn_map=FN_MAP, params={"query": "hello"}))
+    assert result.get("FinalAnswer.final_answer") == "answer from chunk for extended hello"
+
+
+def test_async_functions_with_sync_run_workflow():
+    result = run_workflow(WIRL_PATH, fn_map=FN_MAP, params={"query": "hello"})
+    assert result.get("FinalAnswer.final_answer") == "answer from chunk for extended hello"
+
+
+def test_many_workflows_share_one_event_loop():
+    async def run_many():
+        return await asyncio.gather(*(arun_workflow(WIRL_PATH, fn_map=FN_MAP, params={"query": f"q{i}"}) for i in range(20)))
+
+    started = time.perf_counter()
+    results = asyncio.run(run_many())
+    elapsed = time.perf_counter() - started
+    assert [r.get("FinalAnswer.final_answer") for r in results] == [f"answer from chunk for extended q{i}" for i in range(20)]
+    # 20 runs with a 50ms await each would take over a second if they were serialized
+    assert elapsed < 1.0
+
+
+def test_async_hitl_interrupt_and_resume():
+    saver = InMemorySaver()
+    result = asyncio.run(arun_workflow(HITL_WIRL_PATH, fn_map=HITL_FN_MAP, params={"query": "hello"}, thread_id="async-hitl", checkpointer=saver))
+    assert "__interrupt__" in result
+
+    result = asyncio.run(arun_workflow(HITL_WIRL_PATH, fn_map=HITL_FN_MAP, thread_id="async-hitl", resume=json.dumps({"answer": "ok"}), checkpointer=saver))
+    assert result.get("FinalAnswer.final_answer") == "draft for hello / ok"
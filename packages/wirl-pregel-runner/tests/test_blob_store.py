@@ -0,0 +1,129 @@
+import json
+import os
+import pickle
+
+import pytest
+from langgraph.checkpoint.memory import InMemorySaver
+
+from wirl_pregel_runner import BlobSerializer, FileBlobStore, InMemoryBlobStore, run_workflow
+from wirl_pregel_runner.blobs import BLOB_TYPE, PICKLE_TYPE, BlobRef, _pack
+
+HITL_WIRL_PATH = "tests/wirls/sample_with_hitl.wirl"
+
+BIG_DRAFT = "draft " * 10_000
+
+
+class Page:
+    """Stands in for a PIL image: picklable but not encodable by the checkpoint serializer."""
+
+    def __init__(self, pixels: bytes):
+        self.pixels = pixels
+
+    def __eq__(self, other):
+        return isinstance(other, Page) and other.pixels == self.pixels
+
+
+class CountingStore(InMemoryBlobStore):
+    def __init__(self):
+        super().__init__()
+        self.reads = 0
+
+    def get(self, key):
+        self.reads += 1
+        return super().get(key)
+
+
+def draft_answer(query: str, config: dict) -> dict:
+    return {"draft": BIG_DRAFT}
+
+
+def review(draft: str, config: dict) -> dict:
+    return {}
+
+
+def final_answer(draft: str, comments: dict, config: dict) -> dict:
+    return {"final_answer": f"{len(draft)} / {comments['answer']}"}
+
+
+HITL_FN_MAP = {
+    "draft_answer": draft_answer,
+    "review": review,
+    "final_answer": final_answer,
+}
+
+
+def test_large_values_are_checkpointed_as_references():
+    store = CountingStore()
+    saver = InMemorySaver(serde=BlobSerializer(store=store, threshold=1024))
+    result = run_workflow(HITL_WIRL_PATH, fn_map=HITL_FN_MAP, params={"query": "hello"}, thread_id="b1", checkpointer=saver)
+    assert "__interrupt__" in result
+    assert len(store) == 1
+
+    # The draft is stored once; checkpoints only hold its key (the interrupt payload stays inline)
+    for type_, data in saver.blobs.values():
+        assert type_ == BLOB_TYPE or len(data) <= 1024
+    draft_writes = [value for writes in saver.writes.values() for (_, channel, value, _) in writes.values() if channel == "DraftAnswer.draft"]
+    assert draft_writes and all(type_ == BLOB_TYPE for type_, _ in draft_writes)
+
+    result = run_workflow(HITL_WIRL_PATH, fn_map=HITL_FN_MAP, thread_id="b1", resume=json.dumps({"answer": "ok"}), checkpointer=saver)
+    assert result["FinalAnswer.final_answer"] == f"{len(BIG_DRAFT)} / ok"
+    # The reference is written back as is; the value is read once, by FinalAnswer
+    assert len(store) == 1
+    assert store.reads == 1
+
+
+def test_unencodable_values_go_to_the_store_and_load_lazily():
+    store = CountingStore()
+    serde = BlobSerializer(store=store, pickle_modules=[Page.__module__])
+    page = Page(b"\x00" * 10)
+
+    type_, data = serde.dumps_typed(page)
+    assert type_ == BLOB_TYPE
+    ref = serde.loads_typed((type_, data))
+    assert isinstance(ref, BlobRef) and store.reads == 0
+    assert ref.load() == page and ref.load() == page
+    assert store.reads == 1
+    # Dumping a reference does not load it again
+    assert serde.dumps_typed(ref) == (type_, data)
+    assert serde.dumps_typed("small") == serde.serde.dumps_typed("small")
+
+
+def test_unencodable_values_outside_the_allowed_modules_fail():
+    serde = BlobSerializer(store=InMemoryBlobStore())
+    with pytest.raises(TypeError, match="Cannot serialize Page"):
+        serde.dumps_typed(Page(b"\x00"))
+
+
+def test_blobs_cannot_unpickle_other_globals():
+    store = InMemoryBlobStore()
+    serde = BlobSerializer(store=store, pickle_modules=[Page.__module__])
+    key = store.put(_pack(PICKLE_TYPE, pickle.dumps(os.getcwd)))
+    with pytest.raises(pickle.UnpicklingError, match="posix.getcwd is not allowed"):
+        serde.loads_typed((BLOB_TYPE, key.encode())).load()
+
+
+def test_large_values_are_stored_in_the_checkpoint_encoding():
+    store = InMemoryBlobStore()
+    serde = BlobSerializer(store=store, threshold=0, pickle_modules=[])
+    type_, data = serde.dumps_typed({"draft": BIG_DRAFT})
+    assert type_ == BLOB_TYPE
+    assert not store.get(data.decode()).startswith(PICKLE_TYPE.encode())
+    assert serde.loads_typed((type_, data)).load() == {"draft": BIG_DRAFT}
+
+
+def test_append_channels_extend_restored_references():
+    serde = BlobSerializer(store=InMemoryBlobStore(), threshold=0)
+    ref = serde.loads_typed(serde.dumps_typed(["a", "b"]))
+    assert ref + ["c"] == ["a", "b", "c"]
+    assert pickle.loads(pickle.dumps(ref)) == ["a", "b"]
+
+
+def test_file_store_is_content_addressed(tmp_path):
+    store = FileBlobStore(tmp_path)
+    key = store.put(b"payload")
+    assert store.put(b"payload") == key
+    assert bytes(store.get(key)) == b"payload"
+    assert [path.name for path in tmp_path.rglob("*") if path.is_file()] == [key]
+
+    store.clear()
+    assert not tmp_path.exists()
@@ -0,0 +1,129 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from wirl_pregel_runner import CancelToken, NodeUpdate, RunCancelledError, arun_workflow, run_workflow, stream_workflow
+
+WIRL_PATH = "tests/wirls/sample_with_timeout.wirl"
+
+
+def make_fn_map(delay: float):
+    calls = {"query_extender": 0, "final_answer": 0}
+    seen = {}
+
+    def query_extender(query: str, config: dict) -> dict:
+        calls["query_extender"] += 1
+        seen["cancel_token"] = config.get("cancel_token")
+        time.sleep(delay)
+        return {"extended_query": f"extended {query}"}
+
+    def final_answer(extended_query: str, config: dict) -> dict:
+        calls["final_answer"] += 1
+        return {"final_answer": f"answer to {extended_query}"}
+
+    return {"query_extender": query_extender, "final_answer": final_answer}, calls, seen
+
+
+def cancel_later(token: CancelToken, seconds: float) -> None:
+    threading.Timer(seconds, token.cancel, kwargs={"reason": "Canceled by user"}).start()
+
+
+@pytest.mark.parametrize("executor", ["pregel", "native"])
+def test_cancel_stops_the_next_nodes(executor):
+    # QueryExtender has no timeout: it runs on the runner's thread and finishes
+    fn_map, calls, _ = make_fn_map(0.5)
+    token = CancelToken()
+    cancel_later(token, 0.1)
+    with pytest.raises(RunCancelledError, match="Canceled by user"):
+        run_workflow(WIRL_PATH, fn_map=fn_map, params={"query": "hello"}, use_app_cache=False, executor=executor, cancel_token=token)
+
+    assert calls == {"query_extender": 1, "final_answer": 0}
+
+
+@pytest.mark.parametrize("executor", ["pregel", "native"])
+def test_cancel_drops_a_running_node_with_a_timeout(executor):
+    fn_map, calls, _ = make_fn_map(0)
+    started_final = threading.Event()
+
+    def final_answer(extended_query: str, config: dict) -> dict:
+        calls["final_answer"] += 1
+        started_final.set()
+        time.sleep(5)
+        return {"final_answer": "too late"}
+
+    fn_map["final_answer"] = final_answer
+    token = CancelToken()
+    threading.Thread(target=lambda: started_final.wait(5) and token.cancel("Canceled by user"), daemon=True).start()
+    started = time.perf_counter()
+    with pytest.raises(RunCancelledError, match="Canceled by user"):
+        run_workflow(WIRL_PATH, fn_map=fn_map, params={"query": "hello"}, use_app_cache=False, executor=executor, cancel_token=token)
+
+    # Dropped before its 1s timeout, so it is not retried
+    assert time.perf_counter() - started < 1
+    assert calls == {"query_extender": 1, "final_answer": 1}
+
+
+def test_sync_function_without_timeout_runs_on_the_callers_thread():
+    fn_map, _, _ = make_fn_map(0)
+    threads = []
+
+    def query_extender(query: str, config: dict) -> dict:
+        threads.append(threading.current_thread())
+        return {"extended_query": query}
+
+    fn_map["query_extender"] = query_extender
+    run_workflow(WIRL_PATH, fn_map=fn_map, params={"query": "hello"}, use_app_cache=False, executor="native", deadline=time.time() + 60, cancel_token=CancelToken())
+
+    assert not threads[0].name.endswith("-timed")
+
+
+@pytest.mark.parametrize("executor", ["pregel", "native"])
+def test_cancel_async_run(executor):
+    async def query_extender(query: str, config: dict) -> dict:
+        await asyncio.sleep(5)
+        return {"extended_query": f"extended {query}"}
+
+    fn_map, calls, _ = make_fn_map(0)
+    fn_map["query_extender"] = query_extender
+    token = CancelToken()
+    cancel_later(token, 0.2)
+    started = time.perf_counter()
+    with pytest.raises(RunCancelledError):
+        asyncio.run(arun_workflow(WIRL_PATH, fn_map=fn_map, params={"query": "hello"}, use_app_cache=False, executor=executor, cancel_token=token))
+
+    assert time.perf_counter() - started < 2
+    assert calls["final_answer"] == 0
+
+
+def test_cancelled_token_runs_nothing():
+    fn_map, calls, _ = make_fn_map(0)
+    token = CancelToken()
+    token.cancel()
+    with pytest.raises(RunCancelledError):
+        run_workflow(WIRL_PATH, fn_map=fn_map, params={"query": "hello"}, use_app_cache=False, cancel_token=token)
+    assert calls == {"query_extender": 0, "final_answer": 0}
+
+
+def test_cancel_between_supersteps_of_a_stream():
+    fn_map, calls, seen = make_fn_map(0)
+    token = CancelToken()
+    updates = []
+    with pytest.raises(RunCancelledError):
+        for event in stream_workflow(WIRL_PATH, fn_map=fn_map, params={"query": "hello"}, use_app_cache=False, cancel_token=token):
+            if isinstance(event, NodeUpdate):
+                updates.append(event.node)
+                token.cancel()
+
+    assert updates == ["QueryExtender"]
+    assert calls["final_answer"] == 0
+    assert seen["cancel_token"] is token
+
+
+def test_run_without_cancel_completes():
+    fn_map, calls, seen = make_fn_map(0)
+    result = run_workflow(WIRL_PATH, fn_map=fn_map, params={"query": "hello"}, use_app_cache=False, cancel_token=CancelToken())
+
+    assert result["FinalAnswer.final_answer"] == "answer to extended hello"
+    assert isinstance(seen["cancel_token"], CancelToken)
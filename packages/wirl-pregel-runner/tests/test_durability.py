@@ -0,0 +1,111 @@
+import json
+from pathlib import Path
+
+import pytest
+from langgraph.checkpoint.memory import InMemorySaver
+
+from wirl_pregel_runner import run_workflow
+from wirl_pregel_runner.pregel_graph_builder import build_pregel_graph
+
+CYCLE_WIRL_PATH = "tests/wirls/sample_with_cycle.wirl"
+HITL_WIRL_PATH = "tests/wirls/sample_with_hitl.wirl"
+
+
+def query_extender(query: str, add_query_aspect: str, config: dict) -> dict:
+    return {"extended_query": f"{query} {add_query_aspect}"}
+
+
+def retrieve_from_web(extended_query: str, config: dict) -> dict:
+    return {"chunks": ["chunk"], "need_filtering": False}
+
+
+def retrieve_results_check(chunks: list[str], config: dict) -> dict:
+    return {"is_enough": len(chunks) >= 3, "next_query_aspect": "more"}
+
+
+def filter_chunks(query: str, need_filtering: bool, chunks: list[str], config: dict) -> dict:
+    return {"filtered_chunks": chunks, "filtered_chunks_summary": "summary"}
+
+
+def final_answer_generation(query: str, need_filtering: bool, filtered_chunks: list[str], retrieved_chunks: list[str], filtered_chunks_summary: str, config: dict) -> dict:
+    return {"final_answer": f"{len(retrieved_chunks)} chunks"}
+
+
+CYCLE_FN_MAP = {
+    "query_extender": query_extender,
+    "retrieve_from_web": retrieve_from_web,
+    "filter_chunks": filter_chunks,
+    "final_answer_generation": final_answer_generation,
+    "retrieve_results_check": retrieve_results_check,
+}
+
+
+def draft_answer(query: str, config: dict) -> dict:
+    return {"draft": f"draft for {query}"}
+
+
+def review(draft: str, config: dict) -> dict:
+    return {}
+
+
+def final_answer(draft: str, comments: dict, config: dict) -> dict:
+    return {"final_answer": f"{draft} / {comments['answer']}"}
+
+
+HITL_FN_MAP = {
+    "draft_answer": draft_answer,
+    "review": review,
+    "final_answer": final_answer,
+}
+
+
+def with_durability(tmp_path: Path, source: str, durability: str) -> str:
+    text = Path(source).read_text().replace("metadata {", f'metadata {{\n    durability: "{durability}"', 1)
+    path = tmp_path / Path(source).name
+    path.write_text(text)
+    return str(path)
+
+
+def count_checkpoints(saver: InMemorySaver, thread_id: str) -> int:
+    return len(list(saver.list({"configurable": {"thread_id": thread_id}})))
+
+
+def test_exit_durability_writes_fewer_checkpoints():
+    counts = {}
+    for durability in ("sync", "async", "exit"):
+        saver = InMemorySaver()
+        result = run_workflow(CYCLE_WIRL_PATH, fn_map=CYCLE_FN_MAP, params={"query": "hello"}, thread_id="t", checkpointer=saver, durability=durability)
+        assert result["FinalAnswer.final_answer"] == "3 chunks"
+        counts[durability] = count_checkpoints(saver, "t")
+    assert counts["sync"] == counts["async"]
+    assert counts["exit"] == 1 < counts["sync"]
+
+
+def test_durability_from_workflow_metadata(tmp_path):
+    path = with_durability(tmp_path, CYCLE_WIRL_PATH, "exit")
+    saver = InMemorySaver()
+    run_workflow(path, fn_map=CYCLE_FN_MAP, params={"query": "hello"}, thread_id="t", checkpointer=saver)
+    assert count_checkpoints(saver, "t") == 1
+
+    # The argument overrides the metadata
+    saver = InMemorySaver()
+    run_workflow(path, fn_map=CYCLE_FN_MAP, params={"query": "hello"}, thread_id="t", checkpointer=saver, durability="sync")
+    assert count_checkpoints(saver, "t") > 1
+
+
+def test_exit_durability_still_checkpoints_interrupts(tmp_path):
+    path = with_durability(tmp_path, HITL_WIRL_PATH, "exit")
+    saver = InMemorySaver()
+    result = run_workflow(path, fn_map=HITL_FN_MAP, params={"query": "hello"}, thread_id="h", checkpointer=saver)
+    assert "__interrupt__" in result
+    assert count_checkpoints(saver, "h") == 1
+
+    result = run_workflow(path, fn_map=HITL_FN_MAP, thread_id="h", resume=json.dumps({"answer": "ok"}), checkpointer=saver)
+    assert result["FinalAnswer.final_answer"] == "draft for hello / ok"
+
+
+def test_unknown_durability_is_rejected(tmp_path):
+    with pytest.raises(ValueError, match="durability"):
+        build_pregel_graph(with_durability(tmp_path, CYCLE_WIRL_PATH, "never"), functions=CYCLE_FN_MAP)
+    with pytest.raises(ValueError, match="durability"):
+        run_workflow(CYCLE_WIRL_PATH, fn_map=CYCLE_FN_MAP, params={"query": "hello"}, durability="never")
@@ -0,0 +1,55 @@
+import pytest
+
+from wirl_pregel_runner.expressions import compile_condition, compile_value
+
+
+class CustomType:
+    pass
+
+
+def test_only_none_and_false_are_falsy():
+    condition = compile_condition("Node.value")
+    assert condition({"Node.value": []})
+    assert condition({"Node.value": 0})
+    assert condition({"Node.value": ""})
+    assert not condition({"Node.value": None})
+    assert not condition({"Node.value": False})
+
+
+def test_missing_nodes_and_attributes_read_as_false():
+    assert not compile_condition("Missing.value")({})
+    assert not compile_condition("Node.other")({"Node.value": True})
+    assert compile_condition("not Node.other")({"Node.value": True})
+
+
+def test_boolean_expressions_over_nodes_and_inputs():
+    condition = compile_condition("Retrieve.need_filtering and FilterChunks.filtered_chunks or not Retrieve.need_filtering")
+    assert condition({"Retrieve.need_filtering": False})
+    assert not condition({"Retrieve.need_filtering": True})
+    assert condition({"Retrieve.need_filtering": True, "FilterChunks.filtered_chunks": ["chunk"]})
+    assert compile_condition("query == 'hello' and true")({"query": "hello"})
+
+
+def test_values_of_unknown_types_are_truthy():
+    assert compile_condition("Parser.objects")({"Parser.objects": [CustomType()]})
+
+
+def test_reads_only_referenced_channels():
+    condition = compile_condition("A.x or B.y")
+    assert set(condition.channels) == {"A", "A.x", "B", "B.y"}
+    state = {f"Node{i}.out": i for i in range(100)} | {"B.y": True}
+    assert condition._namespace(state).keys() == {"A", "B"}
+    assert condition(state)
+
+
+def test_syntax_errors_fail_at_compile_time():
+    with pytest.raises(SyntaxError):
+        compile_condition("Node.value and")
+
+
+def test_compile_value():
+    assert compile_value('"text"')({}) == "text"
+    assert compile_value("3")({}) == 3
+    assert compile_value("0.5")({}) == 0.5
+    assert compile_value("Node.value")({"Node.value": [1]}) == [1]
+    assert compile_value("Node.value")({}) is None
@@ -0,0 +1,133 @@
+import json
+import logging
+import time
+
+import pytest
+
+from wirl_pregel_runner import instrumentation, run_workflow
+from wirl_pregel_runner.instrumentation import InMemorySink, JsonlSink, LoggingSink
+from wirl_pregel_runner.pregel_graph_builder import build_pregel_graph
+
+WIRL_PATH = "tests/wirls/sample.wirl"
+TIMEOUT_WIRL_PATH = "tests/wirls/sample_with_timeout.wirl"
+
+
+def query_extender(query: str, config: dict) -> dict:
+    time.sleep(0.02)
+    return {"extended_query": f"extended {query}"}
+
+
+def retrieve_from_web(extended_query: str, config: dict) -> dict:
+    return {"chunks": [f"chunk for {extended_query}"], "need_filtering": False}
+
+
+def filter_chunks(query: str, need_filtering: bool, chunks: list[str], config: dict) -> dict:
+    return {"filtered_chunks": chunks}
+
+
+def final_answer_generation(query: str, extended_query: str, need_filtering: bool, chunks: list[str], filtered_chunks_summary: str, config: dict) -> dict:
+    return {"final_answer": f"answer from {chunks[0]}"}
+
+
+FN_MAP = {
+    "query_extender": query_extender,
+    "retrieve_from_web": retrieve_from_web,
+    "filter_chunks": filter_chunks,
+    "final_answer_generation": final_answer_generation,
+}
+
+
+@pytest.fixture
+def sink():
+    sink = InMemorySink()
+    instrumentation.add_sink(sink)
+    yield sink
+    instrumentation.remove_sink(sink)
+
+
+def test_every_activation_is_recorded(sink):
+    run_workflow(WIRL_PATH, fn_map=FN_MAP, params={"query": "hello"}, thread_id="m1", executor="pregel")
+    by_node = {}
+    for activation in sink.activations:
+        by_node.setdefault(activation.node, []).append(activation.status)
+
+    assert by_node["QueryExtender"] == ["ran"]
+    assert by_node["Retrieve"] == ["ran"]
+    # FilterChunks wakes up once Retrieve has written, and need_filtering is false
+    assert by_node["FilterChunks"] == ["skipped_when"]
+    assert by_node["FinalAnswer"] == ["ran"]
+
+    extender = next(a for a in sink.activations if a.node == "QueryExtender")
+    assert extender.wall_time >= 0.02
+    assert extender.cpu_time < extender.wall_time
+    assert extender.input_bytes == len(json.dumps({"query": "hello"}))
+    assert extender.output_bytes == len(json.dumps({"extended_query": "extended hello"}))
+    assert extender.thread_id == "m1" and extender.step == 0
+
+
+def test_summary_orders_nodes_by_wall_time(sink):
+    run_workflow(WIRL_PATH, fn_map=FN_MAP, params={"query": "hello"})
+    summary = sink.summary()
+    assert next(iter(summary)) == "QueryExtender"
+    assert summary["FilterChunks"]["skipped"] == summary["FilterChunks"]["activations"] == 1
+
+
+def test_unpruned_triggers_show_wasted_activations(sink):
+    app = build_pregel_graph(WIRL_PATH, functions=FN_MAP, prune_triggers=False)
+    app.invoke({"query": "hello"}, {"configurable": {"thread_id": "m2"}})
+    statuses = [a.status for a in sink.activations if a.node == "FilterChunks"]
+    # Triggered once by the workflow input before Retrieve ran
+    assert statuses == ["skipped_not_ready", "skipped_when"]
+
+
+def test_failed_activation_is_recorded(sink):
+    def broken(query: str, config: dict) -> dict:
+        raise ValueError("boom")
+
+    with pytest.raises(RuntimeError):
+        run_workflow(WIRL_PATH, fn_map=FN_MAP | {"query_extender": broken}, params={"query": "hello"}, use_app_cache=False)
+    failed = [a for a in sink.activations if a.status == "failed"]
+    assert [a.node for a in failed] == ["QueryExtender"]
+    assert "boom" in failed[0].error
+
+
+def test_jsonl_and_logging_sinks(tmp_path, caplog):
+    jsonl = JsonlSink(tmp_path / "metrics.jsonl")
+    log_sink = LoggingSink(level=logging.WARNING)
+    instrumentation.add_sink(jsonl)
+    instrumentation.add_sink(log_sink)
+    try:
+        run_workflow(WIRL_PATH, fn_map=FN_MAP, params={"query": "hello"})
+    finally:
+        instrumentation.remove_sink(jsonl)
+        instrumentation.remove_sink(log_sink)
+        jsonl.close()
+
+    records = [json.loads(line) for line in (tmp_path / "metrics.jsonl").read_text().splitlines()]
+    assert {record["node"] for record in records} == {"QueryExtender", "Retrieve", "FilterChunks", "FinalAnswer"}
+    assert any("QueryExtender ran" in message for message in caplog.messages)
+
+
+def burn_cpu(seconds: float) -> None:
+    started = time.thread_time()
+    while time.thread_time() - started < seconds:
+        pass
+
+
+@pytest.mark.parametrize("deadline", [None, 60])
+def test_cpu_time_counts_functions_with_a_time_limit(sink, deadline):
+    def query_extender(query: str, config: dict) -> dict:
+        burn_cpu(0.1)
+        return {"extended_query": query}
+
+    def final_answer(extended_query: str, config: dict) -> dict:
+        # ``timeout: 1s`` runs it on its own thread
+        burn_cpu(0.1)
+        return {"final_answer": extended_query}
+
+    fn_map = {"query_extender": query_extender, "final_answer": final_answer}
+    run_workflow(TIMEOUT_WIRL_PATH, fn_map=fn_map, params={"query": "hello"}, use_app_cache=False, deadline=deadline and time.time() + deadline)
+
+    cpu_time = {activation.node: activation.cpu_time for activation in sink.activations if activation.status == "ran"}
+    assert cpu_time["QueryExtender"] >= 0.09
+    assert cpu_time["FinalAnswer"] >= 0.09
@@ -0,0 +1,80 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from wirl_pregel_runner import arun_workflow, run_workflow
+
+WIRL_PATH = "tests/wirls/sample_with_map.wirl"
+
+
+def prepare_questions(questions: list[str], config: dict) -> dict:
+    return {"prepared": [q.strip() for q in questions]}
+
+
+def summarize(answers: list[str], reviews: list[str | None], config: dict) -> dict:
+    return {"report": " | ".join(f"{a} ({r})" if r else a for a, r in zip(answers, reviews))}
+
+
+def review(answer: str, needs_review: bool, config: dict) -> dict:
+    return {"review": "reviewed"}
+
+
+def make_answer(delay: float, tracker: dict):
+    lock = threading.Lock()
+
+    def answer(question: str, style: str, config: dict) -> dict:
+        with lock:
+            tracker["running"] += 1
+            tracker["peak"] = max(tracker["peak"], tracker["running"])
+        time.sleep(delay)
+        with lock:
+            tracker["running"] -= 1
+        return {"answer": f"{style} answer to {question}", "needs_review": question.endswith("!")}
+
+    return answer
+
+
+def test_map_collects_outputs_in_item_order():
+    tracker = {"running": 0, "peak": 0}
+    fn_map = {"prepare_questions": prepare_questions, "answer": make_answer(0.01, tracker), "review": review, "summarize": summarize}
+    result = run_workflow(WIRL_PATH, fn_map=fn_map, params={"questions": [" q1", "q2!", "q3 "], "style": "short"})
+    assert result.get("Summarize.report") == "short answer to q1 | short answer to q2! (reviewed) | short answer to q3"
+
+
+def test_map_runs_items_concurrently_up_to_max_concurrency():
+    tracker = {"running": 0, "peak": 0}
+    fn_map = {"prepare_questions": prepare_questions, "answer": make_answer(0.1, tracker), "review": review, "summarize": summarize}
+    started = time.perf_counter()
+    run_workflow(WIRL_PATH, fn_map=fn_map, params={"questions": [f"q{i}" for i in range(8)], "style": "short"})
+    elapsed = time.perf_counter() - started
+    assert tracker["peak"] == 4
+    # 8 items with max_concurrency 4 take two rounds of 0.1s instead of eight
+    assert elapsed < 0.6
+
+
+def test_map_over_empty_list():
+    tracker = {"running": 0, "peak": 0}
+    fn_map = {"prepare_questions": prepare_questions, "answer": make_answer(0, tracker), "review": review, "summarize": summarize}
+    result = run_workflow(WIRL_PATH, fn_map=fn_map, params={"questions": [], "style": "short"})
+    assert result.get("Summarize.report") == ""
+
+
+def test_map_with_async_functions():
+    async def answer(question: str, style: str, config: dict) -> dict:
+        await asyncio.sleep(0.05)
+        return {"answer": f"{style} answer to {question}", "needs_review": False}
+
+    fn_map = {"prepare_questions": prepare_questions, "answer": answer, "review": review, "summarize": summarize}
+    result = asyncio.run(arun_workflow(WIRL_PATH, fn_map=fn_map, params={"questions": ["a", "b"], "style": "long"}))
+    assert result.get("Summarize.report") == "long answer to a | long answer to b"
+
+
+def test_map_failure_fails_the_run():
+    def answer(question: str, style: str, config: dict) -> dict:
+        raise ValueError("model unavailable")
+
+    fn_map = {"prepare_questions": prepare_questions, "answer": answer, "review": review, "summarize": summarize}
+    with pytest.raises(RuntimeError, match="model unavailable"):
+        run_workflow(WIRL_PATH, fn_map=fn_map, params={"questions": ["a"], "style": "short"})
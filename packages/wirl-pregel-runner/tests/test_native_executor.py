@@ -0,0 +1,153 @@
+import asyncio
+import json
+import time
+
+import pytest
+from langgraph.checkpoint.memory import InMemorySaver
+from wirl_lang import parse_wirl_text
+
+from wirl_pregel_runner import arun_workflow, run_workflow
+from wirl_pregel_runner.app_cache import app_cache, native_cache
+from wirl_pregel_runner.native_executor import NativeWorkflow, unsupported_reason
+
+FAN_OUT_WIRL_PATH = "tests/wirls/sample_fan_out.wirl"
+CYCLE_WIRL_PATH = "tests/wirls/sample_with_cycle.wirl"
+HITL_WIRL_PATH = "tests/wirls/sample_with_hitl.wirl"
+
+
+def search_web(query: str, config: dict) -> dict:
+    time.sleep(0.2)
+    return {"results": [f"web {query}"]}
+
+
+def search_papers(query: str, config: dict) -> dict:
+    time.sleep(0.2)
+    return {"results": [f"paper {query}"]}
+
+
+def join(web: list[str], papers: list[str], config: dict) -> dict:
+    return {"answer": ", ".join(web + papers)}
+
+
+FAN_OUT_FN_MAP = {"search_web": search_web, "search_papers": search_papers, "join": join}
+
+
+def query_extender(query: str, add_query_aspect: str, config: dict) -> dict:
+    return {"extended_query": f"{query} {add_query_aspect}"}
+
+
+def retrieve_from_web(extended_query: str, config: dict) -> dict:
+    return {"chunks": [extended_query], "need_filtering": True}
+
+
+def retrieve_results_check(chunks: list[str], config: dict) -> dict:
+    return {"is_enough": len(chunks) >= 3, "next_query_aspect": f"aspect {len(chunks)}"}
+
+
+def filter_chunks(query: str, need_filtering: bool, chunks: list[str], config: dict) -> dict:
+    return {"filtered_chunks": chunks[-1:], "filtered_chunks_summary": f"{len(chunks)} chunks"}
+
+
+def final_answer_generation(query: str, need_filtering: bool, filtered_chunks: list[str], retrieved_chunks: list[str], filtered_chunks_summary: str, config: dict) -> dict:
+    return {"final_answer": f"{filtered_chunks} from {retrieved_chunks} ({filtered_chunks_summary})"}
+
+
+CYCLE_FN_MAP = {
+    "query_extender": query_extender,
+    "retrieve_from_web": retrieve_from_web,
+    "retrieve_results_check": retrieve_results_check,
+    "filter_chunks": filter_chunks,
+    "final_answer_generation": final_answer_generation,
+}
+
+
+def test_native_matches_pregel_on_cycles_when_and_append():
+    pregel = run_workflow(CYCLE_WIRL_PATH, fn_map=CYCLE_FN_MAP, params={"query": "q"}, executor="pregel")
+    native = run_workflow(CYCLE_WIRL_PATH, fn_map=CYCLE_FN_MAP, params={"query": "q"}, executor="native")
+    assert native == pregel
+    assert native["RetrieveLoop.iteration_counter"] == 2
+    assert native["FinalAnswer.final_answer"] == "['q aspect 2'] from ['q None', 'q aspect 1', 'q aspect 2'] (3 chunks)"
+
+
+def test_independent_nodes_run_concurrently():
+    started = time.perf_counter()
+    result = run_workflow(FAN_OUT_WIRL_PATH, fn_map=FAN_OUT_FN_MAP, params={"query": "q"}, executor="native")
+    assert time.perf_counter() - started < 0.35
+    assert result == {"Join.answer": "web q, paper q"}
+
+
+def test_async_native_runs_coroutines_on_the_loop():
+    async def asearch_web(query: str, config: dict) -> dict:
+        await asyncio.sleep(0.2)
+        return {"results": [f"web {query}"]}
+
+    fn_map = FAN_OUT_FN_MAP | {"search_web": asearch_web}
+    started = time.perf_counter()
+    result = asyncio.run(arun_workflow(FAN_OUT_WIRL_PATH, fn_map=fn_map, params={"query": "q"}, executor="native"))
+    assert time.perf_counter() - started < 0.35
+    assert result == {"Join.answer": "web q, paper q"}
+
+
+def test_node_errors_propagate():
+    def broken(query: str, config: dict) -> dict:
+        raise ValueError("boom")
+
+    with pytest.raises(RuntimeError, match="boom"):
+        run_workflow(FAN_OUT_WIRL_PATH, fn_map=FAN_OUT_FN_MAP | {"search_papers": broken}, params={"query": "q"}, executor="native", use_app_cache=False)
+
+
+def test_auto_selects_native_only_without_checkpoints():
+    app_cache.clear()
+    native_cache.clear()
+    run_workflow(FAN_OUT_WIRL_PATH, fn_map=FAN_OUT_FN_MAP, params={"query": "q"})
+    assert (native_cache.misses, app_cache.misses) == (1, 0)
+
+    saver = InMemorySaver()
+    run_workflow(FAN_OUT_WIRL_PATH, fn_map=FAN_OUT_FN_MAP, params={"query": "q"}, thread_id="t", checkpointer=saver)
+    assert app_cache.misses == 1
+    assert saver.get_tuple({"configurable": {"thread_id": "t"}}) is not None
+
+
+def test_hitl_workflows_run_on_pregel():
+    fn_map = {
+        "draft_answer": lambda query, config: {"draft": f"draft for {query}"},
+        "review": lambda draft, config: {},
+        "final_answer": lambda draft, comments, config: {"final_answer": f"{draft} / {comments['answer']}"},
+    }
+    saver = InMemorySaver()
+    result = run_workflow(HITL_WIRL_PATH, fn_map=fn_map, params={"query": "q"}, thread_id="h", checkpointer=saver)
+    assert "__interrupt__" in result
+    result = run_workflow(HITL_WIRL_PATH, fn_map=fn_map, thread_id="h", resume=json.dumps({"answer": "ok"}), checkpointer=saver)
+    assert result["FinalAnswer.final_answer"] == "draft for q / ok"
+
+    with pytest.raises(ValueError, match="hitl"):
+        run_workflow(HITL_WIRL_PATH, fn_map=fn_map, params={"query": "q"}, executor="native")
+    with pytest.raises(ValueError, match="checkpoints"):
+        run_workflow(FAN_OUT_WIRL_PATH, fn_map=FAN_OUT_FN_MAP, params={"query": "q"}, checkpointer=saver, executor="native")
+
+
+def test_dependency_loops_are_not_supported():
+    workflow = parse_wirl_text(
+        """
+        workflow Loop {
+          inputs { String query }
+          outputs { String answer = B.answer }
+          node A {
+            call a
+            inputs {
+              String query = query
+              String previous = B.answer?
+            }
+            outputs { String draft }
+          }
+          node B {
+            call b
+            inputs { String draft = A.draft }
+            outputs { String answer }
+          }
+        }
+        """
+    )
+    assert unsupported_reason(workflow) == "nodes ['A', 'B'] depend on each other"
+    with pytest.raises(ValueError, match="depend on each other"):
+        NativeWorkflow(workflow, {"a": lambda **_: {}, "b": lambda **_: {}})
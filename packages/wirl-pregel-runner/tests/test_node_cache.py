@@ -0,0 +1,118 @@
+import pickle
+import sqlite3
+import threading
+
+import pytest
+from wirl_lang import CacheConfig, parse_wirl_text
+
+from wirl_pregel_runner import InMemoryCacheStore, SQLiteCacheStore, cache_stats, run_workflow
+from wirl_pregel_runner.node_cache import MISS, NodeCache, make_cache_key
+
+WIRL_PATH = "tests/wirls/sample_with_cache.wirl"
+
+
+@pytest.fixture(autouse=True)
+def reset_stats():
+    cache_stats.reset()
+    yield
+    cache_stats.reset()
+
+
+def make_fn_map():
+    calls = {"embed": 0, "final_answer": 0}
+
+    def embed(query: str, request_id: str, config: dict) -> dict:
+        calls["embed"] += 1
+        return {"embedding": f"vector({query}, {config['model']})"}
+
+    def final_answer(embedding: str, config: dict) -> dict:
+        calls["final_answer"] += 1
+        return {"final_answer": f"answer from {embedding}"}
+
+    return {"embed": embed, "final_answer": final_answer}, calls
+
+
+def test_cached_node_is_skipped_on_repeated_inputs():
+    fn_map, calls = make_fn_map()
+    store = InMemoryCacheStore()
+    for request_id in ("r1", "r2"):
+        # request_id is not part of the cache key, so the second run hits
+        result = run_workflow(WIRL_PATH, fn_map=fn_map, params={"query": "hello", "request_id": request_id}, cache_store=store)
+        assert result.get("FinalAnswer.final_answer") == "answer from vector(hello, small)"
+    assert calls == {"embed": 1, "final_answer": 2}
+    assert cache_stats.snapshot() == {"Embed": {"hits": 1, "misses": 1}}
+
+
+def test_different_key_inputs_miss():
+    fn_map, calls = make_fn_map()
+    store = InMemoryCacheStore()
+    run_workflow(WIRL_PATH, fn_map=fn_map, params={"query": "hello", "request_id": "r1"}, cache_store=store)
+    run_workflow(WIRL_PATH, fn_map=fn_map, params={"query": "bye", "request_id": "r1"}, cache_store=store)
+    assert calls["embed"] == 2
+    assert cache_stats.snapshot()["Embed"] == {"hits": 0, "misses": 2}
+
+
+def test_sqlite_store_survives_reopen(tmp_path):
+    fn_map, calls = make_fn_map()
+    path = tmp_path / "cache.db"
+    run_workflow(WIRL_PATH, fn_map=fn_map, params={"query": "hello", "request_id": "r1"}, cache_store=SQLiteCacheStore(path))
+    run_workflow(WIRL_PATH, fn_map=fn_map, params={"query": "hello", "request_id": "r2"}, cache_store=SQLiteCacheStore(path))
+    assert calls["embed"] == 1
+
+
+def test_expired_entries_miss():
+    store = InMemoryCacheStore()
+    store.set("key", {"embedding": "v"}, ttl=-1)
+    assert store.get("key") is MISS
+    store.set("key", {}, ttl=60)
+    # A cached empty update is still a hit
+    assert store.get("key") == {}
+
+
+def test_key_depends_on_constants_and_ignores_dict_order():
+    assert make_cache_key("embed", {}, {"a": {"x": 1, "y": 2}}) == make_cache_key("embed", {}, {"a": {"y": 2, "x": 1}})
+    assert make_cache_key("embed", {"model": "small"}, {"a": 1}) != make_cache_key("embed", {"model": "large"}, {"a": 1})
+
+
+def test_cache_is_rejected_on_hitl_nodes_and_unknown_keys():
+    workflow = parse_wirl_text(open("tests/wirls/sample_with_hitl.wirl").read())
+    review = next(node for node in workflow.nodes if node.name == "Review")
+    with pytest.raises(ValueError, match="hitl"):
+        NodeCache(review, CacheConfig(ttl="1h", key=[]))
+    with pytest.raises(ValueError, match="not inputs"):
+        NodeCache(review, CacheConfig(ttl="1h", key=["missing"]))
+
+
+class Exploit:
+    def __init__(self, marker):
+        self.marker = marker
+
+    def __reduce__(self):
+        return (open, (self.marker, "w"))
+
+
+def test_shared_store_does_not_unpickle_arbitrary_objects(tmp_path):
+    path = tmp_path / "cache.db"
+    store = SQLiteCacheStore(path)
+    marker = tmp_path / "marker"
+    with sqlite3.connect(path) as conn:
+        conn.execute("INSERT INTO wirl_node_cache VALUES ('key', ?, 1e12)", (b"pickle\0" + pickle.dumps(Exploit(str(marker))),))
+
+    with pytest.raises(pickle.UnpicklingError, match="not allowed"):
+        store.get("key")
+    assert not marker.exists()
+
+
+def test_inputs_without_a_stable_encoding_are_not_cached():
+    workflow = parse_wirl_text(open(WIRL_PATH).read())
+    embed = next(node for node in workflow.nodes if node.name == "Embed")
+    cache = NodeCache(embed, embed.cache)
+    store = InMemoryCacheStore()
+
+    # A lock cannot be pickled, and its repr changes with its address
+    with pytest.raises(TypeError, match="Cannot build a cache key from lock"):
+        make_cache_key("embed", {}, {"query": threading.Lock()})
+    key = cache.key({"query": threading.Lock(), "request_id": "r1"})
+    cache.save(store, key, {"embedding": "v"})
+    assert key is None
+    assert cache.lookup(store, key) is MISS
@@ -0,0 +1,118 @@
+import logging
+
+from wirl_lang import parse_wirl_to_objects
+
+from wirl_pregel_runner import compile_report, run_workflow
+from wirl_pregel_runner.pregel_graph_builder import build_pregel_graph
+from wirl_pregel_runner.pruning import prune_workflow
+
+WIRL_PATH = "tests/wirls/sample_with_unused.wirl"
+
+
+def make_fn_map():
+    calls = []
+
+    def extend(query: str, config: dict) -> dict:
+        calls.append("extend")
+        return {"extended": f"extended {query}", "debug": "x" * 1000}
+
+    def answer(extended: str, config: dict) -> dict:
+        calls.append("answer")
+        return {"text": f"answer to {extended}"}
+
+    def log(text: str, config: dict) -> dict:
+        calls.append("log")
+        return {"logged": True}
+
+    def ping(query: str, reply: str | None, config: dict) -> dict:
+        calls.append("ping")
+        return {"reply": query}
+
+    return {"extend": extend, "answer": answer, "log": log, "ping": ping}, calls
+
+
+def test_finds_dead_nodes_and_unused_outputs():
+    pruned = prune_workflow(parse_wirl_to_objects(WIRL_PATH))
+
+    assert pruned.dead_nodes == ["Ping", "Pong"]
+    # Log is kept for its side effect, but its output is not stored
+    assert pruned.unused_outputs == ["Extend.debug", "Log.logged"]
+    assert pruned.side_effect_nodes == ["Log"]
+    assert len(pruned.warnings) == 4
+
+
+def test_pruned_graph_runs_without_dead_nodes(caplog):
+    fn_map, calls = make_fn_map()
+    app = build_pregel_graph(WIRL_PATH, functions=fn_map)
+
+    assert set(app.nodes) == {"Extend", "Answer", "Log"}
+    assert "Extend.debug" not in app.channels and "Extend.extended" in app.channels
+    with caplog.at_level(logging.WARNING, logger="langgraph"):
+        result = run_workflow(WIRL_PATH, fn_map=fn_map, params={"query": "hello"}, use_app_cache=False, executor="pregel")
+
+    assert result == {"Answer.text": "answer to extended hello"}
+    assert calls == ["extend", "answer", "log"]
+    assert "unknown channel" not in caplog.text
+
+
+def test_unpruned_graph_keeps_every_output():
+    fn_map, _ = make_fn_map()
+    app = build_pregel_graph(WIRL_PATH, functions=fn_map, prune_outputs=False)
+    assert {"Ping", "Pong"} <= set(app.nodes)
+    assert "Extend.debug" in app.channels
+
+
+def test_compile_report():
+    report = compile_report(WIRL_PATH)
+
+    assert report.workflow == "SampleUnusedWorkflow"
+    assert (report.nodes, report.pregel_nodes) == (5, 3)
+    assert report.channels == report.unpruned_channels - 4
+    assert report.dead_nodes == ["Ping", "Pong"]
+    assert report.to_dict()["unused_outputs"] == ["Extend.debug", "Log.logged"]
+    assert report.side_effect_nodes == ["Log"]
+
+    unpruned = compile_report(WIRL_PATH, prune_outputs=False)
+    assert unpruned.pregel_nodes == 5 and unpruned.channels == report.unpruned_channels
+    assert unpruned.warnings == []
+
+
+def test_map_without_a_reader_of_an_output_skips_its_inner_nodes(tmp_path):
+    # Summarize no longer reads the reviews, so the Review node of the map is dead
+    path = tmp_path / "map.wirl"
+    path.write_text(open("tests/wirls/sample_with_map.wirl").read().replace("List<String> reviews = AnswerQuestions.reviews", ""))
+    reviewed = []
+    fn_map = {
+        "prepare_questions": lambda questions, config: {"prepared": questions},
+        "answer": lambda question, style, config: {"answer": question.upper(), "needs_review": True},
+        "review": lambda answer, needs_review, config: reviewed.append(answer) or {"review": "ok"},
+        "summarize": lambda answers, config: {"report": ",".join(answers)},
+    }
+
+    report = compile_report(str(path))
+    assert report.dead_nodes == ["Review"]
+    assert report.unused_outputs == ["AnswerQuestions.reviews"]
+    for executor in ("pregel", "native"):
+        result = run_workflow(str(path), fn_map=fn_map, params={"questions": ["a", "b"], "style": "short"}, use_app_cache=False, executor=executor)
+        assert result == {"Summarize.report": "A,B"}
+    assert reviewed == []
+
+
+def test_unused_output_inside_a_cycle(tmp_path):
+    # An output of an in-cycle node that nothing reads gets no channel; the cycle runs as before
+    path = tmp_path / "cycle.wirl"
+    text = open("tests/wirls/sample_with_cycle.wirl").read()
+    path.write_text(text.replace("Bool is_enough\n", "Bool is_enough\n        String note\n", 1))
+    report = compile_report(str(path))
+    assert report.unused_outputs == ["RetrieveResultsCheck.note"]
+    assert report.channels == report.unpruned_channels - 1
+
+
+def test_building_does_not_warn_about_pruning(caplog):
+    fn_map, _ = make_fn_map()
+    with caplog.at_level(logging.DEBUG, logger="wirl_pregel_runner.pregel_graph_builder"):
+        build_pregel_graph(WIRL_PATH, functions=fn_map)
+
+    notes = [record for record in caplog.records if "never read" in record.getMessage()]
+    assert notes and all(record.levelno == logging.DEBUG for record in notes)
+    assert len(compile_report(WIRL_PATH).warnings) == 4
@@ -0,0 +1,101 @@
+import json
+
+import pytest
+from langgraph.checkpoint.memory import InMemorySaver
+from wirl_lang import Reducer, TopKConfig
+
+from wirl_pregel_runner import BlobSerializer, InMemoryBlobStore, run_workflow
+from wirl_pregel_runner.channels import ReducerChannel
+
+WIRL_PATH = "tests/wirls/sample_with_reducers.wirl"
+
+PAPERS = [
+    {"title": "a", "pages": 12, "venue": "ICML"},
+    {"title": "b", "pages": 30, "venue": "NeurIPS"},
+    {"title": "c", "pages": 8, "venue": "ICML"},
+]
+
+
+def make_fn_map():
+    rounds = iter(range(100))
+
+    def score(papers: list[dict], config: dict) -> dict:
+        n = next(rounds)
+        value = [0.5, 0.9, 0.1, 0.7][n]
+        return {
+            "points": n * 10,
+            "rounds": "any value",
+            "lowest": value,
+            "highest": value,
+            "by_round": {f"round {n}": value},
+            "tags": ["even" if n % 2 == 0 else "odd", "scored"],
+            "best": [{"round": n, "score": value}],
+            "done": n == 3,
+        }
+
+    def measure(paper: dict, config: dict) -> dict:
+        return {"pages": paper["pages"], "venue": paper["venue"]}
+
+    return {"score": score, "measure": measure}
+
+
+EXPECTED = {
+    "Review.total": 60,
+    "Review.rounds": 4,
+    "Review.lowest": 0.1,
+    "Review.highest": 0.9,
+    "Review.by_round": {"round 0": 0.5, "round 1": 0.9, "round 2": 0.1, "round 3": 0.7},
+    "Review.tags": ["even", "odd", "scored"],
+    "Review.best": [{"round": 1, "score": 0.9}, {"round": 3, "score": 0.7}],
+    "Tally.pages": 50,
+    "Tally.counted": 3,
+    "Tally.longest": 30,
+    "Tally.venues": ["ICML", "NeurIPS"],
+    "Tally.top": [30],
+}
+
+
+@pytest.mark.parametrize("executor", ["pregel", "native"])
+def test_reducers_fold_cycle_iterations_and_map_items(executor):
+    result = run_workflow(WIRL_PATH, fn_map=make_fn_map(), params={"papers": PAPERS}, executor=executor)
+    assert {key: result[key] for key in EXPECTED} == EXPECTED
+
+
+def test_reducers_run_with_checkpoints():
+    saver = InMemorySaver(serde=BlobSerializer(store=InMemoryBlobStore()))
+    result = run_workflow(WIRL_PATH, fn_map=make_fn_map(), params={"papers": PAPERS}, thread_id="r1", checkpointer=saver)
+    assert {key: result[key] for key in EXPECTED} == EXPECTED
+
+
+def test_results_with_union_outputs_encode_as_json():
+    result = run_workflow(WIRL_PATH, fn_map=make_fn_map(), params={"papers": PAPERS})
+    assert json.loads(json.dumps(result))["Tally.venues"] == ["ICML", "NeurIPS"]
+
+
+def test_union_keeps_first_written_order_of_unsortable_items():
+    channel = ReducerChannel(Reducer.UNION)
+    channel.update([["b", 1], [None, "b"]])
+    assert channel.get() == ["b", 1, None]
+
+    restored = channel.from_checkpoint(channel.checkpoint())
+    restored.update([[2]])
+    assert restored.get() == ["b", 1, None, 2]
+
+
+def test_topk_keeps_only_k_items():
+    channel = ReducerChannel(Reducer.TOPK, TopKConfig(k=3))
+    for batch in ([5, 1], [9], [2, 7, 3]):
+        channel.update([batch])
+    assert channel.get() == [9, 7, 5]
+
+    restored = channel.from_checkpoint(channel.checkpoint())
+    restored.update([[6]])
+    assert restored.get() == [9, 7, 6]
+
+
+def test_min_is_empty_until_written():
+    channel = ReducerChannel(Reducer.MIN)
+    assert not channel.is_available()
+    assert channel.update([None]) is False
+    channel.update([4, 2])
+    assert channel.get() == 2
@@ -0,0 +1,132 @@
+import asyncio
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from wirl_pregel_runner import ResourcePool, arun_workflow, resources, run_workflow
+from wirl_pregel_runner.resources import parse_limits
+
+WIRL_PATH = "tests/wirls/sample_with_resources.wirl"
+
+
+class Concurrency:
+    """Highest number of calls running at once, overall and per function."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.running = Counter()
+        self.peak = Counter()
+
+    def enter(self, name: str) -> None:
+        with self.lock:
+            self.running[name] += 1
+            self.running["all"] += 1
+            for key in (name, "all"):
+                self.peak[key] = max(self.peak[key], self.running[key])
+
+    def exit(self, name: str) -> None:
+        with self.lock:
+            self.running[name] -= 1
+            self.running["all"] -= 1
+
+
+def make_fn_map(concurrency: Concurrency):
+    def ask(query: str, config: dict) -> dict:
+        concurrency.enter("ask")
+        time.sleep(0.05)
+        concurrency.exit("ask")
+        return {"answer": query}
+
+    def measure(query: str, config: dict) -> dict:
+        concurrency.enter("measure")
+        time.sleep(0.05)
+        concurrency.exit("measure")
+        return {"size": len(query)}
+
+    def join(a: str, b: str, c: str, d: str, words: int, letters: int, config: dict) -> dict:
+        return {"answer": f"{a} {b} {c} {d} {words + letters}"}
+
+    return {"ask": ask, "measure": measure, "join": join}
+
+
+def make_async_fn_map(concurrency: Concurrency):
+    async def ask(query: str, config: dict) -> dict:
+        concurrency.enter("ask")
+        await asyncio.sleep(0.05)
+        concurrency.exit("ask")
+        return {"answer": query}
+
+    fn_map = make_fn_map(concurrency)
+    fn_map["ask"] = ask
+    return fn_map
+
+
+@pytest.fixture(autouse=True)
+def pool(monkeypatch):
+    pool = ResourcePool({"llm": 1})
+    monkeypatch.setattr(resources, "_default_pool", pool)
+    return pool
+
+
+@pytest.mark.parametrize("executor", ["pregel", "native"])
+def test_resource_limits_only_tagged_nodes(executor):
+    concurrency = Concurrency()
+    result = run_workflow(WIRL_PATH, fn_map=make_fn_map(concurrency), params={"query": "hi"}, use_app_cache=False, executor=executor)
+
+    assert result["Join.answer"] == "hi hi hi hi 4"
+    assert concurrency.peak["ask"] == 1
+    # The untagged nodes still run next to the model calls
+    assert concurrency.peak["all"] >= 2
+
+
+@pytest.mark.parametrize("executor", ["pregel", "native"])
+def test_resource_limits_async_functions(executor, pool):
+    pool.configure({"llm": 2})
+    concurrency = Concurrency()
+    result = asyncio.run(arun_workflow(WIRL_PATH, fn_map=make_async_fn_map(concurrency), params={"query": "hi"}, use_app_cache=False, executor=executor))
+
+    assert result["Join.answer"] == "hi hi hi hi 4"
+    assert concurrency.peak["ask"] == 2
+
+
+@pytest.mark.parametrize("executor", ["pregel", "native"])
+def test_workflow_max_concurrency(executor, pool, tmp_path):
+    pool.configure({"llm": 10})
+    path = tmp_path / "limited.wirl"
+    path.write_text(open(WIRL_PATH).read().replace('version: "1.0"', 'version: "1.0"\n    max_concurrency: "2"'))
+    concurrency = Concurrency()
+    result = run_workflow(str(path), fn_map=make_fn_map(concurrency), params={"query": "hi"}, use_app_cache=False, executor=executor)
+
+    assert result["Join.answer"] == "hi hi hi hi 4"
+    assert concurrency.peak["all"] == 2
+
+
+def test_async_waiters_do_not_block_executor_threads(pool):
+    async def main():
+        loop = asyncio.get_running_loop()
+        loop.set_default_executor(ThreadPoolExecutor(max_workers=1))
+
+        async def wait_for_slot():
+            async with pool.ahold("llm"):
+                pass
+
+        with pool.hold("llm"):
+            waiters = [asyncio.create_task(wait_for_slot()) for _ in range(3)]
+            await asyncio.sleep(0.05)
+            # Sync nodes under ``ainvoke`` still get the executor's only thread
+            assert await asyncio.wait_for(asyncio.to_thread(lambda: "ran"), 1) == "ran"
+            assert not any(waiter.done() for waiter in waiters)
+        await asyncio.wait_for(asyncio.gather(*waiters), 1)
+
+    asyncio.run(main())
+
+
+def test_invalid_limits():
+    assert parse_limits("ollama=1, openai=8") == {"ollama": 1, "openai": 8}
+    with pytest.raises(ValueError, match="name=limit"):
+        parse_limits("ollama")
+    with pytest.raises(ValueError, match="at least 1"):
+        ResourcePool({"ollama": 0})
@@ -0,0 +1,80 @@
+import pytest
+
+from wirl_pregel_runner import retry, run_workflow
+from wirl_pregel_runner.retry import NodeRetryPolicy, RetryAttempt
+
+WIRL_PATH = "tests/wirls/sample_with_retry.wirl"
+
+
+@pytest.fixture(autouse=True)
+def fast_backoff(monkeypatch):
+    monkeypatch.setattr(retry, "INITIAL_INTERVAL", 0.01)
+
+
+@pytest.fixture
+def attempts():
+    recorded: list[RetryAttempt] = []
+    retry.add_retry_listener(recorded.append)
+    yield recorded
+    retry.remove_retry_listener(recorded.append)
+
+
+def make_fn_map(failures: list[Exception]):
+    calls = {"query_extender": 0, "final_answer": 0}
+
+    def query_extender(query: str, config: dict) -> dict:
+        calls["query_extender"] += 1
+        return {"extended_query": f"extended {query}"}
+
+    def final_answer(extended_query: str, config: dict) -> dict:
+        calls["final_answer"] += 1
+        if failures:
+            raise failures.pop(0)
+        return {"final_answer": f"answer to {extended_query}"}
+
+    return {"query_extender": query_extender, "final_answer": final_answer}, calls
+
+
+def test_only_the_failing_node_is_retried(attempts):
+    fn_map, calls = make_fn_map([ConnectionError("reset"), TimeoutError("slow")])
+    result = run_workflow(WIRL_PATH, fn_map=fn_map, params={"query": "hello"}, use_app_cache=False)
+    assert result.get("FinalAnswer.final_answer") == "answer to extended hello"
+    assert calls == {"query_extender": 1, "final_answer": 3}
+    assert [(a.node, a.attempt) for a in attempts] == [("FinalAnswer", 1), ("FinalAnswer", 2)]
+    assert all(a.latency >= 0 and a.delay > 0 for a in attempts)
+
+
+def test_gives_up_after_max_attempts(attempts):
+    fn_map, calls = make_fn_map([ConnectionError("1"), ConnectionError("2"), ConnectionError("3")])
+    with pytest.raises(RuntimeError, match="3"):
+        run_workflow(WIRL_PATH, fn_map=fn_map, params={"query": "hello"}, use_app_cache=False)
+    assert calls["final_answer"] == 3
+    assert len(attempts) == 2
+
+
+def test_non_matching_errors_are_not_retried(attempts):
+    fn_map, calls = make_fn_map([ValueError("bad input")])
+    with pytest.raises(RuntimeError, match="bad input"):
+        run_workflow(WIRL_PATH, fn_map=fn_map, params={"query": "hello"}, use_app_cache=False)
+    assert calls["final_answer"] == 1
+    assert attempts == []
+
+
+def test_backoff_schedules():
+    exponential = NodeRetryPolicy(attempts=5, backoff="exponential", initial_interval=1.0, max_interval=5.0, jitter=0)
+    linear = NodeRetryPolicy(attempts=5, backoff="linear", initial_interval=1.0, jitter=0)
+    assert [exponential.delay(a) for a in range(1, 5)] == [1.0, 2.0, 4.0, 5.0]
+    assert [linear.delay(a) for a in range(1, 5)] == [1.0, 2.0, 3.0, 4.0]
+    assert 0.75 <= NodeRetryPolicy(attempts=2, initial_interval=1.0).delay(1) <= 1.25
+
+
+def test_policy_matches_exception_class_names():
+    class RateLimitError(Exception):
+        pass
+
+    policy = NodeRetryPolicy(attempts=2, exceptions=frozenset({"RateLimitError"}))
+    assert policy.should_retry(RateLimitError())
+    assert not policy.should_retry(ValueError())
+    wrapped = RuntimeError("wrapped")
+    wrapped.__cause__ = RateLimitError()
+    assert policy.should_retry(wrapped)
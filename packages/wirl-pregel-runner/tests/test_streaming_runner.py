@@ -0,0 +1,89 @@
+import asyncio
+import json
+
+from langgraph.checkpoint.memory import InMemorySaver
+
+from wirl_pregel_runner import NodeUpdate, WorkflowResult, astream_workflow, run_workflow, stream_workflow
+
+WIRL_PATH = "tests/wirls/sample.wirl"
+HITL_WIRL_PATH = "tests/wirls/sample_with_hitl.wirl"
+
+
+def query_extender(query: str, config: dict) -> dict:
+    return {"extended_query": f"extended {query}"}
+
+
+def retrieve_from_web(extended_query: str, config: dict) -> dict:
+    return {"chunks": [f"chunk for {extended_query}"], "need_filtering": False}
+
+
+def filter_chunks(query: str, need_filtering: bool, chunks: list[str], config: dict) -> dict:
+    return {"filtered_chunks": chunks}
+
+
+def final_answer_generation(query: str, extended_query: str, need_filtering: bool, chunks: list[str], filtered_chunks_summary: str, config: dict) -> dict:
+    return {"final_answer": f"answer from {chunks[0]}"}
+
+
+FN_MAP = {
+    "query_extender": query_extender,
+    "retrieve_from_web": retrieve_from_web,
+    "filter_chunks": filter_chunks,
+    "final_answer_generation": final_answer_generation,
+}
+
+
+def draft_answer(query: str, config: dict) -> dict:
+    return {"draft": f"draft for {query}"}
+
+
+def review(draft: str, config: dict) -> dict:
+    return {}
+
+
+def final_answer(draft: str, comments: dict, config: dict) -> dict:
+    return {"final_answer": f"{draft} / {comments['answer']}"}
+
+
+HITL_FN_MAP = {
+    "draft_answer": draft_answer,
+    "review": review,
+    "final_answer": final_answer,
+}
+
+
+def test_stream_yields_node_updates_then_result():
+    events = list(stream_workflow(WIRL_PATH, fn_map=FN_MAP, params={"query": "hello"}, thread_id="s1"))
+    updates, result = events[:-1], events[-1]
+
+    assert all(isinstance(update, NodeUpdate) for update in updates)
+    # Activations that were not ready are not reported
+    assert [(update.node, update.step) for update in updates] == [("QueryExtender", 0), ("Retrieve", 1), ("FinalAnswer", 2)]
+    assert updates[0].outputs == {"QueryExtender.extended_query": "extended hello"}
+    assert all(update.duration >= 0 and update.finished_at >= update.started_at for update in updates)
+
+    assert isinstance(result, WorkflowResult)
+    assert result.steps == 3
+    assert not result.interrupted
+    assert result.values == run_workflow(WIRL_PATH, fn_map=FN_MAP, params={"query": "hello"}, thread_id="s2")
+
+
+def test_stream_reports_interrupts_and_resumes():
+    saver = InMemorySaver()
+    events = list(stream_workflow(HITL_WIRL_PATH, fn_map=HITL_FN_MAP, params={"query": "hello"}, thread_id="s3", checkpointer=saver))
+    assert [update.node for update in events[:-1]] == ["DraftAnswer", "Review"]
+    assert events[-2].interrupts
+    assert events[-1].interrupted
+
+    events = list(stream_workflow(HITL_WIRL_PATH, fn_map=HITL_FN_MAP, thread_id="s3", resume=json.dumps({"answer": "ok"}), checkpointer=saver))
+    assert events[-2].node == "FinalAnswer"
+    assert events[-1].values["FinalAnswer.final_answer"] == "draft for hello / ok"
+
+
+def test_astream_matches_stream():
+    async def collect():
+        return [event async for event in astream_workflow(WIRL_PATH, fn_map=FN_MAP, params={"query": "hello"}, thread_id="s4")]
+
+    events = asyncio.run(collect())
+    assert [update.node for update in events[:-1]] == ["QueryExtender", "Retrieve", "FinalAnswer"]
+    assert events[-1].values["FinalAnswer.final_answer"] == "answer from chunk for extended hello"
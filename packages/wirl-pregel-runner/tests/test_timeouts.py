@@ -0,0 +1,95 @@
+import asyncio
+import time
+
+import pytest
+
+from wirl_pregel_runner import arun_workflow, run_workflow, time_left
+
+WIRL_PATH = "tests/wirls/sample_with_timeout.wirl"
+
+
+def make_fn_map(delays: list[float]):
+    calls = {"final_answer": 0}
+    seen = {}
+
+    def query_extender(query: str, config: dict) -> dict:
+        seen["deadline"] = config.get("deadline")
+        return {"extended_query": f"extended {query}"}
+
+    def final_answer(extended_query: str, config: dict) -> dict:
+        calls["final_answer"] += 1
+        seen["time_left"] = time_left(config)
+        time.sleep(delays.pop(0) if delays else 0)
+        return {"final_answer": f"answer to {extended_query}"}
+
+    return {"query_extender": query_extender, "final_answer": final_answer}, calls, seen
+
+
+@pytest.mark.parametrize("executor", ["pregel", "native"])
+def test_stalled_attempt_times_out_and_is_retried(executor):
+    fn_map, calls, _ = make_fn_map([5])
+    started = time.perf_counter()
+    result = run_workflow(WIRL_PATH, fn_map=fn_map, params={"query": "hello"}, use_app_cache=False, executor=executor)
+
+    assert result["FinalAnswer.final_answer"] == "answer to extended hello"
+    assert calls["final_answer"] == 2
+    assert time.perf_counter() - started < 3
+
+
+def test_node_fails_after_its_last_timeout():
+    fn_map, calls, _ = make_fn_map([5, 5])
+    started = time.perf_counter()
+    with pytest.raises(RuntimeError, match="FinalAnswer timed out after 1s"):
+        run_workflow(WIRL_PATH, fn_map=fn_map, params={"query": "hello"}, use_app_cache=False)
+    assert calls["final_answer"] == 2
+    assert time.perf_counter() - started < 4
+
+
+@pytest.mark.parametrize("executor", ["pregel", "native"])
+def test_nodes_see_the_deadline(executor):
+    fn_map, _, seen = make_fn_map([])
+    deadline = time.time() + 60
+    run_workflow(WIRL_PATH, fn_map=fn_map, params={"query": "hello"}, use_app_cache=False, executor=executor, deadline=deadline)
+
+    assert seen["deadline"] == deadline
+    assert 0 < seen["time_left"] <= 60
+
+
+def test_deadline_cuts_a_call_short_and_is_not_retried():
+    fn_map, calls, _ = make_fn_map([0.5])
+    with pytest.raises(RuntimeError, match="Deadline passed while FinalAnswer was running"):
+        run_workflow(WIRL_PATH, fn_map=fn_map, params={"query": "hello"}, use_app_cache=False, deadline=time.time() + 0.2)
+    assert calls["final_answer"] == 1
+
+
+def test_passed_deadline_fails_before_calling():
+    fn_map, calls, seen = make_fn_map([])
+    with pytest.raises(RuntimeError, match="Deadline passed before QueryExtender started"):
+        run_workflow(WIRL_PATH, fn_map=fn_map, params={"query": "hello"}, use_app_cache=False, deadline=time.time() - 1)
+    assert seen == {} and calls["final_answer"] == 0
+
+
+def test_async_function_is_cancelled_on_timeout():
+    cancelled = []
+
+    async def final_answer(extended_query: str, config: dict) -> dict:
+        try:
+            await asyncio.sleep(5)
+        except asyncio.CancelledError:
+            cancelled.append(True)
+            raise
+        return {"final_answer": extended_query}
+
+    fn_map = {"query_extender": lambda query, config: {"extended_query": query}, "final_answer": final_answer}
+    with pytest.raises(RuntimeError, match="timed out after 1s"):
+        asyncio.run(arun_workflow(WIRL_PATH, fn_map=fn_map, params={"query": "hello"}, use_app_cache=False, executor="pregel"))
+    assert cancelled == [True, True]
+
+
+def test_timeout_error_raised_by_the_function_is_its_own():
+    async def final_answer(extended_query: str, config: dict) -> dict:
+        raise TimeoutError("upstream")
+
+    fn_map = {"query_extender": lambda query, config: {"extended_query": query}, "final_answer": final_answer}
+    with pytest.raises(RuntimeError, match="upstream"):
+        asyncio.run(arun_workflow(WIRL_PATH, fn_map=fn_map, params={"query": "hello"}, use_app_cache=False))
@@ -0,0 +1,78 @@
+from collections import Counter
+
+from wirl_pregel_runner.pregel_graph_builder import build_pregel_graph
+
+CYCLE_WIRL_PATH = "tests/wirls/sample_with_cycle.wirl"
+WIRL_PATH = "tests/wirls/sample.wirl"
+
+
+def query_extender(query: str, add_query_aspect: str, config: dict) -> dict:
+    return {"extended_query": f"{query} {add_query_aspect or ''}".strip()}
+
+
+def retrieve_from_web(extended_query: str, config: dict) -> dict:
+    return {"chunks": [f"chunk for {extended_query}"], "need_filtering": False}
+
+
+def retrieve_results_check(chunks: list[str], config: dict) -> dict:
+    return {"is_enough": len(chunks) >= 3, "next_query_aspect": f"aspect {len(chunks)}"}
+
+
+def filter_chunks(query: str, need_filtering: bool, chunks: list[str], config: dict) -> dict:
+    return {"filtered_chunks": chunks}
+
+
+def final_answer_generation(query: str, need_filtering: bool, filtered_chunks: list[str], retrieved_chunks: list[str], filtered_chunks_summary: str, config: dict) -> dict:
+    return {"final_answer": " | ".join(retrieved_chunks)}
+
+
+FN_MAP = {
+    "query_extender": query_extender,
+    "retrieve_from_web": retrieve_from_web,
+    "retrieve_results_check": retrieve_results_check,
+    "filter_chunks": filter_chunks,
+    "final_answer_generation": final_answer_generation,
+}
+
+
+def run(app):
+    activations = Counter()
+    result = None
+    config = {"configurable": {"thread_id": "t"}}
+    for mode, payload in app.stream({"query": "hello"}, config, stream_mode=["debug", "values"], output_keys=app.output_channels):
+        if mode == "values":
+            result = payload
+        elif payload["type"] == "task":
+            activations[payload["payload"]["name"]] += 1
+    return result, activations
+
+
+def test_pruned_triggers_give_the_same_result_with_fewer_activations():
+    result, activations = run(build_pregel_graph(CYCLE_WIRL_PATH, functions=FN_MAP))
+    legacy_result, legacy_activations = run(build_pregel_graph(CYCLE_WIRL_PATH, functions=FN_MAP, prune_triggers=False))
+
+    assert result == legacy_result
+    assert result["FinalAnswer.final_answer"] == "chunk for hello | chunk for hello aspect 1 | chunk for hello aspect 2"
+    assert sum(activations.values()) < sum(legacy_activations.values())
+    # Clearing the loop body at each iteration no longer wakes Retrieve and RetrieveResultsCheck
+    assert activations["Retrieve"] == activations["RetrieveResultsCheck"] == 3
+
+
+def test_node_is_woken_only_by_its_last_required_producer():
+    app = build_pregel_graph(WIRL_PATH, functions=FN_MAP | {"final_answer_generation": lambda **kwargs: {}})
+    # query is a workflow input and QueryExtender always runs before Retrieve
+    assert app.nodes["FinalAnswer"].triggers == [
+        "Retrieve.need_filtering",
+        "FilterChunks.filtered_chunks",
+        "Retrieve.chunks",
+        "FilterChunks.filtered_chunks_summary",
+    ]
+    assert app.nodes["QueryExtender"].triggers == ["query"]
+
+
+def test_cycle_body_is_triggered_by_signal_channels():
+    app = build_pregel_graph(CYCLE_WIRL_PATH, functions=FN_MAP)
+    assert app.nodes["Retrieve"].triggers == ["QueryExtender.__written__"]
+    assert app.nodes["RetrieveLoop_cycle_guard"].triggers == ["RetrieveResultsCheck.__written__"]
+    # Data channels are still read
+    assert app.nodes["Retrieve"].channels == ["QueryExtender.extended_query"]
@@ -1,5 +1,47 @@
-from wirl_pregel_runner.pregel_runner import run_workflow  # noqa: F401
+from wirl_pregel_runner.app_cache import PregelAppCache, app_cache, get_native_workflow, get_pregel_app  # noqa: F401
+from wirl_pregel_runner.blobs import BlobSerializer, FileBlobStore, InMemoryBlobStore, ValueCodec  # noqa: F401
+from wirl_pregel_runner.cancellation import CancelToken, RunCancelledError  # noqa: F401
+from wirl_pregel_runner.compile_report import CompileReport, compile_report  # noqa: F401
+from wirl_pregel_runner.node_cache import (  # noqa: F401
+    InMemoryCacheStore,
+    PostgresCacheStore,
+    SQLiteCacheStore,
+    cache_stats,
+    set_cache_store,
+)
+from wirl_pregel_runner.pregel_runner import arun_workflow, astream_workflow, run_workflow, stream_workflow  # noqa: F401
+from wirl_pregel_runner.resources import ResourcePool, get_resource_pool, set_resource_limits  # noqa: F401
+from wirl_pregel_runner.streaming import NodeUpdate, WorkflowResult  # noqa: F401
+from wirl_pregel_runner.timeouts import DeadlineExceededError, NodeTimeoutError, time_left  # noqa: F401
 
 __all__ = [
     "run_workflow",
+    "arun_workflow",
+    "stream_workflow",
+    "astream_workflow",
+    "NodeUpdate",
+    "WorkflowResult",
+    "get_pregel_app",
+    "get_native_workflow",
+    "app_cache",
+    "PregelAppCache",
+    "cache_stats",
+    "set_cache_store",
+    "InMemoryCacheStore",
+    "SQLiteCacheStore",
+    "PostgresCacheStore",
+    "BlobSerializer",
+    "FileBlobStore",
+    "InMemoryBlobStore",
+    "ValueCodec",
+    "ResourcePool",
+    "get_resource_pool",
+    "set_resource_limits",
+    "NodeTimeoutError",
+    "DeadlineExceededError",
+    "time_left",
+    "CompileReport",
+    "compile_report",
+    "CancelToken",
+    "RunCancelledError",
 ]
@@ -0,0 +1,107 @@
+from __future__ import annotations
+
+import hashlib
+import logging
+import os
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Callable, Dict, Hashable, Tuple
+
+from langgraph.pregel import Pregel
+
+from wirl_pregel_runner.native_executor import NativeWorkflow, build_native_workflow
+from wirl_pregel_runner.pregel_graph_builder import build_pregel_graph
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_APP_CACHE_SIZE = int(os.getenv("WIRL_APP_CACHE_SIZE", 32))
+
+
+def fn_map_identity(fn_map: Dict[str, Any]) -> Tuple[Tuple[str, int], ...]:
+    """Identity of the callables in a function map.
+
+    Callers such as the worker build a fresh dict for every job from the same module,
+    so the key is made of the function objects rather than of the dict itself.
+    """
+    return tuple(sorted((name, id(fn)) for name, fn in fn_map.items() if callable(fn)))
+
+
+class PregelAppCache:
+    """Process-wide LRU cache of built Pregel apps.
+
+    Apps are keyed by workflow path, a hash of the file content and the identity of
+    the function map. They are built without a checkpointer: the checkpointer belongs
+    to a single job and is attached per invocation with ``Pregel.copy``. ``builder``
+    replaces ``build_pregel_graph``, e.g. to cache workflows compiled for the native executor.
+    """
+
+    def __init__(self, maxsize: int = DEFAULT_APP_CACHE_SIZE, builder: Callable[..., Any] = build_pregel_graph):
+        self.maxsize = maxsize
+        self.builder = builder
+        self.hits = 0
+        self.misses = 0
+        self._apps: OrderedDict[Hashable, Tuple[Any, Dict[str, Any]]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._apps)
+
+    def _key(self, workflow_path: str, fn_map: Dict[str, Any]) -> Hashable:
+        path = Path(workflow_path).resolve()
+        content_hash = hashlib.sha256(path.read_bytes()).hexdigest()
+        return (str(path), content_hash, fn_map_identity(fn_map))
+
+    def get(self, workflow_path: str, fn_map: Dict[str, Any]) -> Any:
+        if self.maxsize <= 0:
+            return self.builder(workflow_path, functions=fn_map)
+
+        key = self._key(workflow_path, fn_map)
+        with self._lock:
+            entry = self._apps.get(key)
+            if entry is not None:
+                self._apps.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+            self.misses += 1
+
+        # Build outside the lock; concurrent misses for the same key just build twice
+        app = self.builder(workflow_path, functions=fn_map)
+        with self._lock:
+            # Keep the function map alive with the app so the ids in the key cannot be reused
+            self._apps[key] = (app, dict(fn_map))
+            self._apps.move_to_end(key)
+            while len(self._apps) > self.maxsize:
+                evicted, _ = self._apps.popitem(last=False)
+                logger.debug(f"Evicted Pregel app for {evicted[0]} from cache")
+        return app
+
+    def resize(self, maxsize: int) -> None:
+        with self._lock:
+            self.maxsize = maxsize
+            while len(self._apps) > max(maxsize, 0):
+                self._apps.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._apps.clear()
+            self.hits = 0
+            self.misses = 0
+
+
+app_cache = PregelAppCache()
+# Same cache for the native executor; holds ``None`` for workflows that need Pregel
+native_cache = PregelAppCache(builder=build_native_workflow)
+
+
+def get_pregel_app(workflow_path: str, fn_map: Dict[str, Any], checkpointer: Any | None = None) -> Pregel:
+    """Return a cached app for the workflow, bound to ``checkpointer`` for this invocation only."""
+    app = app_cache.get(workflow_path, fn_map)
+    if checkpointer is not None:
+        app = app.copy({"checkpointer": checkpointer})
+    return app
+
+
+def get_native_workflow(workflow_path: str, fn_map: Dict[str, Any]) -> NativeWorkflow | None:
+    """Return the cached native executor for the workflow, or ``None`` if it needs Pregel."""
+    return native_cache.get(workflow_path, fn_map)
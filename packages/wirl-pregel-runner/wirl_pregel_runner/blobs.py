@@ -0,0 +1,363 @@
+from __future__ import annotations
+
+import hashlib
+import io
+import logging
+import mmap
+import os
+import pickle
+import shutil
+import tempfile
+import threading
+import types
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, Protocol
+
+from langgraph.checkpoint.serde.base import SerializerProtocol
+from langgraph.checkpoint.serde.jsonplus import JsonPlusSerializer
+from langgraph.types import Command, Interrupt, Send
+
+from wirl_pregel_runner.channels import AppendLog
+
+logger = logging.getLogger(__name__)
+
+BLOB_DIR_ENV = "WIRL_BLOB_DIR"
+BLOB_THRESHOLD_ENV = "WIRL_BLOB_THRESHOLD"
+DEFAULT_BLOB_THRESHOLD = 64 * 1024
+# Comma-separated top-level modules whose objects may be pickled into the store, e.g. "PIL"
+BLOB_PICKLE_MODULES_ENV = "WIRL_BLOB_PICKLE_MODULES"
+
+# Serialization type recorded in checkpoints for values that live in the blob store
+BLOB_TYPE = "wirl_blob"
+# Serialization type of (append) channel values: keys of their chunks in the store, and the tail
+APPEND_TYPE = "wirl_append"
+# Encoding of a blob holding a pickle (only objects of the allowed modules)
+PICKLE_TYPE = "pickle"
+
+# Globals a pickle may use besides the classes of the allowed modules
+_SAFE_GLOBALS = frozenset(
+    [("copyreg", "__newobj__"), ("copyreg", "__newobj_ex__"), ("copyreg", "_reconstructor")]
+    + [("builtins", name) for name in ("object", "bool", "int", "float", "complex", "str", "bytes", "bytearray", "list", "tuple", "dict", "set", "frozenset", "slice", "range")]
+)
+
+
+class BlobStore(Protocol):
+    def put(self, data: bytes) -> str: ...
+
+    def get(self, key: str) -> Any: ...
+
+
+def blob_key(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+class InMemoryBlobStore:
+    """Process-local store, mainly for tests."""
+
+    def __init__(self):
+        self._blobs: Dict[str, bytes] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._blobs)
+
+    def put(self, data: bytes) -> str:
+        key = blob_key(data)
+        with self._lock:
+            self._blobs.setdefault(key, data)
+        return key
+
+    def get(self, key: str) -> bytes:
+        return self._blobs[key]
+
+
+class FileBlobStore:
+    """Content-addressed files under ``directory``, read back through ``mmap``.
+
+    Blobs are written once, atomically, and never modified, so concurrent writers of the
+    same content are harmless. Every worker that may resume a thread must see the same
+    directory. Nothing is deleted until ``clear``: give each thread its own directory to
+    drop its blobs once the thread is done.
+    """
+
+    def __init__(self, directory: str | Path):
+        self.directory = Path(directory).expanduser()
+
+    def _path(self, key: str) -> Path:
+        return self.directory / key[:2] / key
+
+    def put(self, data: bytes) -> str:
+        key = blob_key(data)
+        path = self._path(key)
+        if path.exists():
+            return key
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=path.parent, prefix=".tmp-")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+        return key
+
+    def get(self, key: str) -> mmap.mmap:
+        with open(self._path(key), "rb") as f:
+            return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def clear(self) -> None:
+        """Delete every blob of the store, and its directory."""
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+
+_MISSING = object()
+
+
+class BlobRef:
+    """Checkpointed reference to a blob; the value is decoded by ``loads`` on first ``load``."""
+
+    __slots__ = ("key", "store", "loads", "_value", "_lock")
+
+    def __init__(self, key: str, store: BlobStore, loads: Callable[[Any], Any]):
+        self.key = key
+        self.store = store
+        self.loads = loads
+        self._value: Any = _MISSING
+        self._lock = threading.Lock()
+
+    def load(self) -> Any:
+        with self._lock:
+            if self._value is _MISSING:
+                data = self.store.get(self.key)
+                try:
+                    self._value = self.loads(data)
+                finally:
+                    if isinstance(data, mmap.mmap):
+                        data.close()
+            return self._value
+
+    # (append) channels add new items to the restored value
+    def __add__(self, other: Any) -> Any:
+        return self.load() + other
+
+    def __radd__(self, other: Any) -> Any:
+        return other + self.load()
+
+    def __reduce__(self):
+        # Pickling a reference (e.g. into the node cache) stores the value itself
+        return (_identity, (self.load(),))
+
+    def __repr__(self) -> str:
+        return f"BlobRef({self.key[:12]})"
+
+
+def _identity(value: Any) -> Any:
+    return value
+
+
+def resolve_blob(value: Any) -> Any:
+    return value.load() if isinstance(value, BlobRef) else value
+
+
+def resolve_blobs(values: Dict[str, Any], keys: Iterable[str] | None = None) -> Dict[str, Any]:
+    """Load the blobs among ``values`` (only ``keys`` if given); other values are unchanged."""
+    keys = values.keys() if keys is None else keys
+    refs = [key for key in keys if isinstance(values.get(key), BlobRef)]
+    if not refs:
+        return values
+    resolved = dict(values)
+    for key in refs:
+        resolved[key] = values[key].load()
+    return resolved
+
+
+_default_store: BlobStore | None = None
+_default_store_lock = threading.Lock()
+
+
+def blob_root() -> Path:
+    """``WIRL_BLOB_DIR``, or ``~/.cache/wirl/blobs``, which only this host sees."""
+    return Path(os.getenv(BLOB_DIR_ENV) or Path.home() / ".cache" / "wirl" / "blobs").expanduser()
+
+
+def get_blob_store() -> BlobStore:
+    """Process-wide store under ``blob_root()``."""
+    global _default_store
+    with _default_store_lock:
+        if _default_store is None:
+            _default_store = FileBlobStore(blob_root())
+        return _default_store
+
+
+def thread_blob_store(thread_id: str, root: str | Path | None = None) -> FileBlobStore:
+    """Store of one thread's blobs, in its own directory under ``root`` (``blob_root()`` by default).
+
+    Whoever reads the thread's checkpoints must use the same store, e.g.
+    ``BlobSerializer(thread_blob_store(thread_id))``.
+    """
+    return FileBlobStore((Path(root) if root is not None else blob_root()) / thread_id)
+
+
+def checkpoint_value(value: Any) -> Any:
+    """A value read from a checkpoint as plain data: its blob loaded, an ``(append)`` log as a list."""
+    if isinstance(value, AppendLog):
+        return value.to_list()
+    return resolve_blob(value)
+
+
+_CONTROL_TYPES = (Command, Interrupt, Send)
+
+
+def _is_control(obj: Any) -> bool:
+    """Interrupts, sends and commands are read back by Pregel itself and stay inline."""
+    if isinstance(obj, (list, tuple)):
+        return any(isinstance(item, _CONTROL_TYPES) for item in obj)
+    return isinstance(obj, _CONTROL_TYPES)
+
+
+def _global_allowed(module: str, name: str, modules: frozenset[str]) -> bool:
+    return module.split(".", 1)[0] in modules or (module, name) in _SAFE_GLOBALS
+
+
+class _AllowListPickler(pickle.Pickler):
+    """Refuses objects whose class (or that are classes and functions) is outside ``modules``."""
+
+    def __init__(self, file: Any, modules: frozenset[str]):
+        super().__init__(file, protocol=pickle.HIGHEST_PROTOCOL)
+        self.modules = modules
+
+    def reducer_override(self, obj: Any) -> Any:
+        target = obj if isinstance(obj, (type, types.FunctionType, types.BuiltinFunctionType)) else type(obj)
+        module, name = getattr(target, "__module__", None) or "builtins", getattr(target, "__qualname__", "")
+        if not _global_allowed(module, name, self.modules):
+            raise pickle.PicklingError(f"{module}.{name} is not in an allowed module")
+        return NotImplemented
+
+
+class _AllowListUnpickler(pickle.Unpickler):
+    """Only resolves the classes of ``modules`` and a few builtins, so a blob cannot call arbitrary code."""
+
+    def __init__(self, file: Any, modules: frozenset[str]):
+        super().__init__(file)
+        self.modules = modules
+
+    def find_class(self, module: str, name: str) -> Any:
+        if (module, name) in _SAFE_GLOBALS:
+            return super().find_class(module, name)
+        if _global_allowed(module, name, self.modules):
+            found = super().find_class(module, name)
+            if isinstance(found, type):
+                return found
+        raise pickle.UnpicklingError(f"{module}.{name} is not allowed in a blob (see {BLOB_PICKLE_MODULES_ENV})")
+
+
+class ValueCodec:
+    """Encodes values with ``serde``, or with a pickle restricted to ``pickle_modules``.
+
+    ``serde`` cannot encode every object (e.g. PIL images). Those are pickled only if their
+    classes come from one of ``pickle_modules`` (``WIRL_BLOB_PICKLE_MODULES`` by default),
+    and are unpickled with the same allow-list, so stored bytes cannot run arbitrary code.
+    """
+
+    def __init__(self, serde: SerializerProtocol | None = None, pickle_modules: Iterable[str] | None = None):
+        self.serde = serde if serde is not None else JsonPlusSerializer()
+        if pickle_modules is None:
+            pickle_modules = os.getenv(BLOB_PICKLE_MODULES_ENV, "").split(",")
+        self.pickle_modules = frozenset(module.strip() for module in pickle_modules if module.strip())
+
+    def encode(self, obj: Any) -> tuple[str, bytes]:
+        try:
+            return self.serde.dumps_typed(obj)
+        except Exception as e:
+            buffer = io.BytesIO()
+            try:
+                _AllowListPickler(buffer, self.pickle_modules).dump(obj)
+            except pickle.PicklingError as pickling_error:
+                raise TypeError(f"Cannot serialize {type(obj).__name__}: {e}; pickling it is not allowed ({pickling_error}, see {BLOB_PICKLE_MODULES_ENV})") from e
+            return PICKLE_TYPE, buffer.getvalue()
+
+    def dumps(self, obj: Any) -> bytes:
+        return _pack(*self.encode(obj))
+
+    def loads(self, data: Any) -> Any:
+        type_, payload = _unpack(data)
+        if type_ == PICKLE_TYPE:
+            return _AllowListUnpickler(io.BytesIO(payload), self.pickle_modules).load()
+        return self.serde.loads_typed((type_, payload))
+
+
+def _pack(type_: str, data: bytes) -> bytes:
+    return type_.encode() + b"\0" + data
+
+
+def _unpack(data: Any) -> tuple[str, bytes]:
+    type_, _, payload = bytes(data).partition(b"\0")
+    return type_.decode(), payload
+
+
+class BlobSerializer(SerializerProtocol):
+    """Checkpoint serializer that moves large channel values to a blob store.
+
+    Values whose encoding by ``serde`` is above ``threshold`` bytes are written to the store
+    in that encoding, and the checkpoint keeps only the content hash. Loading a checkpoint
+    yields ``BlobRef`` objects that the runner loads when a node reads the channel, and that
+    are written back as the same reference.
+
+    Objects ``serde`` cannot encode are pickled into the store as ``ValueCodec`` allows;
+    any other one fails as it would without this serializer.
+
+    The sealed chunks of ``(append)`` channel values (``AppendLog``) always go to the store,
+    once each, so every checkpoint adds only the items appended since the last sealed chunk.
+    """
+
+    def __init__(
+        self,
+        store: BlobStore | None = None,
+        threshold: int | None = None,
+        serde: SerializerProtocol | None = None,
+        pickle_modules: Iterable[str] | None = None,
+    ):
+        self.store = store if store is not None else get_blob_store()
+        self.threshold = int(os.getenv(BLOB_THRESHOLD_ENV, DEFAULT_BLOB_THRESHOLD)) if threshold is None else threshold
+        self.codec = ValueCodec(serde, pickle_modules)
+        self.serde = self.codec.serde
+
+    def dumps_typed(self, obj: Any) -> tuple[str, bytes]:
+        if isinstance(obj, BlobRef):
+            return BLOB_TYPE, obj.key.encode()
+        if isinstance(obj, AppendLog):
+            return APPEND_TYPE, self._dump_append(obj)
+        type_, data = self.codec.encode(obj)
+        if type_ != PICKLE_TYPE and (len(data) <= self.threshold or _is_control(obj)):
+            return type_, data
+        return BLOB_TYPE, self.store.put(_pack(type_, data)).encode()
+
+    def loads_typed(self, data: tuple[str, bytes]) -> Any:
+        type_, payload = data
+        if type_ == BLOB_TYPE:
+            return BlobRef(bytes(payload).decode(), self.store, self.codec.loads)
+        if type_ == APPEND_TYPE:
+            return self._load_append(payload)
+        return self.serde.loads_typed(data)
+
+    def _dump_append(self, log: AppendLog) -> bytes:
+        keys = []
+        for index, chunk in enumerate(log.chunks):
+            if isinstance(chunk, BlobRef) and chunk.store is self.store:
+                keys.append(chunk.key)
+                continue
+            # Chunks are shared by every later value of the channel, so each is stored once
+            stored = log.stored.get(index)
+            if stored is None or stored[0] is not chunk or stored[1] is not self.store:
+                items = list(chunk) if isinstance(chunk, tuple) else list(chunk.load())
+                stored = (chunk, self.store, self.store.put(self.codec.dumps(items)))
+                log.stored[index] = stored
+            keys.append(stored[2])
+        tail_type, tail = self.dumps_typed(list(log.tail))
+        return _pack(*self.serde.dumps_typed({"chunks": keys, "tail_type": tail_type, "tail": tail}))
+
+    def _load_append(self, payload: bytes) -> AppendLog:
+        fields = self.serde.loads_typed(_unpack(payload))
+        tail = resolve_blob(self.loads_typed((fields["tail_type"], fields["tail"])))
+        return AppendLog(tuple(BlobRef(key, self.store, self.codec.loads) for key in fields["chunks"]), tail)
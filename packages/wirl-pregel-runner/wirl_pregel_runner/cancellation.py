@@ -0,0 +1,81 @@
+from __future__ import annotations
+
+import threading
+from typing import Callable, List
+
+from langchain_core.runnables import RunnableConfig
+
+# Key under ``configurable`` holding the run's CancelToken
+CANCEL_CONFIG_KEY = "wirl_cancel_token"
+# Key of the token in the ``config`` passed to node functions
+CANCEL_KEY = "cancel_token"
+
+
+class RunCancelledError(Exception):
+    """The run was cancelled through its ``CancelToken``. It is never retried."""
+
+
+class CancelToken:
+    """Cooperative cancellation of one run, safe to cancel from any thread.
+
+    The runner checks it between supersteps and before every node activation. Once it is
+    cancelled, the runner stops waiting for a running async function, or for a sync one with
+    a ``timeout:``. Node functions get it as ``config["cancel_token"]`` and may check it
+    themselves during long work.
+    """
+
+    def __init__(self):
+        self._event = threading.Event()
+        self._lock = threading.Lock()
+        self._callbacks: List[Callable[[], None]] = []
+        self.reason: str | None = None
+
+    @property
+    def cancelled(self) -> bool:
+        return self._event.is_set()
+
+    def cancel(self, reason: str = "Run cancelled") -> None:
+        with self._lock:
+            if self._event.is_set():
+                return
+            self.reason = reason
+            self._event.set()
+            callbacks, self._callbacks = self._callbacks, []
+        for callback in callbacks:
+            callback()
+
+    def wait(self, timeout: float | None = None) -> bool:
+        """Block until the token is cancelled or ``timeout`` passes; return whether it was cancelled."""
+        return self._event.wait(timeout)
+
+    def raise_if_cancelled(self) -> None:
+        if self._event.is_set():
+            raise RunCancelledError(self.reason)
+
+    def on_cancel(self, callback: Callable[[], None]) -> Callable[[], None]:
+        """Call ``callback`` once the token is cancelled (right away if it already is).
+
+        Returns a function that unregisters the callback.
+        """
+        with self._lock:
+            if not self._event.is_set():
+                self._callbacks.append(callback)
+                return lambda: self._remove(callback)
+        callback()
+        return lambda: None
+
+    def _remove(self, callback: Callable[[], None]) -> None:
+        with self._lock:
+            if callback in self._callbacks:
+                self._callbacks.remove(callback)
+
+
+def run_cancel_token(config: RunnableConfig) -> CancelToken | None:
+    return (config.get("configurable") or {}).get(CANCEL_CONFIG_KEY)
+
+
+def check_cancelled(config: RunnableConfig) -> None:
+    """Raise ``RunCancelledError`` if the run of ``config`` was cancelled."""
+    token = run_cancel_token(config)
+    if token is not None:
+        token.raise_if_cancelled()
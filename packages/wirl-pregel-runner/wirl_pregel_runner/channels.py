@@ -0,0 +1,273 @@
+from __future__ import annotations
+
+import heapq
+import operator
+from collections.abc import Sequence
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List
+
+from langgraph._internal._typing import MISSING
+from langgraph.channels.base import BaseChannel
+from langgraph.errors import EmptyChannelError
+from typing_extensions import Self
+from wirl_lang import CycleClass, MapClass, Output, Reducer, TopKConfig, Workflow
+
+# Items per sealed chunk of an ``AppendLog``
+CHUNK_SIZE = 32
+
+
+def _as_chunk(chunk: Any) -> Any:
+    # msgpack restores tuples as lists; BlobSerializer restores references loaded on first read
+    return tuple(chunk) if isinstance(chunk, list) else chunk
+
+
+@dataclass(eq=False)
+class AppendLog:
+    """Immutable value of an ``(append)`` channel, stored as chunks.
+
+    Items go to ``tail``; every ``CHUNK_SIZE`` items the tail is sealed into ``chunks``,
+    so every chunk holds exactly ``CHUNK_SIZE`` items. Appending copies the tail and the
+    tuple of chunks, never the items of sealed chunks, and earlier logs stay valid because
+    chunks are never modified. The full list is built only when it is read (``to_list``).
+
+    ``BlobSerializer`` stores each sealed chunk once in the blob store, so a checkpoint
+    holds the chunk keys and the tail only, and restored chunks are loaded on first read.
+    Other serializers store the fields as they are, i.e. the whole list.
+    """
+
+    chunks: tuple = ()
+    tail: tuple = ()
+
+    def __post_init__(self):
+        self.chunks = tuple(_as_chunk(chunk) for chunk in self.chunks)
+        self.tail = tuple(self.tail)
+        # Not fields, so serializers only see the chunks and the tail. ``stored`` maps chunk
+        # positions to where a blob store keeps them; logs extended from this one share it.
+        self.stored: Dict[int, Any] = {}
+        self._list: List[Any] | None = None
+
+    @classmethod
+    def from_list(cls, items: Sequence[Any]) -> AppendLog:
+        return cls().extend(items)
+
+    def __len__(self) -> int:
+        return CHUNK_SIZE * len(self.chunks) + len(self.tail)
+
+    def extend(self, items: Sequence[Any]) -> AppendLog:
+        tail = self.tail + tuple(items)
+        chunks = self.chunks
+        if len(tail) >= CHUNK_SIZE:
+            sealed = len(tail) - len(tail) % CHUNK_SIZE
+            chunks += tuple(tail[start : start + CHUNK_SIZE] for start in range(0, sealed, CHUNK_SIZE))
+            tail = tail[sealed:]
+        log = AppendLog(chunks, tail)
+        log.stored = self.stored
+        return log
+
+    def to_list(self) -> List[Any]:
+        """The items as a list, built on first read and shared by later readers of this log."""
+        if self._list is None:
+            items: List[Any] = []
+            for chunk in self.chunks:
+                items.extend(chunk if isinstance(chunk, tuple) else chunk.load())
+            items.extend(self.tail)
+            self._list = items
+        return self._list
+
+
+class AppendChannel(BaseChannel[List[Any], List[Any], AppendLog]):
+    """Channel of an ``(append)`` output: the concatenation of every list written to it.
+
+    Replaces ``BinaryOperatorAggregate(list, operator.add)``, which copies the whole list
+    on every write, so appending one item per cycle iteration was quadratic in time and
+    in checkpoint bytes. Like that channel it reads as ``[]`` before the first write.
+    """
+
+    __slots__ = ("log",)
+
+    def __init__(self, typ: Any = list, key: str = ""):
+        super().__init__(typ, key)
+        self.log = AppendLog()
+
+    def __eq__(self, value: object) -> bool:
+        return isinstance(value, AppendChannel)
+
+    @property
+    def ValueType(self) -> Any:
+        return self.typ
+
+    @property
+    def UpdateType(self) -> Any:
+        return self.typ
+
+    def copy(self) -> Self:
+        # Logs are immutable, so copies share them
+        empty = self.__class__(self.typ, self.key)
+        empty.log = self.log
+        return empty
+
+    def from_checkpoint(self, checkpoint: Any) -> Self:
+        empty = self.__class__(self.typ, self.key)
+        if isinstance(checkpoint, AppendLog):
+            empty.log = checkpoint
+        elif isinstance(checkpoint, dict):
+            # A serializer that does not allow AppendLog restores its fields
+            empty.log = AppendLog(**checkpoint)
+        elif checkpoint is not MISSING and checkpoint is not None:
+            # Checkpoints written by BinaryOperatorAggregate hold a list (or a blob reference to one)
+            empty.log = AppendLog.from_list(checkpoint.load() if hasattr(checkpoint, "load") else checkpoint)
+        return empty
+
+    def update(self, values: Sequence[Any]) -> bool:
+        if not values:
+            return False
+        log = self.log
+        for value in values:
+            if not isinstance(value, (list, tuple)):
+                raise TypeError(f"(append) output {self.key} expects a list, got {type(value).__name__}")
+            log = log.extend(value)
+        self.log = log
+        return True
+
+    def get(self) -> List[Any]:
+        return self.log.to_list()
+
+    def is_available(self) -> bool:
+        return True
+
+    def checkpoint(self) -> AppendLog:
+        return self.log
+
+
+def _score(key: str | None) -> Callable[[Any], Any]:
+    if key is None:
+        return lambda item: item
+    return lambda item: item.get(key) if isinstance(item, dict) else getattr(item, key)
+
+
+def _folds(reducer: Reducer, topk: TopKConfig | None) -> tuple[Callable[[], Any] | None, Callable[[Any, Any], Any]]:
+    """Initial value (``None``: empty until the first write) and fold of a reducer."""
+    if reducer == Reducer.SUM:
+        return int, operator.add
+    if reducer == Reducer.COUNT:
+        return int, lambda total, value: total + 1
+    if reducer == Reducer.MIN:
+        return None, min
+    if reducer == Reducer.MAX:
+        return None, max
+    if reducer == Reducer.MERGE:
+        return dict, lambda merged, value: {**merged, **value}
+    if reducer == Reducer.UNION:
+        # A dict keeps the items in the order they were first written
+        return dict, lambda union, values: union | dict.fromkeys(values)
+    if reducer == Reducer.TOPK:
+        if topk is None or topk.k < 1:
+            raise ValueError("(topk) needs k >= 1")
+        score = _score(topk.key)
+        return list, lambda best, values: heapq.nlargest(topk.k, [*best, *values], key=score)
+    raise ValueError(f"Reducer {reducer.value} has no aggregate channel")
+
+
+class ReducerChannel(BaseChannel[Any, Any, Any]):
+    """Channel of an output with a folding reducer, holding only the running aggregate.
+
+    Each write is folded into the value: a number for ``(sum)``, any value for ``(count)``,
+    ``(min)`` and ``(max)``, a dict for ``(merge)``, and a list of items for ``(union)`` and
+    ``(topk)``, like ``(append)``. ``None`` writes are ignored. With ``each`` (map outputs,
+    written once with the list of per-item values) every item of a write is folded in.
+    ``(min)`` and ``(max)`` are empty until the first write; the others read as ``0``,
+    ``{}`` or ``[]``. A ``(union)`` reads as a list so results stay JSON-encodable: sorted
+    when its items can be compared, in first-written order otherwise.
+    """
+
+    __slots__ = ("reducer", "topk", "each", "value", "_initial", "_fold")
+
+    def __init__(self, reducer: Reducer, topk: TopKConfig | None = None, each: bool = False, key: str = ""):
+        super().__init__(Any, key)
+        self.reducer = reducer
+        self.topk = topk
+        self.each = each
+        self._initial, self._fold = _folds(reducer, topk)
+        self.value = self._initial() if self._initial is not None else MISSING
+
+    def __eq__(self, value: object) -> bool:
+        return isinstance(value, ReducerChannel) and (value.reducer, value.topk, value.each) == (self.reducer, self.topk, self.each)
+
+    @property
+    def ValueType(self) -> Any:
+        return self.typ
+
+    @property
+    def UpdateType(self) -> Any:
+        return self.typ
+
+    def _empty(self) -> Self:
+        return self.__class__(self.reducer, self.topk, self.each, self.key)
+
+    def copy(self) -> Self:
+        # Folds build new values, so copies can share them
+        empty = self._empty()
+        empty.value = self.value
+        return empty
+
+    def from_checkpoint(self, checkpoint: Any) -> Self:
+        empty = self._empty()
+        if checkpoint is not MISSING and checkpoint is not None:
+            value = checkpoint.load() if hasattr(checkpoint, "load") else checkpoint
+            empty.value = dict.fromkeys(value) if self.reducer == Reducer.UNION else value
+        return empty
+
+    def update(self, values: Sequence[Any]) -> bool:
+        updated = False
+        for value in values:
+            for item in value if self.each and value is not None else [value]:
+                if item is None:
+                    continue
+                self.value = item if self.value is MISSING else self._fold(self.value, item)
+                updated = True
+        return updated
+
+    def get(self) -> Any:
+        if self.value is MISSING:
+            raise EmptyChannelError()
+        if self.reducer == Reducer.UNION:
+            items = list(self.value)
+            try:
+                return sorted(items)
+            except TypeError:
+                return items
+        return self.value
+
+    def is_available(self) -> bool:
+        return self.value is not MISSING
+
+    def checkpoint(self) -> Any:
+        return list(self.value) if self.reducer == Reducer.UNION and self.value is not MISSING else self.value
+
+
+def _channel_factory(out: Output, each: bool) -> Callable[[], BaseChannel]:
+    if out.reducer == Reducer.APPEND:
+        return AppendChannel
+    # The list a map writes is already the list of items (union, topk) take
+    each = each and out.reducer not in (Reducer.UNION, Reducer.TOPK)
+    return lambda: ReducerChannel(out.reducer, out.topk, each=each)
+
+
+def reducer_channels(workflow: Workflow) -> Dict[str, Callable[[], BaseChannel]]:
+    """Channel factories of the outputs with a reducer other than ``(last)``.
+
+    Such outputs accumulate across cycle iterations (the cycle start does not clear them)
+    and across the items of a map.
+    """
+    channels: Dict[str, Callable[[], BaseChannel]] = {}
+    for node in workflow.nodes:
+        if isinstance(node, CycleClass):
+            for inner in node.nodes:
+                for out in inner.outputs:
+                    if out.reducer != Reducer.LAST:
+                        channels[inner.name + "." + out.name] = _channel_factory(out, each=False)
+        elif isinstance(node, MapClass):
+            for out in node.outputs:
+                if out.reducer != Reducer.LAST:
+                    channels[node.name + "." + out.name] = _channel_factory(out, each=True)
+    return channels
@@ -0,0 +1,73 @@
+from __future__ import annotations
+
+from dataclasses import asdict, dataclass, field
+from typing import Any, Dict, List
+
+from langgraph.pregel import Pregel
+from wirl_lang import CycleClass, MapClass, Workflow, parse_wirl_to_objects
+
+from wirl_pregel_runner.pregel_graph_builder import build_pregel_graph
+from wirl_pregel_runner.pruning import prune_workflow
+
+
+@dataclass(frozen=True)
+class CompileReport:
+    """Size of the Pregel graph built for a workflow.
+
+    ``channels`` is what every checkpoint covers; ``unpruned_channels`` is the count
+    without output pruning. ``triggers`` counts node subscriptions to channels and
+    ``reads`` the channels nodes read when they run. Pruning only removes nodes with no
+    live consumer and no sink role: ``side_effect_nodes`` lists the top-level nodes kept
+    only because nothing reads their outputs, with everything upstream of them.
+    """
+
+    workflow: str
+    nodes: int
+    pregel_nodes: int
+    channels: int
+    unpruned_channels: int
+    triggers: int
+    reads: int
+    dead_nodes: List[str] = field(default_factory=list)
+    unused_outputs: List[str] = field(default_factory=list)
+    side_effect_nodes: List[str] = field(default_factory=list)
+    warnings: List[str] = field(default_factory=list)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+def _count_nodes(workflow: Workflow) -> int:
+    return sum(1 + len(node.nodes) if isinstance(node, (CycleClass, MapClass)) else 1 for node in workflow.nodes)
+
+
+def _unused_function(**kwargs):
+    raise RuntimeError("compile_report graphs are not meant to run")
+
+
+def compile_report(path: str, functions: Dict[str, Any] | None = None, prune_triggers: bool = True, prune_outputs: bool = True) -> CompileReport:
+    """Build the workflow at ``path`` as ``build_pregel_graph`` does and report its size.
+
+    ``functions`` is only needed to check the function map; without it every ``call``
+    is bound to a function that is never run.
+    """
+    workflow = parse_wirl_to_objects(path)
+    if functions is None:
+        calls = [inner.call for node in workflow.nodes for inner in (node.nodes if isinstance(node, (CycleClass, MapClass)) else [node])]
+        functions = dict.fromkeys(calls, _unused_function)
+    app: Pregel = build_pregel_graph(path, functions=functions, prune_triggers=prune_triggers, prune_outputs=prune_outputs)
+    unpruned = build_pregel_graph(path, functions=functions, prune_triggers=prune_triggers, prune_outputs=False) if prune_outputs else app
+    pruned = prune_workflow(workflow) if prune_outputs else None
+    return CompileReport(
+        workflow=workflow.name,
+        nodes=_count_nodes(workflow),
+        pregel_nodes=len(app.nodes),
+        channels=len(app.channels),
+        unpruned_channels=len(unpruned.channels),
+        triggers=sum(len(node.triggers) for node in app.nodes.values()),
+        reads=sum(len(node.channels) for node in app.nodes.values()),
+        dead_nodes=list(pruned.dead_nodes) if pruned else [],
+        unused_outputs=list(pruned.unused_outputs) if pruned else [],
+        side_effect_nodes=list(pruned.side_effect_nodes) if pruned else [],
+        warnings=list(pruned.warnings) if pruned else [],
+    )
@@ -0,0 +1,46 @@
+from __future__ import annotations
+
+from typing import Any
+
+from langgraph.pregel import Pregel
+from wirl_lang import Workflow
+
+# WIRL ``metadata`` entry selecting the checkpoint durability of a workflow
+DURABILITY_KEY = "durability"
+# Key under the built app's ``config["metadata"]`` that carries it to run time
+DURABILITY_CONFIG_KEY = "wirl_durability"
+
+# Checkpoint writes, from safest to fastest:
+#   sync  - every superstep is persisted before the next one starts
+#   async - every superstep is persisted in the background while the next one runs
+#   exit  - only the final state is persisted, when the run completes, fails or hits a HITL interrupt
+DURABILITY_MODES = ("sync", "async", "exit")
+
+
+def validate_durability(durability: str) -> str:
+    if durability not in DURABILITY_MODES:
+        raise ValueError(f"Unknown checkpoint durability {durability!r}, expected one of {', '.join(DURABILITY_MODES)}")
+    return durability
+
+
+def workflow_durability(workflow: Workflow) -> str | None:
+    """Durability set in the workflow's ``metadata`` block, if any."""
+    if workflow.metadata is None or DURABILITY_KEY not in workflow.metadata.entries:
+        return None
+    return validate_durability(workflow.metadata.entries[DURABILITY_KEY])
+
+
+def resolve_durability(app: Pregel, durability: str | None) -> str | None:
+    """Durability for one run: the explicit argument, then the workflow metadata.
+
+    ``None`` leaves LangGraph's default (``async``). Without a checkpointer there is
+    nothing to persist and ``None`` is returned as well.
+    """
+    if durability is not None:
+        validate_durability(durability)
+    if app.checkpointer is None:
+        return None
+    if durability is not None:
+        return durability
+    metadata: Any = (app.config or {}).get("metadata") or {}
+    return metadata.get(DURABILITY_CONFIG_KEY)
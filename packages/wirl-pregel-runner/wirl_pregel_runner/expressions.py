@@ -0,0 +1,108 @@
+from __future__ import annotations
+
+import ast
+from dataclasses import dataclass, field
+from functools import lru_cache
+from types import CodeType
+from typing import Any, Callable, Dict, Tuple
+
+# Shared by every evaluation; eval only inserts __builtins__ when it is missing
+_SAFE_GLOBALS: Dict[str, Any] = {"__builtins__": {}}
+_LITERAL_NAMES: Dict[str, Any] = {"true": True, "false": False, "null": None}
+
+
+class StateObject:
+    """Attribute view over one node's outputs; missing attributes read as False."""
+
+    def __init__(self, data: Dict[str, Any]):
+        self.__dict__.update(data)
+
+    def __getattr__(self, name):
+        # Return False for any missing attribute instead of raising AttributeError
+        return False
+
+
+def _collect_references(tree: ast.AST) -> Dict[str, Tuple[str, ...]]:
+    """Map every top-level name in the expression to the attributes read from it."""
+    references: Dict[str, list[str]] = {}
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Name) and isinstance(node.ctx, ast.Load):
+            references.setdefault(node.id, [])
+        if isinstance(node, ast.Attribute) and isinstance(node.value, ast.Name):
+            attrs = references.setdefault(node.value.id, [])
+            if node.attr not in attrs:
+                attrs.append(node.attr)
+    return {name: tuple(attrs) for name, attrs in references.items()}
+
+
+@dataclass(frozen=True)
+class CompiledCondition:
+    """A ``when``/guard expression compiled once at graph build time.
+
+    Evaluation only reads the channels the expression references: ``Node.output`` for
+    attribute access and plain keys for workflow or cycle inputs.
+    """
+
+    source: str
+    code: CodeType
+    references: Dict[str, Tuple[str, ...]]
+    channels: Tuple[str, ...] = field(init=False)
+
+    def __post_init__(self):
+        channels: list[str] = []
+        for name, attrs in self.references.items():
+            channels.append(name)
+            channels.extend(f"{name}.{attr}" for attr in attrs)
+        object.__setattr__(self, "channels", tuple(channels))
+
+    def _namespace(self, state: Dict[str, Any]) -> Dict[str, Any]:
+        namespace: Dict[str, Any] = {}
+        for name, attrs in self.references.items():
+            if name in state:
+                value = state[name]
+                namespace[name] = StateObject(value) if isinstance(value, dict) else value
+            elif name in _LITERAL_NAMES:
+                namespace[name] = _LITERAL_NAMES[name]
+            else:
+                # Unknown node names resolve to an empty object whose attributes are all False
+                namespace[name] = StateObject({attr: state[key] for attr in attrs if (key := f"{name}.{attr}") in state})
+        return namespace
+
+    def __call__(self, state: Dict[str, Any]) -> bool:
+        try:
+            result = eval(self.code, _SAFE_GLOBALS, self._namespace(state))
+        except (NameError, AttributeError):
+            # If we can't evaluate due to missing names/attributes, return False
+            return False
+        # Only None or explicit False should evaluate to False
+        # Empty containers like [], {}, "", 0 should evaluate to True
+        return result is not None and result is not False
+
+
+@lru_cache(maxsize=1024)
+def compile_condition(expr: str) -> CompiledCondition:
+    if expr is None:
+        raise ValueError("Condition is None")
+    source = str(expr).strip()
+    tree = ast.parse(source, mode="eval")
+    return CompiledCondition(source=source, code=compile(tree, f"<when: {source}>", "eval"), references=_collect_references(tree))
+
+
+@lru_cache(maxsize=1024)
+def compile_value(expr: str) -> Callable[[Dict[str, Any]], Any]:
+    """Compile a value reference: a quoted string, a number or a channel name."""
+    if expr is None:
+        raise ValueError("Value is None")
+
+    expr = str(expr).strip()
+    if expr.startswith('"') and expr.endswith('"'):
+        constant: Any = expr[1:-1]
+    else:
+        try:
+            constant = int(expr)
+        except ValueError:
+            try:
+                constant = float(expr)
+            except ValueError:
+                return lambda state: state.get(expr)
+    return lambda state: constant
@@ -0,0 +1,221 @@
+from __future__ import annotations
+
+import json
+import logging
+import threading
+import time
+from collections import defaultdict
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Any, Dict, List, Protocol
+
+from langchain_core.runnables import RunnableConfig
+from langgraph.errors import GraphBubbleUp
+
+logger = logging.getLogger(__name__)
+
+# Activation statuses. The two skip statuses are activations that Pregel scheduled because a
+# trigger channel changed but that returned without calling the node function.
+RAN = "ran"
+CACHED = "cached"
+RESUMED = "resumed"
+SKIPPED_NOT_READY = "skipped_not_ready"
+SKIPPED_WHEN = "skipped_when"
+INTERRUPTED = "interrupted"
+FAILED = "failed"
+
+SKIPPED = frozenset({SKIPPED_NOT_READY, SKIPPED_WHEN})
+
+
+@dataclass(frozen=True)
+class NodeActivation:
+    """One execution of a node's Pregel task.
+
+    ``wall_time`` and ``cpu_time`` are in seconds and cover the whole task, including
+    readiness checks, cache lookups and retries. ``cpu_time`` is the CPU time of the
+    executing thread, plus that of the thread a sync function with a time limit runs on;
+    for async nodes it also counts other coroutines that ran on the event loop while the
+    node was awaiting. Payload sizes are the length of the JSON
+    encoding of the node's resolved inputs and of its update (-1 if not encodable).
+    ``step`` is the Pregel superstep, ``None`` on the native executor.
+    """
+
+    node: str
+    call: str
+    status: str
+    step: int | None
+    thread_id: str | None
+    started_at: float
+    wall_time: float
+    cpu_time: float
+    input_bytes: int
+    output_bytes: int
+    error: str | None = None
+
+    @property
+    def skipped(self) -> bool:
+        return self.status in SKIPPED
+
+
+class MetricsSink(Protocol):
+    def record(self, activation: NodeActivation) -> None: ...
+
+
+class InMemorySink:
+    """Collects activations in a list, e.g. for tests or a benchmark run."""
+
+    def __init__(self):
+        self.activations: List[NodeActivation] = []
+        self._lock = threading.Lock()
+
+    def record(self, activation: NodeActivation) -> None:
+        with self._lock:
+            self.activations.append(activation)
+
+    def clear(self) -> None:
+        with self._lock:
+            self.activations.clear()
+
+    def summary(self) -> Dict[str, Dict[str, Any]]:
+        """Per-node totals, slowest node first."""
+        totals: Dict[str, Dict[str, Any]] = defaultdict(lambda: {"activations": 0, "skipped": 0, "wall_time": 0.0, "cpu_time": 0.0, "input_bytes": 0, "output_bytes": 0})
+        with self._lock:
+            activations = list(self.activations)
+        for activation in activations:
+            entry = totals[activation.node]
+            entry["activations"] += 1
+            entry["skipped"] += activation.skipped
+            entry["wall_time"] += activation.wall_time
+            entry["cpu_time"] += activation.cpu_time
+            entry["input_bytes"] += max(activation.input_bytes, 0)
+            entry["output_bytes"] += max(activation.output_bytes, 0)
+        return dict(sorted(totals.items(), key=lambda item: item[1]["wall_time"], reverse=True))
+
+
+class JsonlSink:
+    """Appends one JSON object per activation to a file."""
+
+    def __init__(self, path: str | Path):
+        self.path = Path(path).expanduser()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._file = self.path.open("a", encoding="utf-8")
+        self._lock = threading.Lock()
+
+    def record(self, activation: NodeActivation) -> None:
+        line = json.dumps(asdict(activation))
+        with self._lock:
+            self._file.write(line + "\n")
+            self._file.flush()
+
+    def close(self) -> None:
+        with self._lock:
+            self._file.close()
+
+
+class LoggingSink:
+    """Writes one log line per activation."""
+
+    def __init__(self, level: int = logging.INFO, log: logging.Logger | None = None):
+        self.level = level
+        self.log = log or logger
+
+    def record(self, activation: NodeActivation) -> None:
+        self.log.log(
+            self.level,
+            f"{activation.node} {activation.status} step={activation.step} wall={activation.wall_time:.4f}s cpu={activation.cpu_time:.4f}s in={activation.input_bytes}B out={activation.output_bytes}B",
+        )
+
+
+_sinks: List[MetricsSink] = []
+
+
+def add_sink(sink: MetricsSink) -> None:
+    _sinks.append(sink)
+
+
+def remove_sink(sink: MetricsSink) -> None:
+    _sinks.remove(sink)
+
+
+def payload_size(value: Any) -> int:
+    try:
+        return len(json.dumps(value, default=str).encode())
+    except Exception:
+        return -1
+
+
+class Probe:
+    """Measures one activation; the task sets ``status``, ``inputs`` and ``outputs`` as it goes."""
+
+    def __init__(self, node: str, call: str, config: RunnableConfig):
+        self.node = node
+        self.call = call
+        self.config = config
+        self.status = RAN
+        self.inputs: Any = None
+        self.outputs: Any = None
+        self._other_cpu = 0.0
+
+    def add_cpu_time(self, seconds: float) -> None:
+        """Count CPU time the task spent on another thread (e.g. a node function with a timeout)."""
+        self._other_cpu += seconds
+
+    def __enter__(self) -> "Probe":
+        self._started_at = time.time()
+        self._wall = time.perf_counter()
+        self._cpu = time.thread_time()
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        wall_time = time.perf_counter() - self._wall
+        cpu_time = time.thread_time() - self._cpu + self._other_cpu
+        error = None
+        if exc is not None:
+            self.status = INTERRUPTED if isinstance(exc, GraphBubbleUp) else FAILED
+            error = None if self.status == INTERRUPTED else repr(exc)
+        activation = NodeActivation(
+            node=self.node,
+            call=self.call,
+            status=self.status,
+            step=(self.config.get("metadata") or {}).get("langgraph_step"),
+            thread_id=(self.config.get("configurable") or {}).get("thread_id"),
+            started_at=self._started_at,
+            wall_time=wall_time,
+            cpu_time=cpu_time,
+            input_bytes=payload_size(self.inputs) if self.inputs is not None else 0,
+            output_bytes=payload_size(self.outputs) if self.outputs is not None else 0,
+            error=error,
+        )
+        for sink in list(_sinks):
+            try:
+                sink.record(activation)
+            except Exception as e:  # pragma: no cover - sinks must not break execution
+                logger.error(f"Metrics sink failed: {e}")
+
+
+class _NullProbe:
+    """Used when no sink is registered, so uninstrumented runs pay almost nothing."""
+
+    status: str = RAN
+    inputs: Any = None
+    outputs: Any = None
+
+    def __enter__(self) -> "_NullProbe":
+        return self
+
+    def add_cpu_time(self, seconds: float) -> None:
+        return None
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        return None
+
+    def __setattr__(self, name, value) -> None:
+        # Shared instance; discard the values set by tasks
+        return None
+
+
+_NULL_PROBE = _NullProbe()
+
+
+def probe(node: str, call: str, config: RunnableConfig) -> Probe | _NullProbe:
+    return Probe(node, call, config) if _sinks else _NULL_PROBE
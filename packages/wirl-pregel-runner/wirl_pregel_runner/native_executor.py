@@ -0,0 +1,383 @@
+from __future__ import annotations
+
+import asyncio
+import contextvars
+import inspect
+import logging
+import operator
+from collections.abc import Iterator, Mapping
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Iterable, List, Set, Tuple
+
+from langchain_core.runnables import RunnableConfig
+from langgraph.channels.base import BaseChannel
+from wirl_lang import CycleClass, MapClass, NodeClass, Workflow, parse_wirl_to_objects
+
+from wirl_pregel_runner.cancellation import check_cancelled
+from wirl_pregel_runner.channels import reducer_channels
+from wirl_pregel_runner.pregel_graph_builder import create_map_pregel_node, make_cycle_guard, make_cycle_start, make_pregel_task
+from wirl_pregel_runner.pruning import prune_workflow
+from wirl_pregel_runner.resources import workflow_max_concurrency
+
+logger = logging.getLogger(__name__)
+
+_ABSENT = object()
+
+
+@dataclass
+class NativeTask:
+    """A node or map, run on a worker once the units in ``deps`` are done."""
+
+    name: str
+    fn: Callable
+    channels: List[str]
+    deps: Set[str]
+
+
+@dataclass
+class NativeCycle:
+    """A cycle block. ``start`` and ``guard`` are cheap and run on the scheduler itself."""
+
+    name: str
+    start: Callable[[dict], dict]
+    guard: Callable[[dict], dict | None]
+    iteration_key: str
+    channels: List[str]
+    deps: Set[str]
+    body: List[NativeTask]
+
+
+def _producer(channel: str | None) -> str | None:
+    """Name of the node (or block) referenced by an input, as in ``extract_dependencies``."""
+    if channel is None:
+        return None
+    channel = str(channel).strip()
+    if "." in channel and not channel.startswith('"'):
+        return channel.split(".")[0]
+    return None
+
+
+def _producers(inputs: Iterable) -> Set[str]:
+    return {producer for inp in inputs if (producer := _producer(inp.default_value)) is not None}
+
+
+def _find_loop(deps: Dict[str, Set[str]]) -> List[str]:
+    """Units left over by a topological sort of ``deps``: those on or behind a dependency loop."""
+    done: Set[str] = set()
+    remaining = dict(deps)
+    while remaining:
+        ready = [name for name, unit_deps in remaining.items() if unit_deps <= done]
+        if not ready:
+            return sorted(remaining)
+        for name in ready:
+            done.add(name)
+            del remaining[name]
+    return []
+
+
+def _top_level_deps(workflow: Workflow) -> Dict[str, Set[str]]:
+    # Outputs of nodes inside a cycle are only final once the whole cycle is done
+    unit_of = {node.name: node.name for node in workflow.nodes}
+    for node in workflow.nodes:
+        if isinstance(node, CycleClass):
+            unit_of.update({inner.name: node.name for inner in node.nodes})
+
+    deps = {}
+    for node in workflow.nodes:
+        if isinstance(node, CycleClass):
+            refs = _producers(node.inputs) | _producers(node.guard.inputs) | _producers(node.outputs)
+            for inner in node.nodes:
+                refs |= _producers(inner.inputs)
+        else:
+            refs = _producers(node.inputs)
+        deps[node.name] = {unit_of[ref] for ref in refs if ref in unit_of} - {node.name}
+    return deps
+
+
+def _body_deps(cycle: CycleClass) -> Dict[str, Set[str]]:
+    names = {node.name for node in cycle.nodes}
+    return {node.name: (_producers(node.inputs) & names) - {node.name} for node in cycle.nodes}
+
+
+def unsupported_reason(workflow: Workflow) -> str | None:
+    """Why ``workflow`` needs the Pregel runner, or ``None`` if the native executor can run it.
+
+    HITL nodes need checkpoints to pause and resume. Nodes must also form a DAG at the top
+    level and inside every cycle body; loops are only expressed with ``cycle`` blocks.
+    """
+    for node in workflow.nodes:
+        inner = node.nodes if isinstance(node, (CycleClass, MapClass)) else [node]
+        for n in inner:
+            if n.hitl:
+                return f"node {n.name} has a hitl block"
+    loop = _find_loop(_top_level_deps(workflow))
+    if loop:
+        return f"nodes {loop} depend on each other"
+    for node in workflow.nodes:
+        if isinstance(node, CycleClass) and (loop := _find_loop(_body_deps(node))):
+            return f"nodes {loop} in cycle {node.name} depend on each other"
+    return None
+
+
+def _call(fn: Callable, task_input: dict, config: RunnableConfig) -> dict | None:
+    if inspect.iscoroutinefunction(fn):
+        return asyncio.run(fn(task_input, config))
+    return fn(task_input, config)
+
+
+async def _acall(fn: Callable, task_input: dict, config: RunnableConfig, semaphore: asyncio.Semaphore | None = None) -> dict | None:
+    if semaphore is not None:
+        async with semaphore:
+            return await _acall(fn, task_input, config)
+    if inspect.iscoroutinefunction(fn):
+        return await fn(task_input, config)
+    return await asyncio.to_thread(fn, task_input, config)
+
+
+class _Scope:
+    """Units of the top level or of one iteration of a cycle body."""
+
+    def __init__(self, units: List[NativeTask | NativeCycle], parent: "_Scope | None" = None, cycle: NativeCycle | None = None):
+        self.units = units
+        self.parent = parent
+        self.cycle = cycle
+        self.reset()
+
+    def reset(self) -> None:
+        self.pending = {unit.name: unit for unit in self.units}
+        self.done: Set[str] = set()
+        self.running = 0
+
+
+class _Run:
+    """Scheduling state of one invocation.
+
+    Only the thread or task driving the run touches ``state``; workers get a copy of the
+    channels their node reads and return an update that ``complete`` applies.
+    """
+
+    def __init__(self, workflow: "NativeWorkflow", params: Dict[str, Any] | None, config: RunnableConfig):
+        self.workflow = workflow
+        self.config = config
+        self.state: Dict[str, Any] = {channel: value() for channel, value in workflow.initial.items()}
+        for key, value in (params or {}).items():
+            if key in workflow.input_channels:
+                self.state[key] = value
+            else:
+                logger.warning(f"Input channel {key} not found in {sorted(workflow.input_channels)}")
+        self.scopes = [_Scope(workflow.units)]
+
+    def apply(self, update: Dict[str, Any]) -> None:
+        for channel, value in update.items():
+            current = self.state.get(channel)
+            if isinstance(current, BaseChannel):
+                current.update([value])
+            elif channel in self.workflow.aggregates:
+                self.state[channel] = operator.add(current, value)
+            else:
+                self.state[channel] = value
+
+    def present(self, channel: str) -> bool:
+        value = self.state.get(channel, _ABSENT)
+        return value is not _ABSENT and (not isinstance(value, BaseChannel) or value.is_available())
+
+    def read(self, channel: str) -> Any:
+        value = self.state[channel]
+        return value.get() if isinstance(value, BaseChannel) else value
+
+    def ready(self) -> List[Tuple[_Scope, NativeTask, dict]]:
+        """Tasks whose dependencies are done; cycles that become ready are started on the way."""
+        batch = []
+        progress = True
+        while progress:
+            progress = False
+            for scope in list(self.scopes):
+                for name, unit in list(scope.pending.items()):
+                    if not unit.deps <= scope.done:
+                        continue
+                    del scope.pending[name]
+                    progress = True
+                    # Pregel never schedules a unit none of whose inputs was written
+                    if not any(self.present(channel) for channel in unit.channels):
+                        self.finish(scope, name)
+                    elif isinstance(unit, NativeCycle):
+                        self.start_cycle(scope, unit)
+                    else:
+                        scope.running += 1
+                        batch.append((scope, unit, {channel: self.read(channel) for channel in unit.channels if self.present(channel)}))
+        return batch
+
+    def complete(self, scope: _Scope, task: NativeTask, update: Dict[str, Any] | None) -> None:
+        scope.running -= 1
+        if update:
+            self.apply(update)
+        self.finish(scope, task.name)
+
+    def finish(self, scope: _Scope, name: str) -> None:
+        scope.done.add(name)
+        if scope.cycle is not None and not scope.pending and not scope.running:
+            self.end_iteration(scope)
+
+    def start_cycle(self, parent: _Scope, cycle: NativeCycle) -> None:
+        body = _Scope(cycle.body, parent=parent, cycle=cycle)
+        self.scopes.append(body)
+        self.apply(cycle.start(_StateView(self)))
+        if not cycle.body:
+            self.end_iteration(body)
+
+    def end_iteration(self, body: _Scope) -> None:
+        cycle = body.cycle
+        while True:
+            update = cycle.guard(_StateView(self))
+            if update:
+                self.apply(update)
+            if update is None or cycle.iteration_key not in update:
+                # Done, or stalled because the guard inputs are missing (as with Pregel)
+                self.scopes.remove(body)
+                self.finish(body.parent, cycle.name)
+                return
+            self.apply(cycle.start(_StateView(self)))
+            body.reset()
+            if cycle.body:
+                return
+
+    def result(self) -> Dict[str, Any]:
+        return {channel: self.read(channel) for channel in self.workflow.output_channels if self.present(channel)}
+
+
+class _StateView(Mapping):
+    """The run state as cycle starts and guards read it, with reducer channels read as values."""
+
+    def __init__(self, run: _Run):
+        self.run = run
+
+    def __getitem__(self, channel: str) -> Any:
+        if not self.run.present(channel):
+            raise KeyError(channel)
+        return self.run.read(channel)
+
+    def __iter__(self) -> Iterator[str]:
+        return (channel for channel in self.run.state if self.run.present(channel))
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self)
+
+
+class NativeWorkflow:
+    """A WIRL workflow compiled for the native executor, an alternative to Pregel.
+
+    Nodes run as soon as every node they reference has finished, on a thread pool
+    (``invoke``) or as asyncio tasks (``ainvoke``). Node tasks are the ones Pregel runs,
+    so readiness checks, ``when``, retries, the node cache and metrics behave the same;
+    cycles run their body once per iteration between the cycle start and the guard, and
+    ``(append)`` outputs accumulate as before. There are no channel versions, supersteps
+    or checkpoints, so workflows with ``hitl`` nodes are rejected (see ``unsupported_reason``).
+    At most ``max_workers`` nodes run at once, and no more than the workflow's
+    ``max_concurrency`` metadata allows.
+    """
+
+    def __init__(self, workflow: Workflow, functions: Dict[str, Any], max_workers: int | None = None):
+        reason = unsupported_reason(workflow)
+        if reason is not None:
+            raise ValueError(f"Workflow {workflow.name} cannot run on the native executor: {reason}")
+        self.name = workflow.name
+        max_concurrency = workflow_max_concurrency(workflow)
+        self.max_workers = min(filter(None, (max_workers, max_concurrency)), default=None)
+        fn_map = dict(functions)
+        self.input_channels = {inp.name for inp in workflow.inputs}
+        # Outputs with a reducer get the channels Pregel uses; iteration counters are plain ints
+        self.initial: Dict[str, Callable[[], Any]] = dict(reducer_channels(workflow))
+        self.aggregates = set(self.initial)
+
+        # Same nodes and outputs as the Pregel graph
+        pruned = prune_workflow(workflow)
+        deps = {name: node_deps - set(pruned.dead_nodes) for name, node_deps in _top_level_deps(workflow).items()}
+        cycle_iteration_keys = []
+        self.units: List[NativeTask | NativeCycle] = []
+        for node in pruned.live(workflow.nodes):
+            channels = [inp.default_value for inp in node.inputs if inp.default_value is not None]
+            if isinstance(node, NodeClass):
+                self.units.append(NativeTask(node.name, make_pregel_task(node, fn_map, pruned), channels, deps[node.name]))
+            elif isinstance(node, MapClass):
+                self.units.append(NativeTask(node.name, create_map_pregel_node(node, fn_map, pruned), channels, deps[node.name]))
+            elif isinstance(node, CycleClass):
+                iteration_key = f"{node.name}.iteration_counter"
+                cycle_iteration_keys.append(iteration_key)
+                self.aggregates.add(iteration_key)
+                self.initial[iteration_key] = int
+                in_cycle_outputs = {inner.name + "." + out.name for inner in node.nodes for out in inner.outputs if pruned.is_used(inner.name + "." + out.name)}
+                body_deps = _body_deps(node)
+                body = [
+                    NativeTask(inner.name, make_pregel_task(inner, fn_map, pruned), [inp.default_value for inp in inner.inputs if inp.default_value is not None], body_deps[inner.name])
+                    for inner in node.nodes
+                ]
+                self.units.append(
+                    NativeCycle(
+                        name=node.name,
+                        start=make_cycle_start(node, sorted(in_cycle_outputs - self.aggregates)),
+                        guard=make_cycle_guard(node, iteration_key),
+                        iteration_key=iteration_key,
+                        channels=[channel for channel in channels if channel not in in_cycle_outputs],
+                        deps=deps[node.name],
+                        body=body,
+                    )
+                )
+        self.output_channels = [out.default_value for out in workflow.outputs if out.default_value is not None] + cycle_iteration_keys
+
+    def invoke(self, params: Dict[str, Any] | None, config: RunnableConfig | None = None) -> Dict[str, Any]:
+        run = _Run(self, params, config or {})
+        pool = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix=self.name)
+        running: Dict[Future, Tuple[_Scope, NativeTask]] = {}
+        try:
+            while True:
+                check_cancelled(run.config)
+                batch = run.ready()
+                if len(batch) == 1 and not running:
+                    # Nothing to overlap with: run it here and skip the hand-off to a worker
+                    scope, task, task_input = batch[0]
+                    run.complete(scope, task, _call(task.fn, task_input, run.config))
+                    continue
+                for scope, task, task_input in batch:
+                    future = pool.submit(contextvars.copy_context().run, _call, task.fn, task_input, run.config)
+                    running[future] = (scope, task)
+                if not running:
+                    break
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    scope, task = running.pop(future)
+                    run.complete(scope, task, future.result())
+        finally:
+            pool.shutdown(wait=True, cancel_futures=True)
+        return run.result()
+
+    async def ainvoke(self, params: Dict[str, Any] | None, config: RunnableConfig | None = None) -> Dict[str, Any]:
+        run = _Run(self, params, config or {})
+        running: Dict[asyncio.Future, Tuple[_Scope, NativeTask]] = {}
+        semaphore = asyncio.Semaphore(self.max_workers) if self.max_workers else None
+        try:
+            while True:
+                check_cancelled(run.config)
+                for scope, task, task_input in run.ready():
+                    running[asyncio.ensure_future(_acall(task.fn, task_input, run.config, semaphore))] = (scope, task)
+                if not running:
+                    break
+                done, _ = await asyncio.wait(running, return_when=asyncio.FIRST_COMPLETED)
+                for future in done:
+                    scope, task = running.pop(future)
+                    run.complete(scope, task, future.result())
+        except BaseException:
+            for future in running:
+                future.cancel()
+            raise
+        return run.result()
+
+
+def build_native_workflow(path: str, functions: Dict[str, Any], max_workers: int | None = None) -> NativeWorkflow | None:
+    """Compile a WIRL file for the native executor; ``None`` if it needs the Pregel runner."""
+    workflow = parse_wirl_to_objects(path)
+    reason = unsupported_reason(workflow)
+    if reason is not None:
+        logger.debug(f"Workflow {workflow.name} runs on Pregel: {reason}")
+        return None
+    return NativeWorkflow(workflow, functions, max_workers=max_workers)
@@ -0,0 +1,263 @@
+from __future__ import annotations
+
+import dataclasses
+import hashlib
+import logging
+import os
+import pickle
+import sqlite3
+import threading
+import time
+from collections import Counter, OrderedDict
+from pathlib import Path
+from typing import Any, Dict, Protocol, Tuple
+
+from wirl_lang import CacheConfig, NodeClass
+
+from wirl_pregel_runner.blobs import ValueCodec
+
+logger = logging.getLogger(__name__)
+
+CACHE_STORE_ENV = "WIRL_NODE_CACHE"
+
+_DURATION_UNITS = {"s": 1, "m": 60, "h": 3600, "d": 86400}
+
+# Sentinel for misses, so that a cached ``None``/``{}`` update is still a hit
+MISS = object()
+
+
+def parse_duration(value: str) -> float:
+    """Convert a WIRL ``DURATION`` such as ``30s`` or ``24h`` to seconds."""
+    return int(value[:-1]) * _DURATION_UNITS[value[-1]]
+
+
+def _canonical(value: Any) -> Any:
+    """Reduce a value to JSON-like primitives with a deterministic ordering."""
+    if value is None or isinstance(value, (bool, int, float, str)):
+        return value
+    if isinstance(value, bytes):
+        return ["bytes", hashlib.sha256(value).hexdigest()]
+    if isinstance(value, dict):
+        return ["dict", sorted((repr(_canonical(k)), _canonical(v)) for k, v in value.items())]
+    if isinstance(value, (list, tuple)):
+        return [type(value).__name__, [_canonical(v) for v in value]]
+    if isinstance(value, (set, frozenset)):
+        return ["set", sorted(repr(_canonical(v)) for v in value)]
+    if hasattr(value, "model_dump"):
+        return [type(value).__qualname__, _canonical(value.model_dump())]
+    if dataclasses.is_dataclass(value) and not isinstance(value, type):
+        return [type(value).__qualname__, _canonical(dataclasses.asdict(value))]
+    try:
+        return [type(value).__qualname__, hashlib.sha256(pickle.dumps(value)).hexdigest()]
+    except Exception as e:
+        # Not ``repr``: the default one holds the object's address, so the key would never match again
+        raise TypeError(f"Cannot build a cache key from {type(value).__qualname__}: {e}") from e
+
+
+def make_cache_key(call: str, constants: Dict[str, Any], inputs: Dict[str, Any]) -> str:
+    """Stable hash of a node's call name, constants and resolved inputs.
+
+    Raises ``TypeError`` for values with no stable encoding (not picklable nor plain data).
+    """
+    payload = repr(_canonical({"call": call, "constants": constants, "inputs": inputs}))
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+class CacheStore(Protocol):
+    def get(self, key: str) -> Any: ...
+
+    def set(self, key: str, value: Any, ttl: float) -> None: ...
+
+
+class InMemoryCacheStore:
+    """Process-local LRU store."""
+
+    def __init__(self, maxsize: int = 1024):
+        self.maxsize = maxsize
+        self._entries: OrderedDict[str, Tuple[float, Any]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Any:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return MISS
+            expires_at, value = entry
+            if expires_at < time.time():
+                del self._entries[key]
+                return MISS
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: Any, ttl: float) -> None:
+        with self._lock:
+            self._entries[key] = (time.time() + ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+
+class SQLiteCacheStore:
+    """Store backed by a local SQLite file, shared by all workers on one host.
+
+    Values are encoded by ``codec``; its pickles are restricted to ``WIRL_BLOB_PICKLE_MODULES``,
+    so whoever can write the table cannot make the workers run code.
+    """
+
+    def __init__(self, path: str | Path, codec: ValueCodec | None = None):
+        self.codec = codec if codec is not None else ValueCodec()
+        self.path = Path(path).expanduser()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("CREATE TABLE IF NOT EXISTS wirl_node_cache (key TEXT PRIMARY KEY, value BLOB NOT NULL, expires_at REAL NOT NULL)")
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Any:
+        with self._lock:
+            row = self._conn.execute("SELECT value, expires_at FROM wirl_node_cache WHERE key = ?", (key,)).fetchone()
+        if row is None or row[1] < time.time():
+            return MISS
+        return self.codec.loads(row[0])
+
+    def set(self, key: str, value: Any, ttl: float) -> None:
+        data = self.codec.dumps(value)
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO wirl_node_cache (key, value, expires_at) VALUES (?, ?, ?)",
+                (key, data, time.time() + ttl),
+            )
+
+
+class PostgresCacheStore:
+    """Store backed by a Postgres table, shared by all workers using the database.
+
+    Values are encoded as in ``SQLiteCacheStore``.
+    """
+
+    def __init__(self, conninfo: str, codec: ValueCodec | None = None):
+        import psycopg
+
+        self.codec = codec if codec is not None else ValueCodec()
+        self._conn = psycopg.connect(conninfo, autocommit=True)
+        self._conn.execute("CREATE TABLE IF NOT EXISTS wirl_node_cache (key TEXT PRIMARY KEY, value BYTEA NOT NULL, expires_at TIMESTAMPTZ NOT NULL)")
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Any:
+        with self._lock:
+            row = self._conn.execute("SELECT value FROM wirl_node_cache WHERE key = %s AND expires_at > now()", (key,)).fetchone()
+        if row is None:
+            return MISS
+        return self.codec.loads(row[0])
+
+    def set(self, key: str, value: Any, ttl: float) -> None:
+        data = self.codec.dumps(value)
+        with self._lock:
+            self._conn.execute(
+                """
+                INSERT INTO wirl_node_cache (key, value, expires_at)
+                VALUES (%s, %s, now() + make_interval(secs => %s))
+                ON CONFLICT (key) DO UPDATE SET value = EXCLUDED.value, expires_at = EXCLUDED.expires_at
+                """,
+                (key, data, ttl),
+            )
+
+
+def store_from_url(url: str) -> CacheStore:
+    """Build a store from ``memory``, ``sqlite:///path/to/file.db`` or a ``postgresql://`` URL."""
+    if url == "memory":
+        return InMemoryCacheStore()
+    if url.startswith("sqlite:///"):
+        return SQLiteCacheStore(url[len("sqlite:///") :])
+    if url.startswith(("postgres://", "postgresql://")):
+        return PostgresCacheStore(url)
+    raise ValueError(f"Unsupported node cache store: {url}")
+
+
+_default_store: CacheStore | None = None
+_default_store_lock = threading.Lock()
+
+
+def get_cache_store() -> CacheStore:
+    """Process-wide store, configured by ``WIRL_NODE_CACHE`` (in-memory LRU by default)."""
+    global _default_store
+    with _default_store_lock:
+        if _default_store is None:
+            _default_store = store_from_url(os.getenv(CACHE_STORE_ENV, "memory"))
+        return _default_store
+
+
+def set_cache_store(store: CacheStore | None) -> None:
+    global _default_store
+    with _default_store_lock:
+        _default_store = store
+
+
+class CacheStats:
+    """Hit and miss counters per node."""
+
+    def __init__(self):
+        self.hits: Counter[str] = Counter()
+        self.misses: Counter[str] = Counter()
+        self._lock = threading.Lock()
+
+    def record(self, node: str, hit: bool) -> None:
+        with self._lock:
+            (self.hits if hit else self.misses)[node] += 1
+
+    def snapshot(self) -> Dict[str, Dict[str, int]]:
+        with self._lock:
+            return {node: {"hits": self.hits[node], "misses": self.misses[node]} for node in self.hits.keys() | self.misses.keys()}
+
+    def reset(self) -> None:
+        with self._lock:
+            self.hits.clear()
+            self.misses.clear()
+
+
+cache_stats = CacheStats()
+
+
+class NodeCache:
+    """Memoizes one node's function output according to its WIRL ``cache`` block."""
+
+    def __init__(self, node: NodeClass, config: CacheConfig):
+        input_names = {inp.name for inp in node.inputs}
+        unknown = set(config.key) - input_names
+        if unknown:
+            raise ValueError(f"Cache key fields {sorted(unknown)} of node {node.name} are not inputs")
+        if node.hitl:
+            raise ValueError(f"Node {node.name} cannot be cached because it has a hitl block")
+        self.node_name = node.name
+        self.call = node.call
+        self.constants = {constant.name: constant.value for constant in node.constants}
+        self.key_fields = list(config.key) or sorted(input_names)
+        self.ttl = parse_duration(config.ttl)
+
+    def key(self, inputs: Dict[str, Any]) -> str | None:
+        """Cache key of ``inputs``, or ``None`` (the call is not cached) if they have no stable encoding."""
+        try:
+            return make_cache_key(self.call, self.constants, {name: inputs.get(name) for name in self.key_fields})
+        except TypeError as e:
+            logger.warning(f"Not caching {self.node_name}: {e}")
+            return None
+
+    def lookup(self, store: CacheStore, key: str | None) -> Any:
+        if key is None:
+            return MISS
+        try:
+            value = store.get(key)
+        except Exception as e:
+            # A broken cache must never fail the node; fall back to running it
+            logger.error(f"Node cache lookup failed for {self.node_name}: {e}")
+            value = MISS
+        cache_stats.record(self.node_name, value is not MISS)
+        return value
+
+    def save(self, store: CacheStore, key: str | None, value: Any) -> None:
+        if key is None:
+            return
+        try:
+            store.set(key, value, self.ttl)
+        except Exception as e:
+            logger.error(f"Node cache write failed for {self.node_name}: {e}")
@@ -1,8 +1,12 @@
 from __future__ import annotations
 
+import asyncio
+import contextvars
+import inspect
 import json
 import logging
 import operator
+from concurrent.futures import ThreadPoolExecutor
 from typing import Any, Callable, Dict, List, Set
 
 from langchain_core.runnables import RunnableConfig, RunnableLambda
@@ -13,91 +17,31 @@ from langgraph.pregel._write import ChannelWrite, ChannelWriteTupleEntry
 from langgraph.types import interrupt
 from wirl_lang import (
     CycleClass,
+    MapClass,
     NodeClass,
     Reducer,
     Workflow,
     parse_wirl_to_objects,
 )
 
+from wirl_pregel_runner.blobs import resolve_blob, resolve_blobs
+from wirl_pregel_runner.cancellation import CANCEL_KEY, RunCancelledError, check_cancelled, run_cancel_token
+from wirl_pregel_runner.channels import reducer_channels
+from wirl_pregel_runner.durability import DURABILITY_CONFIG_KEY, workflow_durability
+from wirl_pregel_runner.expressions import compile_condition, compile_value
+from wirl_pregel_runner.instrumentation import CACHED, RESUMED, SKIPPED_NOT_READY, SKIPPED_WHEN, probe
+from wirl_pregel_runner.node_cache import MISS, NodeCache, get_cache_store, parse_duration
+from wirl_pregel_runner.pruning import KEEP_ALL, PruneResult, prune_workflow
+from wirl_pregel_runner.resources import get_resource_pool, workflow_max_concurrency
+from wirl_pregel_runner.retry import NodeRetryPolicy
+from wirl_pregel_runner.timeouts import DEADLINE_KEY, CallLimit, run_deadline
+from wirl_pregel_runner.triggers import TriggerScope, cycle_scope, signal_channel, workflow_scope
+
 logger = logging.getLogger(__name__)
 
 START_NODE_NAME = "start"
 
 
-def _eval_value(expr: str, state: Dict[str, Any]):
-    if expr is None:
-        raise ValueError("Value is None")
-
-    expr = str(expr).strip()
-    if expr.startswith('"') and expr.endswith('"'):
-        return expr[1:-1]
-    try:
-        return int(expr)
-    except ValueError:
-        try:
-            return float(expr)
-        except ValueError:
-            pass
-    return state.get(expr)
-
-
-def _eval_condition(expr: str, state: Dict[str, Any]) -> bool:
-    if expr is None:
-        raise ValueError("Condition is None")
-
-    expr = str(expr).strip()
-
-    # Create a safe evaluation namespace with state values
-    safe_globals = {"__builtins__": {}}
-    safe_locals = {"true": True, "false": False, "null": None}
-
-    # Add state values to the evaluation namespace
-    for key, value in state.items():
-        # Handle dotted notation like "NodeName.output"
-        if "." in key:
-            parts = key.split(".")
-            if len(parts) == 2:
-                node_name, attr_name = parts
-                if node_name not in safe_locals:
-                    safe_locals[node_name] = {}
-                safe_locals[node_name][attr_name] = value
-        else:
-            safe_locals[key] = value
-
-    # Create objects for dotted access with fallback to False for missing attributes
-    class StateObject:
-        def __init__(self, data):
-            for k, v in data.items():
-                setattr(self, k, v)
-
-        def __getattr__(self, name):
-            # Return False for any missing attribute instead of raising AttributeError
-            return False
-
-    # Convert nested dicts to objects for attribute access
-    for key, value in list(safe_locals.items()):
-        if isinstance(value, dict):
-            safe_locals[key] = StateObject(value)
-
-    # Create a custom dict that returns a falsy StateObject for missing keys
-    class FalsyDict(dict):
-        def __missing__(self, key):
-            # Return an empty StateObject that will return False for any attribute access
-            return StateObject({})
-
-    # Wrap safe_locals in FalsyDict to handle missing node names
-    safe_locals = FalsyDict(safe_locals)
-
-    try:
-        result = eval(expr, safe_globals, safe_locals)
-        # Only None or explicit False should evaluate to False
-        # Empty containers like [], {}, "", 0 should evaluate to True
-        return result is not None and result is not False
-    except (NameError, AttributeError):
-        # If we can't evaluate due to missing names/attributes, return False
-        return False
-
-
 def extract_dependencies(inputs: List, workflow_inputs: Set[str]) -> Set[str]:
     """Extract node dependencies from input assignments"""
     dependencies = set()
@@ -132,7 +76,12 @@ def extract_in_cycle_dependencies(inputs: List, cycle_inputs: Set[str], cycle_st
     return dependencies
 
 
-def make_cycle_guard_pregel_node(cycle: CycleClass, iteration_key: str, all_in_cycle_outputs: set[str]):
+def make_cycle_guard(cycle: CycleClass, iteration_key: str) -> Callable[[dict], dict | None]:
+    """Guard of a cycle: ``None`` until its inputs are ready, then either the cycle outputs
+    (the cycle is done) or an increment of ``iteration_key`` (run another iteration)."""
+    guard_condition = compile_condition(cycle.guard.when)
+    output_values = [(cycle.name + "." + out.name, compile_value(out.default_value or "")) for out in cycle.outputs]
+
     def cycle_guard(task_input: dict) -> dict | None:
         all_inputs_available = all(task_input.get(inp.default_value) is not None for inp in cycle.guard.inputs if inp.default_value is not None and not inp.optional)
         if not all_inputs_available:
@@ -140,11 +89,10 @@ def make_cycle_guard_pregel_node(cycle: CycleClass, iteration_key: str, all_in_c
 
         update = {}
         count = task_input.get(iteration_key, 0)
-        if _eval_condition(cycle.guard.when, task_input) or count >= cycle.max_iterations - 1:
+        if guard_condition(resolve_blobs(task_input, guard_condition.channels)) or count >= cycle.max_iterations - 1:
             # Prepare the output of the cycle block
-            for out in cycle.outputs:
-                val = _eval_value(out.default_value or "", task_input)
-                update[cycle.name + "." + out.name] = val
+            for channel, value in output_values:
+                update[channel] = value(task_input)
             # And finish the cycle
             return update
 
@@ -152,58 +100,134 @@ def make_cycle_guard_pregel_node(cycle: CycleClass, iteration_key: str, all_in_c
         update[iteration_key] = 1
         return update
 
-    triggers = [inp.default_value for inp in cycle.guard.inputs if inp.target_node_name is not None and inp.default_value is not None]
-    return create_pregel_node_from_params(fn=cycle_guard, channels=triggers + [iteration_key] + list(all_in_cycle_outputs), triggers=triggers)
+    return cycle_guard
+
 
+def make_cycle_guard_pregel_node(cycle: CycleClass, iteration_key: str, all_in_cycle_outputs: set[str], scope: TriggerScope | None = None):
+    cycle_guard = make_cycle_guard(cycle, iteration_key)
+    guard_condition = compile_condition(cycle.guard.when)
 
-def create_cycle_start_pregel_node(cycle: CycleClass, iteration_key: str, cycle_nodes_outputs_to_clean: list[str], all_in_cycle_outputs: set[str]):
-    inputs_dict = {inp.name: inp.default_value for inp in cycle.inputs if inp.default_value is not None}
+    trigger_inputs = [inp for inp in cycle.guard.inputs if inp.target_node_name is not None and inp.default_value is not None]
+    triggers = [inp.default_value for inp in trigger_inputs]
+    if scope is None:
+        return create_pregel_node_from_params(fn=cycle_guard, channels=triggers + [iteration_key] + list(all_in_cycle_outputs), triggers=triggers)
+
+    # Read only what the readiness check, the guard condition and the cycle outputs use
+    referenced = [out.default_value for out in cycle.outputs if out.default_value is not None] + list(guard_condition.channels)
+    channels = triggers + [iteration_key] + [channel for channel in referenced if channel in all_in_cycle_outputs]
+    return create_pregel_node_from_params(fn=cycle_guard, channels=list(dict.fromkeys(channels)), triggers=scope.triggers(trigger_inputs))
+
+
+def make_cycle_start(cycle: CycleClass, cycle_nodes_outputs_to_clean: list[str]) -> Callable[[dict], dict]:
+    """Start of a cycle iteration: sets the cycle inputs and clears the last-value outputs of its nodes."""
+    input_values = [(cycle.name + "." + inp.name, compile_value(inp.default_value)) for inp in cycle.inputs if inp.default_value is not None]
 
     def cycle_start(task_input: dict) -> dict:
         update = {}
-        for k, expr in inputs_dict.items():
-            val = _eval_value(expr, task_input)
-            update[cycle.name + "." + k] = val
+        for channel, value in input_values:
+            update[channel] = value(task_input)
 
         for clear_node in cycle_nodes_outputs_to_clean:
             update[clear_node] = None
 
         return update
 
-    triggers = [inp.default_value for inp in cycle.inputs if inp.default_value is not None and inp.default_value not in all_in_cycle_outputs]
-    triggers.append(iteration_key)
-    return create_pregel_node_from_params(fn=cycle_start, channels=triggers + list(all_in_cycle_outputs), triggers=triggers)
+    return cycle_start
+
+
+def create_cycle_start_pregel_node(
+    cycle: CycleClass,
+    iteration_key: str,
+    cycle_nodes_outputs_to_clean: list[str],
+    all_in_cycle_outputs: set[str],
+    scope: TriggerScope | None = None,
+):
+    cycle_start = make_cycle_start(cycle, cycle_nodes_outputs_to_clean)
 
+    outside_inputs = [inp for inp in cycle.inputs if inp.default_value is not None and inp.default_value not in all_in_cycle_outputs]
+    triggers = [inp.default_value for inp in outside_inputs] + [iteration_key]
+    if scope is None:
+        return create_pregel_node_from_params(fn=cycle_start, channels=triggers + list(all_in_cycle_outputs), triggers=triggers)
 
-def make_pregel_task(node: NodeClass, fn_map: Dict[str, Any]):
+    # The cycle start has no readiness check, so it is only woken by the outside inputs that arrive last
+    pruned = scope.triggers(outside_inputs) + [iteration_key]
+    channels = triggers + [inp.default_value for inp in cycle.inputs if inp.default_value in all_in_cycle_outputs]
+    return create_pregel_node_from_params(fn=cycle_start, channels=list(dict.fromkeys(channels)), triggers=pruned)
+
+
+def resolve_cache_store(config: RunnableConfig):
+    """The node cache store for this run: ``configurable["node_cache_store"]`` or the process default."""
+    return (config.get("configurable") or {}).get("node_cache_store") or get_cache_store()
+
+
+def make_pregel_task(node: NodeClass, fn_map: Dict[str, Any], pruned: PruneResult = KEEP_ALL):
     func = fn_map.get(node.call)
     if not callable(func):
         raise ValueError(f"Function '{node.call}' not provided")
     metadata = {constant.name: constant.value for constant in node.constants}
-
-    def task(task_input: dict, config: RunnableConfig) -> dict | None:
+    when_condition = compile_condition(node.when) if node.when else None
+    retry_policy = NodeRetryPolicy.from_config(node.retry) if node.retry else NodeRetryPolicy(attempts=1)
+    node_cache = NodeCache(node, node.cache) if node.cache else None
+    timeout = parse_duration(node.timeout) if node.timeout else None
+    # Outputs without a channel (see ``prune_workflow``) are not written
+    unused = {node.name + "." + out.name for out in node.outputs if not pruned.is_used(node.name + "." + out.name)}
+
+    def node_config(config: RunnableConfig) -> dict:
+        deadline = run_deadline(config)
+        cancel = run_cancel_token(config)
+        merged = metadata | config
+        if deadline is not None:
+            merged[DEADLINE_KEY] = deadline
+        if cancel is not None:
+            merged[CANCEL_KEY] = cancel
+        return merged
+
+    # A node tagged with a resource holds one of its slots while the function runs; the
+    # time limit starts once it has one
+    def call(inputs: dict, config: RunnableConfig, activation) -> Any:
+        merged = node_config(config)
+        with get_resource_pool().hold(node.resource):
+            limit = CallLimit(node.name, timeout, merged.get(DEADLINE_KEY), merged.get(CANCEL_KEY))
+            try:
+                return limit.call(lambda: func(**inputs, config=merged))
+            finally:
+                activation.add_cpu_time(limit.thread_cpu_time)
+
+    async def acall(inputs: dict, config: RunnableConfig) -> Any:
+        merged = node_config(config)
+        async with get_resource_pool().ahold(node.resource):
+            return await CallLimit(node.name, timeout, merged.get(DEADLINE_KEY), merged.get(CANCEL_KEY)).acall(lambda: func(**inputs, config=merged))
+
+    def prepare_inputs(task_input: dict, activation) -> dict | None:
         logger.info(f"Running {node.call} with inputs {task_input}")
         # Check if all inputs are available
         all_inputs_available = all(task_input.get(inp.default_value) is not None for inp in node.inputs if not inp.optional and inp.default_value is not None)
         if not all_inputs_available:
+            activation.status = SKIPPED_NOT_READY
             return None
 
         # Check if the "when" condition is met
-        if node.when and not _eval_condition(node.when, task_input):
+        if when_condition is not None and not when_condition(resolve_blobs(task_input, when_condition.channels)):
+            activation.status = SKIPPED_WHEN
             return None
 
-        update_with_node_name = {}
-        inputs = {inp.name: task_input.get(inp.default_value, None) for inp in node.inputs}
-        try:
-            # We run HITL initiating function only the first time (because otherwise langgraph will be re-running the function after each resume)
-            resume = (config.get("configurable") or {}).get("resume", None)
-            if not resume or not node.hitl:
-                update = func(**inputs, config=metadata | config) or {}
-                update_with_node_name = {node.name + "." + k: v for k, v in update.items()}
-        except Exception as e:
-            error_msg = f"Error in {node.call}: {e}"
-            logger.error(error_msg)
-            raise RuntimeError(error_msg) from e
+        # Values restored from a checkpoint may be blob references; only this node's inputs are loaded
+        inputs = {inp.name: resolve_blob(task_input.get(inp.default_value, None)) for inp in node.inputs}
+        activation.inputs = inputs
+        return inputs
+
+    def should_call(config: RunnableConfig) -> bool:
+        # We run HITL initiating function only the first time (because otherwise langgraph will be re-running the function after each resume)
+        resume = (config.get("configurable") or {}).get("resume", None)
+        return not resume or not node.hitl
+
+    def call_failed(e: Exception) -> RuntimeError:
+        error_msg = f"Error in {node.call}: {e}"
+        logger.error(error_msg)
+        return RuntimeError(error_msg)
+
+    def finish(update: dict, inputs: dict) -> dict:
+        update_with_node_name = {node.name + "." + k: v for k, v in update.items()}
         if node.hitl:
             user_answer = interrupt({"request": json.dumps(inputs)})
             if isinstance(user_answer, dict) and len(node.outputs) > 1:
@@ -218,18 +242,101 @@ def make_pregel_task(node: NodeClass, fn_map: Dict[str, Any]):
                     update_with_node_name[node.name + "." + node.outputs[0].name] = user_answer
             else:
                 update_with_node_name[node.name + "." + node.outputs[0].name] = user_answer
+        if unused:
+            return {channel: value for channel, value in update_with_node_name.items() if channel not in unused}
         return update_with_node_name
 
+    if inspect.iscoroutinefunction(func):
+
+        async def atask(task_input: dict, config: RunnableConfig) -> dict | None:
+            check_cancelled(config)
+            with probe(node.name, node.call, config) as activation:
+                inputs = prepare_inputs(task_input, activation)
+                if inputs is None:
+                    return None
+                update = {}
+                if should_call(config):
+                    store = cache_key = None
+                    if node_cache is not None:
+                        store = resolve_cache_store(config)
+                        cache_key = node_cache.key(inputs)
+                        update = node_cache.lookup(store, cache_key)
+                        if update is not MISS:
+                            activation.status = CACHED
+                            activation.outputs = update
+                            return finish(update, inputs)
+                    try:
+                        update = await retry_policy.arun(node.name, lambda: acall(inputs, config)) or {}
+                    except RunCancelledError:
+                        raise
+                    except Exception as e:
+                        raise call_failed(e) from e
+                    if node_cache is not None:
+                        node_cache.save(store, cache_key, update)
+                else:
+                    activation.status = RESUMED
+                activation.outputs = update
+                return finish(update, inputs)
+
+        return atask
+
+    def task(task_input: dict, config: RunnableConfig) -> dict | None:
+        check_cancelled(config)
+        with probe(node.name, node.call, config) as activation:
+            inputs = prepare_inputs(task_input, activation)
+            if inputs is None:
+                return None
+            update = {}
+            if should_call(config):
+                store = cache_key = None
+                if node_cache is not None:
+                    store = resolve_cache_store(config)
+                    cache_key = node_cache.key(inputs)
+                    update = node_cache.lookup(store, cache_key)
+                    if update is not MISS:
+                        activation.status = CACHED
+                        activation.outputs = update
+                        return finish(update, inputs)
+                try:
+                    update = retry_policy.run(node.name, lambda: call(inputs, config, activation)) or {}
+                except RunCancelledError:
+                    raise
+                except Exception as e:
+                    raise call_failed(e) from e
+                if node_cache is not None:
+                    node_cache.save(store, cache_key, update)
+            else:
+                activation.status = RESUMED
+            activation.outputs = update
+            return finish(update, inputs)
+
     return task
 
 
-def create_pregel_node_from_params(fn: Callable, channels: List[str], triggers: List[str]):
+def _bind_runnable(fn: Callable) -> RunnableLambda:
+    """Bind a task as a runnable; coroutine tasks run natively under ``ainvoke``.
+
+    Under the synchronous ``invoke`` path a coroutine task is driven by its own event
+    loop on the Pregel executor thread, so async functions work with both entry points.
+    """
+    if not inspect.iscoroutinefunction(fn):
+        return RunnableLambda(fn)
+
+    def run_sync(task_input: dict, config: RunnableConfig):
+        return asyncio.run(fn(task_input, config))
+
+    return RunnableLambda(run_sync, afunc=fn, name=fn.__name__)
+
+
+def create_pregel_node_from_params(fn: Callable, channels: List[str], triggers: List[str], signal: str | None = None):
     def update_mapper(x):
         if x is None:
             return None
         updates: list[tuple[str, Any]] = []
         for k, v in x.items():
             updates.append((k, v))
+        if signal is not None:
+            updates.append((signal, 1))
         return updates
 
     return PregelNode(
@@ -238,19 +345,128 @@ def create_pregel_node_from_params(fn: Callable, channels: List[str], triggers:
         tags=[],
         metadata={},
         writers=[ChannelWrite([ChannelWriteTupleEntry(mapper=update_mapper)])],
-        bound=RunnableLambda(fn),
+        bound=_bind_runnable(fn),
         retry_policy=[],
         cache_policy=None,
     )
 
 
-def create_pregel_node(node: NodeClass, fn_map: Dict[str, Any]):
+def create_pregel_node(node: NodeClass, fn_map: Dict[str, Any], scope: TriggerScope | None = None, pruned: PruneResult = KEEP_ALL):
     channels = [inp.default_value for inp in node.inputs if inp.default_value is not None]
-    return create_pregel_node_from_params(make_pregel_task(node, fn_map), channels, channels)
+    triggers = scope.triggers(node.inputs) if scope is not None else channels
+    signal = signal_channel(node.name) if scope is not None and scope.signals else None
+    return create_pregel_node_from_params(make_pregel_task(node, fn_map, pruned), channels, triggers, signal)
+
+
+def order_map_nodes(map_block: MapClass) -> List[NodeClass]:
+    """Topologically order the nodes inside a map; they must form a DAG."""
+    scope = {map_block.name + "." + inp.name for inp in map_block.inputs} | {map_block.name + "." + map_block.item}
+    deps = {n.name: extract_in_cycle_dependencies(n.inputs, scope, map_block.name) - {map_block.name} for n in map_block.nodes}
+    by_name = {n.name: n for n in map_block.nodes}
+    for name, node_deps in deps.items():
+        unknown = node_deps - by_name.keys()
+        if unknown:
+            raise ValueError(f"Node {name} in map {map_block.name} references nodes outside the map: {unknown}")
+
+    ordered: List[NodeClass] = []
+    done: Set[str] = set()
+    while len(ordered) < len(map_block.nodes):
+        ready = [n for n in map_block.nodes if n.name not in done and deps[n.name] <= done]
+        if not ready:
+            raise ValueError(f"Nodes in map {map_block.name} form a cycle")
+        ordered.extend(ready)
+        done.update(n.name for n in ready)
+    return ordered
+
+
+def create_map_pregel_node(map_block: MapClass, fn_map: Dict[str, Any], pruned: PruneResult = KEEP_ALL):
+    """Compile a ``map`` block into a single node that runs its inner nodes once per item.
+
+    Each item gets a private state with the map inputs and the current item; inner
+    nodes run in dependency order on that state with the usual readiness and ``when``
+    rules. Up to ``max_concurrency`` items run at once and outputs are collected in
+    item order (``None`` where an inner node was skipped).
+    """
+    if any(n.hitl for n in map_block.nodes):
+        raise ValueError(f"hitl nodes are not supported inside map {map_block.name}")
+    if map_block.over not in {inp.name for inp in map_block.inputs}:
+        raise ValueError(f"Map {map_block.name} iterates over unknown input {map_block.over}")
+
+    over_channel = map_block.name + "." + map_block.over
+    item_channel = map_block.name + "." + map_block.item
+    input_values = [(map_block.name + "." + inp.name, compile_value(inp.default_value)) for inp in map_block.inputs if inp.default_value is not None]
+    output_refs = [(map_block.name + "." + out.name, out.default_value) for out in map_block.outputs if pruned.is_used(map_block.name + "." + out.name)]
+    tasks = [make_pregel_task(n, fn_map) for n in pruned.live(order_map_nodes(map_block))]
+    max_concurrency = max(1, map_block.max_concurrency)
+
+    def prepare_scope(task_input: dict) -> dict | None:
+        all_inputs_available = all(task_input.get(inp.default_value) is not None for inp in map_block.inputs if not inp.optional and inp.default_value is not None)
+        if not all_inputs_available:
+            return None
+        return {channel: resolve_blob(value(task_input)) for channel, value in input_values}
+
+    def collect(states: List[dict]) -> dict:
+        return {channel: [state.get(ref) for state in states] for channel, ref in output_refs}
+
+    def run_item(scope: dict, item: Any, config: RunnableConfig) -> dict:
+        state = scope | {item_channel: item}
+        for task in tasks:
+            state.update(task(state, config) or {})
+        return state
+
+    if any(inspect.iscoroutinefunction(task) for task in tasks):
+
+        async def amap_task(task_input: dict, config: RunnableConfig) -> dict | None:
+            scope = prepare_scope(task_input)
+            if scope is None:
+                return None
+            semaphore = asyncio.Semaphore(max_concurrency)
+
+            async def arun_item(item: Any) -> dict:
+                async with semaphore:
+                    state = scope | {item_channel: item}
+                    for task in tasks:
+                        if inspect.iscoroutinefunction(task):
+                            update = await task(state, config)
+                        else:
+                            update = await asyncio.to_thread(task, state, config)
+                        state.update(update or {})
+                    return state
+
+            return collect(list(await asyncio.gather(*(arun_item(item) for item in scope[over_channel]))))
+
+        return amap_task
+
+    def map_task(task_input: dict, config: RunnableConfig) -> dict | None:
+        scope = prepare_scope(task_input)
+        if scope is None:
+            return None
+        items = list(scope[over_channel])
+        if not items:
+            return collect([])
+        with ThreadPoolExecutor(max_workers=min(max_concurrency, len(items)), thread_name_prefix=map_block.name) as pool:
+            futures = [pool.submit(contextvars.copy_context().run, run_item, scope, item, config) for item in items]
+            return collect([future.result() for future in futures])
+
+    return map_task
+
 
+def build_pregel_graph(path: str, functions: Dict[str, Any], checkpointer: Any | None = None, prune_triggers: bool = True, prune_outputs: bool = True):
+    """Compile a WIRL file into a Pregel app.
 
-def build_pregel_graph(path: str, functions: Dict[str, Any], checkpointer: Any | None = None):
+    With ``prune_triggers`` (the default) each node is subscribed only to the input
+    channels whose update can make it ready; see ``wirl_pregel_runner.triggers``.
+    Pass ``False`` to subscribe every node to all of its input channels.
+
+    With ``prune_outputs`` (the default) nodes that cannot reach a workflow output get no
+    Pregel node and outputs that nothing reads get no channel, so they are neither written
+    nor checkpointed; see ``wirl_pregel_runner.pruning``. Each is logged at debug level,
+    since every build logs them again; ``compile_report`` lists them.
+    """
     workflow: Workflow = parse_wirl_to_objects(path)
+    pruned = prune_workflow(workflow) if prune_outputs else KEEP_ALL
+    for warning in pruned.warnings:
+        logger.debug(f"{workflow.name}: {warning}")
 
     # Dynamically build fields from workflow inputs, outputs, and all node inputs/outputs
     field_names = {}
@@ -265,6 +481,8 @@ def build_pregel_graph(path: str, functions: Dict[str, Any], checkpointer: Any |
 
     # Get workflow input names
     workflow_inputs = {inp.name for inp in workflow.inputs}
+    aggregates = reducer_channels(workflow)
+    top_scope = workflow_scope(workflow, workflow_inputs, START_NODE_NAME, set(aggregates)) if prune_triggers else None
 
     # Collect nodes dependencies
     node_dependencies = {}
@@ -272,15 +490,16 @@ def build_pregel_graph(path: str, functions: Dict[str, Any], checkpointer: Any |
     number_of_cycles = 0
     nodes = {}
     cycle_iteration_keys = []
-    for node in workflow.nodes:
+    for node in pruned.live(workflow.nodes):
         if isinstance(node, NodeClass):
             for out in node.outputs:
-                field_names[node.name + "." + out.name] = LastValue(Any)
+                if pruned.is_used(node.name + "." + out.name):
+                    field_names[node.name + "." + out.name] = LastValue(Any)
             deps = extract_dependencies(node.inputs, workflow_inputs)
             node_dependencies[node.name] = deps
 
             # Add node to graph
-            nodes[node.name] = create_pregel_node(node, fn_map)
+            nodes[node.name] = create_pregel_node(node, fn_map, top_scope, pruned)
 
         elif isinstance(node, CycleClass):
             number_of_cycles += 1
@@ -296,9 +515,11 @@ def build_pregel_graph(path: str, functions: Dict[str, Any], checkpointer: Any |
                 field_names[node.name + "." + inp.name] = LastValue(Any)
             for in_cycle_node in node.nodes:
                 for out in in_cycle_node.outputs:
+                    if not pruned.is_used(in_cycle_node.name + "." + out.name):
+                        continue
                     in_cycle_node_output_names.add(in_cycle_node.name + "." + out.name)
-                    if out.reducer == Reducer.APPEND:
-                        field_names[in_cycle_node.name + "." + out.name] = BinaryOperatorAggregate(list[Any], operator.add)  # noqa: E501
+                    if out.reducer != Reducer.LAST:
+                        field_names[in_cycle_node.name + "." + out.name] = aggregates[in_cycle_node.name + "." + out.name]()
                         # we don't want to clear aggregated values
                     else:
                         field_names[in_cycle_node.name + "." + out.name] = LastValue(Any)
@@ -309,7 +530,11 @@ def build_pregel_graph(path: str, functions: Dict[str, Any], checkpointer: Any |
             cycle_guard_name = f"{node.name}_cycle_guard"
 
             # Add cycle start node
-            nodes[cycle_start_name] = create_cycle_start_pregel_node(node, iteration_key, list(cycle_nodes_outputs_to_clean), in_cycle_node_output_names)
+            nodes[cycle_start_name] = create_cycle_start_pregel_node(node, iteration_key, list(cycle_nodes_outputs_to_clean), in_cycle_node_output_names, top_scope)
+            body_scope = cycle_scope(node, set(aggregates)) if prune_triggers else None
+            if body_scope is not None:
+                for in_cycle_node in node.nodes:
+                    field_names[signal_channel(in_cycle_node.name)] = BinaryOperatorAggregate(int, operator.add)
 
             # Extract dependencies for the cycle
             deps = extract_dependencies(node.inputs + node.outputs, workflow_inputs)
@@ -321,13 +546,27 @@ def build_pregel_graph(path: str, functions: Dict[str, Any], checkpointer: Any |
             for cycle_node in node.nodes:
                 deps = extract_in_cycle_dependencies(cycle_node.inputs, set(cycle_inputs_and_outputs), cycle_start_name)
                 node_dependencies[cycle_node.name] = deps
-                nodes[cycle_node.name] = create_pregel_node(cycle_node, fn_map)
+                nodes[cycle_node.name] = create_pregel_node(cycle_node, fn_map, body_scope, pruned)
                 nodes_outputs.extend([cycle_node.name + "." + out.name for out in cycle_node.outputs])
 
             # Add cycle guard node
-            nodes[cycle_guard_name] = make_cycle_guard_pregel_node(node, iteration_key, in_cycle_node_output_names)
+            nodes[cycle_guard_name] = make_cycle_guard_pregel_node(node, iteration_key, in_cycle_node_output_names, body_scope)
             node_dependencies[cycle_guard_name] = set([cycle_start_name])
 
+        elif isinstance(node, MapClass):
+            # The map is a single composite node; its inner nodes' outputs stay private to each item
+            for out in node.outputs:
+                if not pruned.is_used(node.name + "." + out.name):
+                    continue
+                if out.reducer != Reducer.LAST:
+                    field_names[node.name + "." + out.name] = aggregates[node.name + "." + out.name]()
+                else:
+                    field_names[node.name + "." + out.name] = LastValue(Any)
+            node_dependencies[node.name] = extract_dependencies(node.inputs, workflow_inputs)
+            channels = [inp.default_value for inp in node.inputs if inp.default_value is not None]
+            triggers = top_scope.triggers(node.inputs) if top_scope is not None else channels
+            nodes[node.name] = create_pregel_node_from_params(create_map_pregel_node(node, fn_map, pruned), channels, triggers)
+
     # Create dependency-based edges
     for node_name, deps in node_dependencies.items():
         for dep in deps:
@@ -339,12 +578,21 @@ def build_pregel_graph(path: str, functions: Dict[str, Any], checkpointer: Any |
     if len(output_nodes) == 0:
         raise ValueError(f"There is no output node detected in {workflow.name}")
 
+    app_config: Dict[str, Any] = {}
+    durability = workflow_durability(workflow)
+    if durability:
+        app_config["metadata"] = {DURABILITY_CONFIG_KEY: durability}
+    # Caps the tasks Pregel runs at once within a superstep
+    max_concurrency = workflow_max_concurrency(workflow)
+    if max_concurrency:
+        app_config["max_concurrency"] = max_concurrency
     app = Pregel(
         nodes=nodes,
         channels=field_names,
         input_channels=list(workflow_inputs),
         output_channels=[out.default_value for out in workflow.outputs if out.default_value is not None] + cycle_iteration_keys,
         checkpointer=checkpointer,
+        config=app_config or None,
     )
 
     return app
@@ -6,16 +6,91 @@ import argparse
 import json
 import logging
 import traceback
-from typing import Any, Dict, List
+from typing import Any, AsyncIterator, Dict, Iterator, List
 
 from langchain_core.runnables import RunnableConfig
 from langgraph.types import Command
+from wirl_lang import parse_wirl_to_objects
 
+from wirl_pregel_runner.app_cache import get_native_workflow, get_pregel_app
+from wirl_pregel_runner.blobs import resolve_blobs
+from wirl_pregel_runner.cancellation import CANCEL_CONFIG_KEY, CancelToken, check_cancelled
+from wirl_pregel_runner.durability import DURABILITY_MODES, resolve_durability, validate_durability
+from wirl_pregel_runner.native_executor import NativeWorkflow, build_native_workflow, unsupported_reason
 from wirl_pregel_runner.pregel_graph_builder import build_pregel_graph
+from wirl_pregel_runner.streaming import STREAM_MODES, NodeUpdate, StreamCollector, WorkflowResult
+from wirl_pregel_runner.timeouts import DEADLINE_CONFIG_KEY
 
 logger = logging.getLogger(__name__)
 
 
+# Executors accepted by run_workflow and arun_workflow
+EXECUTORS = ("auto", "pregel", "native")
+
+
+def _run_config(thread_id: str | None, cache_store: Any | None, deadline: float | None = None, cancel_token: CancelToken | None = None) -> RunnableConfig:
+    config: RunnableConfig = {"configurable": {"thread_id": thread_id}, "recursion_limit": 1000}
+    if cache_store is not None:
+        config["configurable"]["node_cache_store"] = cache_store
+    if deadline is not None:
+        config["configurable"][DEADLINE_CONFIG_KEY] = deadline
+    if cancel_token is not None:
+        config["configurable"][CANCEL_CONFIG_KEY] = cancel_token
+    return config
+
+
+def _native_workflow(
+    workflow_path: str,
+    fn_map: Dict[str, Any],
+    executor: str,
+    resume: str | None,
+    checkpointer: Any | None,
+    use_app_cache: bool,
+    durability: str | None,
+) -> NativeWorkflow | None:
+    """The native executor for this run, or ``None`` to run on Pregel.
+
+    ``auto`` picks the native executor for runs without checkpoints: no checkpointer, no
+    resume and no ``hitl`` node in the workflow.
+    """
+    if executor not in EXECUTORS:
+        raise ValueError(f"Unknown executor {executor!r}, expected one of {', '.join(EXECUTORS)}")
+    if durability is not None:
+        validate_durability(durability)
+    if executor == "pregel" or (executor == "auto" and (checkpointer is not None or resume)):
+        return None
+    if executor == "native" and (checkpointer is not None or resume):
+        raise ValueError("The native executor does not write checkpoints; use the pregel executor with a checkpointer or resume")
+    native = get_native_workflow(workflow_path, fn_map) if use_app_cache else build_native_workflow(workflow_path, functions=fn_map)
+    if native is None and executor == "native":
+        raise ValueError(f"Workflow {workflow_path} cannot run on the native executor: {unsupported_reason(parse_wirl_to_objects(workflow_path))}")
+    return native
+
+
+def _prepare_run(
+    workflow_path: str,
+    fn_map: Dict[str, Any],
+    thread_id: str | None,
+    resume: str | None,
+    checkpointer: Any | None,
+    use_app_cache: bool,
+    cache_store: Any | None = None,
+    durability: str | None = None,
+    deadline: float | None = None,
+    cancel_token: CancelToken | None = None,
+):
+    if use_app_cache:
+        app = get_pregel_app(workflow_path, fn_map, checkpointer=checkpointer)
+    else:
+        app = build_pregel_graph(workflow_path, functions=fn_map, checkpointer=checkpointer)
+    config = _run_config(thread_id, cache_store, deadline, cancel_token)
+    resume_val = None
+    if resume:
+        resume_val = json.loads(resume)
+        config["configurable"]["resume"] = resume_val
+    return app, config, resume_val, resolve_durability(app, durability)
+
+
 def run_workflow(
     workflow_path: str,
     fn_map: Dict[str, Any],
@@ -23,22 +98,139 @@ def run_workflow(
     thread_id: str | None = None,
     resume: str | None = None,
     checkpointer: Any | None = None,
+    use_app_cache: bool = True,
+    cache_store: Any | None = None,
+    durability: str | None = None,
+    executor: str = "auto",
+    deadline: float | None = None,
+    cancel_token: CancelToken | None = None,
 ):
+    """Run a workflow to completion or to its first HITL interrupt.
+
+    ``executor`` is ``pregel``, ``native`` (see ``NativeWorkflow``) or ``auto``, which uses
+    the native executor when the run needs no checkpoints. ``deadline`` is a ``time.time()``
+    timestamp: node functions get it as ``config["deadline"]`` and fail once it passes.
+    Cancelling ``cancel_token`` stops the run with ``RunCancelledError`` before the next node
+    starts. Running async functions, and sync ones with a ``timeout:``, are not waited for.
+    """
     logger.info(f"Running workflow {workflow_path} for thread {thread_id}, with params {params}, resume {resume}")
-    app = build_pregel_graph(workflow_path, functions=fn_map, checkpointer=checkpointer)
-    config: RunnableConfig = {"configurable": {"thread_id": thread_id}, "recursion_limit": 1000}
+    native = _native_workflow(workflow_path, fn_map, executor, resume, checkpointer, use_app_cache, durability)
+    if native is not None:
+        return native.invoke(params, _run_config(thread_id, cache_store, deadline, cancel_token))
+    app, config, resume_val, durability = _prepare_run(workflow_path, fn_map, thread_id, resume, checkpointer, use_app_cache, cache_store, durability, deadline, cancel_token)
     if resume:
-        resume_val = json.loads(resume)
-        config["configurable"]["resume"] = resume_val
         try:
-            result = app.invoke(Command(resume=resume_val), config)
+            result = app.invoke(Command(resume=resume_val), config, durability=durability)
         except Exception as e:
             stack_trace = traceback.format_exc()
             logger.error(f"Error resuming workflow {workflow_path} for thread {thread_id}: {e}\n{stack_trace}")
             raise e
     else:
-        result = app.invoke(params, config)
-    return result
+        result = app.invoke(params, config, durability=durability)
+    return resolve_blobs(result)
+
+
+async def arun_workflow(
+    workflow_path: str,
+    fn_map: Dict[str, Any],
+    params: Dict[str, Any] | None = None,
+    thread_id: str | None = None,
+    resume: str | None = None,
+    checkpointer: Any | None = None,
+    use_app_cache: bool = True,
+    cache_store: Any | None = None,
+    durability: str | None = None,
+    executor: str = "auto",
+    deadline: float | None = None,
+    cancel_token: CancelToken | None = None,
+):
+    """Async counterpart of ``run_workflow`` built on ``ainvoke``.
+
+    Coroutine functions in ``fn_map`` are awaited on the caller's event loop; plain
+    functions run in the default executor. The checkpointer must support the async API
+    (e.g. ``AsyncPostgresSaver`` or ``InMemorySaver``).
+    """
+    logger.info(f"Running workflow {workflow_path} asynchronously for thread {thread_id}, with params {params}, resume {resume}")
+    native = _native_workflow(workflow_path, fn_map, executor, resume, checkpointer, use_app_cache, durability)
+    if native is not None:
+        return await native.ainvoke(params, _run_config(thread_id, cache_store, deadline, cancel_token))
+    app, config, resume_val, durability = _prepare_run(workflow_path, fn_map, thread_id, resume, checkpointer, use_app_cache, cache_store, durability, deadline, cancel_token)
+    if resume:
+        try:
+            result = await app.ainvoke(Command(resume=resume_val), config, durability=durability)
+        except Exception as e:
+            stack_trace = traceback.format_exc()
+            logger.error(f"Error resuming workflow {workflow_path} for thread {thread_id}: {e}\n{stack_trace}")
+            raise e
+    else:
+        result = await app.ainvoke(params, config, durability=durability)
+    return resolve_blobs(result)
+
+
+def stream_workflow(
+    workflow_path: str,
+    fn_map: Dict[str, Any],
+    params: Dict[str, Any] | None = None,
+    thread_id: str | None = None,
+    resume: str | None = None,
+    checkpointer: Any | None = None,
+    use_app_cache: bool = True,
+    cache_store: Any | None = None,
+    durability: str | None = None,
+    deadline: float | None = None,
+    cancel_token: CancelToken | None = None,
+) -> Iterator[NodeUpdate | WorkflowResult]:
+    """Run a workflow and yield a ``NodeUpdate`` as each node finishes.
+
+    The last item is a ``WorkflowResult`` whose ``values`` equal what ``run_workflow``
+    would have returned, including ``__interrupt__`` when a HITL node paused the run.
+    """
+    logger.info(f"Streaming workflow {workflow_path} for thread {thread_id}, with params {params}, resume {resume}")
+    app, config, resume_val, durability = _prepare_run(workflow_path, fn_map, thread_id, resume, checkpointer, use_app_cache, cache_store, durability, deadline, cancel_token)
+    collector = StreamCollector()
+    try:
+        for chunk in app.stream(Command(resume=resume_val) if resume else params, config, stream_mode=STREAM_MODES, output_keys=app.output_channels, durability=durability):
+            check_cancelled(config)
+            update = collector.feed(chunk)
+            if update is not None:
+                yield update
+    except Exception as e:
+        if resume:
+            stack_trace = traceback.format_exc()
+            logger.error(f"Error resuming workflow {workflow_path} for thread {thread_id}: {e}\n{stack_trace}")
+        raise e
+    yield collector.result()
+
+
+async def astream_workflow(
+    workflow_path: str,
+    fn_map: Dict[str, Any],
+    params: Dict[str, Any] | None = None,
+    thread_id: str | None = None,
+    resume: str | None = None,
+    checkpointer: Any | None = None,
+    use_app_cache: bool = True,
+    cache_store: Any | None = None,
+    durability: str | None = None,
+    deadline: float | None = None,
+    cancel_token: CancelToken | None = None,
+) -> AsyncIterator[NodeUpdate | WorkflowResult]:
+    """Async counterpart of ``stream_workflow`` built on ``astream``."""
+    logger.info(f"Streaming workflow {workflow_path} asynchronously for thread {thread_id}, with params {params}, resume {resume}")
+    app, config, resume_val, durability = _prepare_run(workflow_path, fn_map, thread_id, resume, checkpointer, use_app_cache, cache_store, durability, deadline, cancel_token)
+    collector = StreamCollector()
+    try:
+        async for chunk in app.astream(Command(resume=resume_val) if resume else params, config, stream_mode=STREAM_MODES, output_keys=app.output_channels, durability=durability):
+            check_cancelled(config)
+            update = collector.feed(chunk)
+            if update is not None:
+                yield update
+    except Exception as e:
+        if resume:
+            stack_trace = traceback.format_exc()
+            logger.error(f"Error resuming workflow {workflow_path} for thread {thread_id}: {e}\n{stack_trace}")
+        raise e
+    yield collector.result()
 
 
 if __name__ == "__main__":
@@ -48,6 +240,8 @@ if __name__ == "__main__":
     parser.add_argument("--param", action="append", default=[], help="Workflow input parameter key=value")
     parser.add_argument("--thread-id", type=str, default="cli")
     parser.add_argument("--resume", type=str, default=None)
+    parser.add_argument("--executor", choices=EXECUTORS, default="auto", help="Execution engine; auto uses the native executor when no checkpoint is needed")
+    parser.add_argument("--durability", choices=DURABILITY_MODES, default=None, help="Checkpoint durability, overrides the workflow metadata")
     args = parser.parse_args()
 
     mod = __import__(args.functions, fromlist=["*"])
@@ -80,4 +274,4 @@ if __name__ == "__main__":
         return out
 
     params = parse_params(args.param)
-    result = run_workflow(args.workflow_path, fn_map, params, args.thread_id, args.resume)
+    result = run_workflow(args.workflow_path, fn_map, params, args.thread_id, args.resume, durability=args.durability, executor=args.executor)
@@ -0,0 +1,142 @@
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Set, Tuple
+
+from wirl_lang import CycleClass, MapClass, NodeClass, Workflow
+
+from wirl_pregel_runner.expressions import compile_condition
+
+
+@dataclass
+class PruneResult:
+    """Nodes and outputs of a workflow that nothing uses.
+
+    Only nodes with no live consumer and no sink role are dead. A sink, a node or block
+    none of whose outputs anything reads, may exist for its side effects and is always
+    kept (``side_effect_nodes``, when it does not write a workflow output either). So at
+    the top level, ``dead_nodes`` only holds nodes (and cycle or map blocks) whose outputs
+    feed nothing but other dead nodes, such as two nodes that only feed each other; in a
+    map, also inner nodes none of whose outputs reach a used map output. ``unused_outputs``
+    holds the ``Node.output`` channels of the remaining nodes that nothing reads. Dead
+    nodes and unused outputs get no channel or Pregel node.
+    """
+
+    dead_nodes: List[str] = field(default_factory=list)
+    unused_outputs: List[str] = field(default_factory=list)
+    side_effect_nodes: List[str] = field(default_factory=list)
+    warnings: List[str] = field(default_factory=list)
+
+    def is_used(self, channel: str) -> bool:
+        return channel not in self.unused_outputs and channel.split(".")[0] not in self.dead_nodes
+
+    def live(self, nodes: Iterable) -> List:
+        return [node for node in nodes if node.name not in self.dead_nodes]
+
+
+# Nothing to prune: what build_pregel_graph(prune_outputs=False) uses
+KEEP_ALL = PruneResult()
+
+
+def _condition_refs(expression: str | None) -> Set[str]:
+    # Conditions read ``Node.output`` channels and plain input names, never a whole node
+    return set(compile_condition(expression).channels) if expression else set()
+
+
+def _input_refs(inputs: Iterable) -> Set[str]:
+    return {str(inp.default_value).strip() for inp in inputs if inp.default_value is not None}
+
+
+class _Unit:
+    """A node or block with the channels it writes and the references it reads."""
+
+    def __init__(self, name: str, outputs: Set[str], refs: Set[str], inner: List["_Unit"] | None = None):
+        self.name = name
+        self.outputs = outputs
+        self.refs = refs
+        self.inner = inner or []
+
+
+def _node_unit(node: NodeClass) -> _Unit:
+    return _Unit(node.name, {node.name + "." + out.name for out in node.outputs}, _input_refs(node.inputs) | _condition_refs(node.when))
+
+
+def _units(workflow: Workflow) -> List[_Unit]:
+    units = []
+    for node in workflow.nodes:
+        if isinstance(node, NodeClass):
+            units.append(_node_unit(node))
+        elif isinstance(node, CycleClass):
+            # The cycle's own wiring (inputs, guard, outputs) reads in-cycle outputs once the cycle runs
+            refs = _input_refs(node.inputs) | _input_refs(node.guard.inputs) | _condition_refs(node.guard.when) | _input_refs(node.outputs)
+            inner = [_node_unit(inner) for inner in node.nodes]
+            outputs = {node.name + "." + out.name for out in node.outputs}
+            units.append(_Unit(node.name, outputs | {channel for unit in inner for channel in unit.outputs}, refs, inner))
+        elif isinstance(node, MapClass):
+            units.append(_Unit(node.name, {node.name + "." + out.name for out in node.outputs}, _input_refs(node.inputs)))
+    return units
+
+
+def _live(units: Dict[str, _Unit], roots: Set[str], wired: Set[str] = frozenset()) -> Tuple[Set[str], Set[str], Set[str]]:
+    """Units reachable backwards from the ``roots`` channels, the channels they read, and the sinks.
+
+    Sinks, units none of whose outputs another unit reads or ``wired`` lists (like a node
+    that saves a report), run for their side effects and are always live. Sinks that write
+    no ``roots`` channel are returned as the third item.
+    """
+    reads = {name: unit.refs.union(*(inner.refs for inner in unit.inner)) for name, unit in units.items()}
+
+    live = {name for name, unit in units.items() if not unit.outputs & wired and not any(unit.outputs & reads[other] for other in units if other != name)}
+    sinks = {name for name in live if not units[name].outputs & roots}
+    read = set(roots).union(*(reads[name] for name in live))
+    changed = True
+    while changed:
+        changed = False
+        for name, unit in units.items():
+            if name not in live and unit.outputs & read:
+                live.add(name)
+                read |= reads[name]
+                changed = True
+    return live, read, sinks
+
+
+def _dead_map_nodes(map_block: MapClass, used: Set[str]) -> List[str]:
+    """Inner nodes of a live map whose outputs reach none of its used outputs."""
+    inner = {node.name: _node_unit(node) for node in map_block.nodes}
+    refs = {map_block.name + "." + out.name: str(out.default_value).strip() for out in map_block.outputs if out.default_value is not None}
+    live, _, _ = _live(inner, {ref for channel, ref in refs.items() if channel in used}, set(refs.values()))
+    return [name for name in inner if name not in live]
+
+
+def prune_workflow(workflow: Workflow) -> PruneResult:
+    """Find the nodes and outputs that ``build_pregel_graph`` can leave out.
+
+    Outputs are read by node inputs and ``when`` conditions, by the inputs, outputs and
+    guard of cycles, by the inputs and outputs of maps and by the workflow outputs.
+    Starting from the workflow outputs, a node is live when a live node reads one of its
+    outputs; nodes and blocks whose outputs nobody reads are kept for their side effects,
+    and so is everything they read. A pure node at the end of a chain is never pruned.
+    Inside a cycle, every node of a live cycle is kept: the guard may depend on any of them.
+    """
+    units = {unit.name: unit for unit in _units(workflow)}
+    live, read, sinks = _live(units, _input_refs(workflow.outputs))
+
+    result = PruneResult(side_effect_nodes=[node.name for node in workflow.nodes if node.name in sinks])
+    for node in workflow.nodes:
+        if node.name not in live:
+            result.dead_nodes.append(node.name)
+            result.warnings.append(f"Node {node.name} is never used: none of its outputs reaches a workflow output")
+            continue
+        declared = list(units[node.name].outputs)
+        if isinstance(node, CycleClass):
+            # Cycle outputs are written by the guard, which also ends the cycle
+            declared = [inner.name + "." + out.name for inner in node.nodes for out in inner.outputs]
+        for channel in sorted(declared):
+            if channel not in read:
+                result.unused_outputs.append(channel)
+                result.warnings.append(f"Output {channel} is never read")
+        if isinstance(node, MapClass):
+            for name in _dead_map_nodes(node, read):
+                result.dead_nodes.append(name)
+                result.warnings.append(f"Node {name} in map {node.name} is never used: none of its outputs reaches a map output")
+    return result
@@ -0,0 +1,134 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+import threading
+from contextlib import asynccontextmanager, contextmanager
+from typing import AsyncIterator, Dict, Iterator, Mapping
+
+from wirl_lang import Workflow
+
+logger = logging.getLogger(__name__)
+
+# WIRL ``metadata`` entry capping the nodes that run at once in one run of a workflow
+MAX_CONCURRENCY_KEY = "max_concurrency"
+
+# Process-wide resource limits, e.g. ``ollama=1,openai=8``
+RESOURCE_LIMITS_ENV = "WIRL_RESOURCE_LIMITS"
+
+
+def workflow_max_concurrency(workflow: Workflow) -> int | None:
+    """``max_concurrency`` set in the workflow's ``metadata`` block, if any."""
+    if workflow.metadata is None or MAX_CONCURRENCY_KEY not in workflow.metadata.entries:
+        return None
+    value = workflow.metadata.entries[MAX_CONCURRENCY_KEY]
+    try:
+        limit = int(value)
+    except ValueError:
+        limit = 0
+    if limit < 1:
+        raise ValueError(f"Workflow {workflow.name} needs a positive integer max_concurrency, got {value!r}")
+    return limit
+
+
+def parse_limits(spec: str) -> Dict[str, int]:
+    """Parse ``name=limit,...`` as in ``WIRL_RESOURCE_LIMITS``."""
+    limits = {}
+    for entry in filter(None, (part.strip() for part in spec.split(","))):
+        name, sep, value = entry.partition("=")
+        if not sep or not value.strip().isdigit():
+            raise ValueError(f"Invalid resource limit {entry!r}, expected name=limit")
+        limits[name.strip()] = int(value)
+    return limits
+
+
+# Backoff of async waiters polling for a free slot, in seconds
+_MIN_POLL = 0.005
+_MAX_POLL = 0.05
+
+
+class ResourcePool:
+    """Named semaphores shared by every run in the process.
+
+    A node tagged ``resource: ollama`` holds one slot of ``ollama`` while its function is
+    called (each retry attempt takes a slot again, backoff sleeps do not hold one). Sync
+    functions on Pregel's threads, map threads and async functions on any event loop share
+    the same slots. Resources without a limit are not limited.
+    """
+
+    def __init__(self, limits: Mapping[str, int] | None = None):
+        self._lock = threading.Lock()
+        self._limits: Dict[str, int] = {}
+        self._semaphores: Dict[str, threading.BoundedSemaphore] = {}
+        self.configure(limits or {})
+
+    def configure(self, limits: Mapping[str, int]) -> None:
+        """Set the limits of the given resources. Runs holding a slot of a replaced limit release it as usual."""
+        for name, limit in limits.items():
+            if limit < 1:
+                raise ValueError(f"Resource {name} needs a limit of at least 1, got {limit}")
+        with self._lock:
+            for name, limit in limits.items():
+                self._limits[name] = limit
+                self._semaphores[name] = threading.BoundedSemaphore(limit)
+
+    def limits(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self._limits)
+
+    def _semaphore(self, resource: str | None) -> threading.BoundedSemaphore | None:
+        if resource is None:
+            return None
+        with self._lock:
+            semaphore = self._semaphores.get(resource)
+        if semaphore is None:
+            logger.debug(f"Resource {resource} has no limit")
+        return semaphore
+
+    @contextmanager
+    def hold(self, resource: str | None) -> Iterator[None]:
+        semaphore = self._semaphore(resource)
+        if semaphore is None:
+            yield
+            return
+        semaphore.acquire()
+        try:
+            yield
+        finally:
+            semaphore.release()
+
+    @asynccontextmanager
+    async def ahold(self, resource: str | None) -> AsyncIterator[None]:
+        semaphore = self._semaphore(resource)
+        if semaphore is None:
+            yield
+            return
+        # Poll instead of blocking a thread per waiter: waiting nodes must not use up the
+        # default executor that sync nodes run on under ``ainvoke``
+        delay = _MIN_POLL
+        while not semaphore.acquire(blocking=False):
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, _MAX_POLL)
+        try:
+            yield
+        finally:
+            semaphore.release()
+
+
+_default_pool: ResourcePool | None = None
+_default_pool_lock = threading.Lock()
+
+
+def get_resource_pool() -> ResourcePool:
+    """Process-wide pool, configured by ``WIRL_RESOURCE_LIMITS`` (no limits by default)."""
+    global _default_pool
+    with _default_pool_lock:
+        if _default_pool is None:
+            _default_pool = ResourcePool(parse_limits(os.getenv(RESOURCE_LIMITS_ENV, "")))
+        return _default_pool
+
+
+def set_resource_limits(limits: Mapping[str, int]) -> None:
+    """Limit how many nodes tagged with each resource run at once, e.g. ``{"ollama": 1}``."""
+    get_resource_pool().configure(limits)
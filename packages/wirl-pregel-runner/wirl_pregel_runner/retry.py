@@ -0,0 +1,165 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+import random
+import time
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, FrozenSet, List
+
+from langgraph.errors import GraphBubbleUp
+from wirl_lang import RetryConfig
+
+from wirl_pregel_runner.cancellation import RunCancelledError
+from wirl_pregel_runner.timeouts import DeadlineExceededError
+
+logger = logging.getLogger(__name__)
+
+INITIAL_INTERVAL = float(os.getenv("WIRL_RETRY_INITIAL_INTERVAL", 1.0))
+MAX_INTERVAL = float(os.getenv("WIRL_RETRY_MAX_INTERVAL", 30.0))
+JITTER = 0.25
+
+BACKOFFS = {"exponential", "linear", "constant", "none"}
+
+# Matched by class name anywhere in the exception's MRO, so client libraries need not be importable here
+TRANSIENT_ERRORS = frozenset(
+    {
+        "ConnectionError",
+        "TimeoutError",
+        "TimeoutException",
+        "APIConnectionError",
+        "APITimeoutError",
+        "RateLimitError",
+        "InternalServerError",
+        "ServiceUnavailableError",
+    }
+)
+
+
+@dataclass(frozen=True)
+class RetryAttempt:
+    """One failed attempt that is going to be retried."""
+
+    node: str
+    attempt: int
+    latency: float
+    delay: float
+    error: str
+
+
+RetryListener = Callable[[RetryAttempt], None]
+
+_listeners: List[RetryListener] = []
+
+
+def add_retry_listener(listener: RetryListener) -> None:
+    _listeners.append(listener)
+
+
+def remove_retry_listener(listener: RetryListener) -> None:
+    _listeners.remove(listener)
+
+
+def _record(attempt: RetryAttempt) -> None:
+    logger.warning(f"Retrying {attempt.node} (attempt {attempt.attempt} failed after {attempt.latency:.3f}s, next in {attempt.delay:.3f}s): {attempt.error}")
+    for listener in list(_listeners):
+        try:
+            listener(attempt)
+        except Exception as e:  # pragma: no cover - listeners must not break execution
+            logger.error(f"Retry listener failed: {e}")
+
+
+@dataclass(frozen=True)
+class NodeRetryPolicy:
+    """Node-level retry policy built from a WIRL ``retry { attempts, backoff, policy }`` block.
+
+    ``backoff`` is ``exponential``, ``linear``, ``constant`` or ``none``. ``policy`` is
+    ``all`` (any exception), ``transient`` (connection, timeout and rate-limit errors)
+    or the name of an exception class to retry on.
+    """
+
+    attempts: int
+    backoff: str = "exponential"
+    exceptions: FrozenSet[str] = field(default_factory=frozenset)
+    initial_interval: float = INITIAL_INTERVAL
+    max_interval: float = MAX_INTERVAL
+    jitter: float = JITTER
+
+    @classmethod
+    def from_config(cls, config: RetryConfig) -> "NodeRetryPolicy":
+        if config.attempts < 1:
+            raise ValueError(f"retry attempts must be at least 1, got {config.attempts}")
+        if config.backoff not in BACKOFFS:
+            raise ValueError(f"Unknown retry backoff '{config.backoff}', expected one of {sorted(BACKOFFS)}")
+        if config.policy in ("all", "any"):
+            exceptions: FrozenSet[str] = frozenset()
+        elif config.policy == "transient":
+            exceptions = TRANSIENT_ERRORS
+        else:
+            exceptions = frozenset({config.policy})
+        return cls(
+            attempts=config.attempts,
+            backoff=config.backoff,
+            exceptions=exceptions,
+            initial_interval=INITIAL_INTERVAL,
+            max_interval=MAX_INTERVAL,
+        )
+
+    def should_retry(self, error: BaseException) -> bool:
+        if isinstance(error, (GraphBubbleUp, DeadlineExceededError, RunCancelledError)):
+            return False
+        if not self.exceptions:
+            return True
+        current: BaseException | None = error
+        while current is not None:
+            if any(cls.__name__ in self.exceptions for cls in type(current).__mro__):
+                return True
+            current = current.__cause__
+        return False
+
+    def delay(self, attempt: int) -> float:
+        if self.backoff == "exponential":
+            base = self.initial_interval * 2 ** (attempt - 1)
+        elif self.backoff == "linear":
+            base = self.initial_interval * attempt
+        elif self.backoff == "constant":
+            base = self.initial_interval
+        else:
+            return 0.0
+        base = min(base, self.max_interval)
+        return base * random.uniform(1 - self.jitter, 1 + self.jitter)
+
+    def _next_delay(self, node: str, attempt: int, started: float, error: Exception) -> float | None:
+        """Return the delay before the next attempt, or None when ``error`` must be raised."""
+        if attempt >= self.attempts or not self.should_retry(error):
+            return None
+        delay = self.delay(attempt)
+        _record(RetryAttempt(node=node, attempt=attempt, latency=time.perf_counter() - started, delay=delay, error=repr(error)))
+        return delay
+
+    def run(self, node: str, fn: Callable[[], Any]) -> Any:
+        attempt = 1
+        while True:
+            started = time.perf_counter()
+            try:
+                return fn()
+            except Exception as e:
+                delay = self._next_delay(node, attempt, started, e)
+                if delay is None:
+                    raise
+            time.sleep(delay)
+            attempt += 1
+
+    async def arun(self, node: str, fn: Callable[[], Awaitable[Any]]) -> Any:
+        attempt = 1
+        while True:
+            started = time.perf_counter()
+            try:
+                return await fn()
+            except Exception as e:
+                delay = self._next_delay(node, attempt, started, e)
+                if delay is None:
+                    raise
+            await asyncio.sleep(delay)
+            attempt += 1
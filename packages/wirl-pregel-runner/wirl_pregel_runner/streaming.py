@@ -0,0 +1,103 @@
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Dict, List, Tuple
+
+from wirl_pregel_runner.blobs import resolve_blobs
+from wirl_pregel_runner.triggers import is_signal_channel
+
+# Pregel stream modes used by stream_workflow: per-task events, interrupts and the final state
+STREAM_MODES = ["debug", "updates", "values"]
+
+
+@dataclass(frozen=True)
+class NodeUpdate:
+    """One finished node activation.
+
+    ``outputs`` holds the channels the node wrote (``Node.output`` keys). ``started_at``
+    is when the task was scheduled for its superstep and ``duration`` is in seconds.
+    """
+
+    node: str
+    step: int
+    outputs: Dict[str, Any]
+    started_at: datetime
+    finished_at: datetime
+    duration: float
+    interrupts: List[Any] = field(default_factory=list)
+    error: str | None = None
+
+
+@dataclass(frozen=True)
+class WorkflowResult:
+    """Last item of a stream: the same value ``run_workflow`` returns."""
+
+    values: Dict[str, Any]
+    steps: int
+    duration: float
+
+    @property
+    def interrupted(self) -> bool:
+        return "__interrupt__" in self.values
+
+
+class StreamCollector:
+    """Turns ``(mode, payload)`` chunks from ``Pregel.stream`` into ``NodeUpdate`` items.
+
+    Activations that wrote nothing are dropped: a WIRL node runs whenever one of its
+    trigger channels changes and returns nothing until its inputs are ready.
+    """
+
+    def __init__(self):
+        self.latest: Dict[str, Any] = {}
+        self.interrupts: List[Any] = []
+        self.steps = 0
+        self._started: Dict[str, datetime] = {}
+        self._first: datetime | None = None
+        self._last: datetime | None = None
+
+    def feed(self, chunk: Tuple[str, Any]) -> NodeUpdate | None:
+        mode, payload = chunk
+        if mode == "values":
+            self.latest = payload
+        elif mode == "updates":
+            if isinstance(payload, dict) and (interrupts := payload.get("__interrupt__")) is not None:
+                self.interrupts.extend(interrupts)
+        elif mode == "debug":
+            return self._feed_debug(payload)
+        return None
+
+    def _feed_debug(self, event: Dict[str, Any]) -> NodeUpdate | None:
+        timestamp = datetime.fromisoformat(event["timestamp"])
+        self._first = self._first or timestamp
+        self._last = timestamp
+        task = event["payload"]
+        if event["type"] == "task":
+            self._started[task["id"]] = timestamp
+            return None
+        if event["type"] != "task_result":
+            return None
+
+        self.steps = max(self.steps, event["step"] + 1)
+        started_at = self._started.pop(task["id"], timestamp)
+        outputs = {channel: value for channel, value in task["result"] if not is_signal_channel(channel)}
+        if not outputs and not task["interrupts"] and task["error"] is None:
+            return None
+        return NodeUpdate(
+            node=task["name"],
+            step=event["step"],
+            outputs=outputs,
+            started_at=started_at,
+            finished_at=timestamp,
+            duration=(timestamp - started_at).total_seconds(),
+            interrupts=list(task["interrupts"]),
+            error=task["error"],
+        )
+
+    def result(self) -> WorkflowResult:
+        values = resolve_blobs(dict(self.latest)) if isinstance(self.latest, dict) else {}
+        if self.interrupts:
+            values["__interrupt__"] = self.interrupts
+        duration = (self._last - self._first).total_seconds() if self._first and self._last else 0.0
+        return WorkflowResult(values=values, steps=self.steps, duration=duration)
@@ -0,0 +1,133 @@
+from __future__ import annotations
+
+import asyncio
+import contextvars
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, wait
+from typing import Any, Awaitable, Callable
+
+from langchain_core.runnables import RunnableConfig
+
+from wirl_pregel_runner.cancellation import CancelToken, RunCancelledError
+
+# Key under ``configurable`` holding the run's deadline (a ``time.time()`` timestamp)
+DEADLINE_CONFIG_KEY = "wirl_deadline"
+# Key of the deadline in the ``config`` passed to node functions
+DEADLINE_KEY = "deadline"
+
+
+class NodeTimeoutError(TimeoutError):
+    """A node function did not return within its ``timeout:``."""
+
+
+class DeadlineExceededError(Exception):
+    """The run's deadline passed before or while a node function ran. It is never retried."""
+
+
+def run_deadline(config: RunnableConfig) -> float | None:
+    return (config.get("configurable") or {}).get(DEADLINE_CONFIG_KEY)
+
+
+def time_left(config: dict) -> float | None:
+    """Seconds left before the deadline in a node function's ``config``, ``None`` without a deadline."""
+    deadline = config.get(DEADLINE_KEY)
+    return None if deadline is None else max(0.0, deadline - time.time())
+
+
+class CallLimit:
+    """Limits of one call of a node function: its ``timeout:`` capped by the run's deadline,
+    and the run's cancel token. Both are checked when the call starts."""
+
+    def __init__(self, node: str, timeout: float | None, deadline: float | None, cancel: CancelToken | None = None):
+        self.node = node
+        self.timeout = timeout
+        self.deadline = deadline
+        self.cancel = cancel
+        self.seconds = timeout
+        # CPU time of the function when it ran on its own thread (the caller's thread does not see it)
+        self.thread_cpu_time = 0.0
+        if cancel is not None:
+            cancel.raise_if_cancelled()
+        if deadline is not None:
+            left = deadline - time.time()
+            if left <= 0:
+                raise DeadlineExceededError(f"Deadline passed before {node} started")
+            self.seconds = left if timeout is None else min(timeout, left)
+
+    def error(self) -> Exception:
+        if self.timeout is not None and self.seconds == self.timeout:
+            return NodeTimeoutError(f"{self.node} timed out after {self.timeout:g}s")
+        return DeadlineExceededError(f"Deadline passed while {self.node} was running")
+
+    def call(self, fn: Callable[[], Any]) -> Any:
+        """Call ``fn``; with a ``timeout:``, wait at most ``seconds`` for it, or until the run is cancelled.
+
+        Without a ``timeout:``, ``fn`` runs on the caller's thread: the deadline and the cancel
+        token were checked before it started and are checked again before the next node.
+        With one, ``fn`` runs on its own daemon thread. Threads cannot be stopped, so a call that
+        times out or is cancelled keeps running there and its result is dropped; the node fails
+        right away. The CPU time of a call that returned in time is left in ``thread_cpu_time``.
+        """
+        if self.timeout is None:
+            return fn()
+        future: Future = Future()
+        stop: Future = Future()
+
+        def target() -> None:
+            started = time.thread_time()
+            try:
+                result, error = fn(), None
+            except BaseException as e:
+                result, error = None, e
+            # Read before the caller is woken up
+            self.thread_cpu_time = time.thread_time() - started
+            if error is None:
+                future.set_result(result)
+            else:
+                future.set_exception(error)
+
+        context = contextvars.copy_context()
+        threading.Thread(target=context.run, args=(target,), name=f"{self.node}-timed", daemon=True).start()
+        unregister = self.cancel.on_cancel(lambda: stop.set_result(None)) if self.cancel is not None else None
+        try:
+            done, _ = wait([future, stop], timeout=self.seconds, return_when=FIRST_COMPLETED)
+        finally:
+            if unregister is not None:
+                unregister()
+        if future in done:
+            return future.result()
+        if stop in done:
+            raise RunCancelledError(self.cancel.reason)
+        raise self.error()
+
+    async def acall(self, fn: Callable[[], Awaitable[Any]]) -> Any:
+        """Await ``fn()``, cancelling it after ``seconds`` or once the run is cancelled."""
+        if self.seconds is None and self.cancel is None:
+            return await fn()
+        # Not ``wait_for``: a TimeoutError raised by the function itself must not look like ours
+        task = asyncio.ensure_future(fn())
+        loop = asyncio.get_running_loop()
+        stop = loop.create_future()
+        unregister = self.cancel.on_cancel(lambda: loop.call_soon_threadsafe(_resolve, stop)) if self.cancel is not None else None
+        try:
+            done, _ = await asyncio.wait({task, stop}, timeout=self.seconds, return_when=asyncio.FIRST_COMPLETED)
+        except asyncio.CancelledError:
+            task.cancel()
+            raise
+        finally:
+            if unregister is not None:
+                unregister()
+            stop.cancel()
+        if task in done:
+            return task.result()
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+        if stop in done:
+            raise RunCancelledError(self.cancel.reason)
+        raise self.error()
+
+
+def _resolve(future: asyncio.Future) -> None:
+    if not future.done():
+        future.set_result(None)
@@ -0,0 +1,129 @@
+from __future__ import annotations
+
+from typing import Callable, Dict, Iterable, List, Set
+
+from wirl_lang import CycleClass, MapClass, NodeClass, Workflow
+
+# Resolves an input reference to the name of the node that writes it within a scope
+Resolver = Callable[[str], "str | None"]
+
+SIGNAL_SUFFIX = ".__written__"
+
+
+def signal_channel(node_name: str) -> str:
+    """Channel bumped by every write of a node inside a cycle.
+
+    The cycle start clears in-cycle outputs by writing ``None`` to them, which would wake
+    every consumer of those channels. Consumers inside a cycle are triggered by the
+    producer's signal channel instead and still read the data channels.
+    """
+    return node_name + SIGNAL_SUFFIX
+
+
+def is_signal_channel(channel: str) -> bool:
+    return channel.endswith(SIGNAL_SUFFIX)
+
+
+def _dedupe(channels: Iterable[str]) -> List[str]:
+    return list(dict.fromkeys(channels))
+
+
+class TriggerScope:
+    """Dependency analysis for one scope: the top-level workflow or the body of a cycle.
+
+    ``root`` writes all of its channels before any member of the scope runs: the workflow
+    input for the top level and the cycle start for a cycle body, which also clears the
+    body's outputs at every iteration. A member ``X`` is a required ancestor of ``Y`` when
+    a chain of required inputs leads from ``X`` to ``Y``. Such inputs are last-value channels,
+    so once ``Y`` has written, ``X`` has already written every output it is going to write.
+    """
+
+    def __init__(
+        self,
+        root: str,
+        members: Iterable[NodeClass | CycleClass | MapClass],
+        resolve: Resolver,
+        aggregates: Set[str],
+        signals: bool = False,
+    ):
+        self.root = root
+        self.resolve = resolve
+        self.aggregates = aggregates
+        self.signals = signals
+        members = list(members)
+        parents: Dict[str, Set[str]] = {}
+        for member in members:
+            # Cycles have no readiness check on their inputs, so nothing is inferred through them
+            parents[member.name] = set() if isinstance(member, CycleClass) else self.anchors(member.inputs)
+        self.ancestors: Dict[str, Set[str]] = {}
+        for name in parents:
+            seen: Set[str] = set()
+            stack = list(parents[name])
+            while stack:
+                parent = stack.pop()
+                if parent not in seen and parent in parents:
+                    seen.add(parent)
+                    stack.extend(parents[parent])
+            self.ancestors[name] = seen
+
+    def anchors(self, inputs: List) -> Set[str]:
+        """Members that must have written before these inputs can all be present."""
+        anchors = set()
+        for inp in inputs:
+            channel = inp.default_value
+            if channel is None or inp.optional or channel in self.aggregates:
+                continue
+            producer = self.resolve(channel)
+            if producer is not None and producer != self.root:
+                anchors.add(producer)
+        return anchors
+
+    def triggers(self, inputs: List) -> List[str]:
+        """Input channels whose update can make a node with these inputs ready.
+
+        A channel is dropped when its writer always writes before one of the node's
+        required producers: the scope root, or a required ancestor of another producer.
+        Channels written outside the scope are always kept. In a scope with ``signals``
+        the channels of a member are replaced by its signal channel.
+        """
+        anchors = {anchor for anchor in self.anchors(inputs) if anchor in self.ancestors}
+        triggers = []
+        for inp in inputs:
+            channel = inp.default_value
+            if channel is None:
+                continue
+            producer = self.resolve(channel)
+            if anchors and producer is not None:
+                if producer == self.root or any(producer in self.ancestors[anchor] for anchor in anchors if anchor != producer):
+                    continue
+            triggers.append(signal_channel(producer) if self.signals and producer in self.ancestors else channel)
+        return _dedupe(triggers)
+
+
+def workflow_scope(workflow: Workflow, workflow_inputs: Set[str], root: str, aggregates: Set[str]) -> TriggerScope:
+    names = {node.name for node in workflow.nodes}
+
+    def resolve(channel: str) -> str | None:
+        channel = str(channel).strip()
+        if channel in workflow_inputs:
+            return root
+        if "." in channel and not channel.startswith('"') and channel.split(".")[0] in names:
+            return channel.split(".")[0]
+        return None
+
+    return TriggerScope(root, workflow.nodes, resolve, aggregates)
+
+
+def cycle_scope(cycle: CycleClass, aggregates: Set[str]) -> TriggerScope:
+    cycle_inputs = {cycle.name + "." + inp.name for inp in cycle.inputs}
+    names = {node.name for node in cycle.nodes}
+
+    def resolve(channel: str) -> str | None:
+        channel = str(channel).strip()
+        if channel in cycle_inputs:
+            return cycle.name
+        if "." in channel and not channel.startswith('"') and channel.split(".")[0] in names:
+            return channel.split(".")[0]
+        return None
+
+    return TriggerScope(cycle.name, cycle.nodes, resolve, aggregates, signals=True)
@@ -5,13 +5,10 @@ import smtplib
 from datetime import datetime
 from email.message import EmailMessage
 from io import BytesIO
-from typing import Any
 
 import markdown
 from langchain_ollama import ChatOllama
 from langchain_openai import ChatOpenAI
-from langgraph.checkpoint.serde import jsonplus
-from langgraph.checkpoint.serde.jsonplus import _msgpack_default, _option, ormsgpack
 from PIL import Image as PILImage
 from pillow_heif import register_heif_opener
 
@@ -20,45 +17,6 @@ logger = logging.getLogger(__name__)
 # Register HEIF opener with Pillow
 register_heif_opener()
 
-# Workaround for langgraph checkpoint serialization error
-# https://github.com/langchain-ai/langgraph/issues/4956#issuecomment-3135374853
-
-
-def message_to_dict(msg):
-    """
-    Recursively convert a message or object into a dict/str (safe for serialization).
-    """
-    # Handles HumanMessage, AIMessage, ToolMessage, etc.
-    if hasattr(msg, "to_dict"):
-        return msg.to_dict()
-    elif isinstance(msg, dict):
-        # Recursively convert dict values
-        return {k: message_to_dict(v) for k, v in msg.items()}
-    elif isinstance(msg, (list, tuple)):
-        # Recursively convert each item
-        return [message_to_dict(x) for x in msg]
-    elif isinstance(msg, (str, int, float, bool, type(None))):
-        return msg
-    else:
-        # Fallback: try to extract content and role
-        print("Serialization Fallback, type:", type(msg))
-        print(msg)
-        return {
-            "role": getattr(msg, "role", "user"),
-            "content": str(getattr(msg, "content", msg)),
-        }
-
-
-def _msgpack_enc(data: Any) -> bytes:
-    return ormsgpack.packb(
-        message_to_dict(data), default=_msgpack_default, option=_option
-    )
-
-
-setattr(jsonplus, "_msgpack_enc", _msgpack_enc)
-
-logger = logging.getLogger(__name__)
-
 
 def get_photos(config: dict, obsidian_folder_path: str) -> dict:
     export_path = os.path.expanduser(config.get("export_path", "~/Exports"))